@@ -2,8 +2,13 @@ package main
 
 import (
 	"context"
+	"encoding/json"
 	"fmt"
+	"log/slog"
 	"os"
+	"strconv"
+	"sync"
+	"time"
 
 	"github.com/open-policy-agent/opa/ast"
 	"github.com/open-policy-agent/opa/cmd"
@@ -21,6 +26,69 @@ var mongoDatabase string
 
 var allowed_collections = []string{"resources"}
 
+var logger *slog.Logger
+
+// Results shared across evaluations (per-evaluation memoization only covers
+// repeated calls within the same decision)
+var cache *queryCache
+
+type cacheEntry struct {
+	value   ast.Value
+	expires time.Time
+}
+
+type queryCache struct {
+	mu         sync.Mutex
+	ttl        time.Duration
+	maxEntries int
+	entries    map[string]cacheEntry
+}
+
+func newQueryCache(ttl time.Duration, maxEntries int) *queryCache {
+	return &queryCache{
+		ttl:        ttl,
+		maxEntries: maxEntries,
+		entries:    make(map[string]cacheEntry),
+	}
+}
+
+func (c *queryCache) get(key string) (ast.Value, bool) {
+	if c.ttl <= 0 {
+		return nil, false
+	}
+	c.mu.Lock()
+	defer c.mu.Unlock()
+	entry, ok := c.entries[key]
+	if !ok {
+		return nil, false
+	}
+	if time.Now().After(entry.expires) {
+		delete(c.entries, key)
+		return nil, false
+	}
+	return entry.value, true
+}
+
+func (c *queryCache) set(key string, value ast.Value) {
+	if c.ttl <= 0 {
+		return
+	}
+	c.mu.Lock()
+	defer c.mu.Unlock()
+	now := time.Now()
+	if len(c.entries) >= c.maxEntries {
+		for k, entry := range c.entries {
+			if now.After(entry.expires) {
+				delete(c.entries, k)
+			}
+		}
+		if len(c.entries) >= c.maxEntries {
+			c.entries = make(map[string]cacheEntry)
+		}
+	}
+	c.entries[key] = cacheEntry{value: value, expires: now.Add(c.ttl)}
+}
+
 func getFromEnv(var_name string) string {
 	uri := os.Getenv(var_name)
 	if uri == "" {
@@ -30,6 +98,27 @@ func getFromEnv(var_name string) string {
 	return uri
 }
 
+func getIntFromEnv(var_name string, fallback int) int {
+	value := os.Getenv(var_name)
+	if value == "" {
+		return fallback
+	}
+	number, err := strconv.Atoi(value)
+	if err != nil {
+		panic(fmt.Sprintf("ENV VAR INVALID:: %s: %v", var_name, err))
+	}
+	return number
+}
+
+func initLogger() {
+	level := slog.LevelInfo
+	if os.Getenv("TAUTH_OPA_MONGODB_DEBUG") != "" {
+		level = slog.LevelDebug
+	}
+	handler := slog.NewJSONHandler(os.Stderr, &slog.HandlerOptions{Level: level})
+	logger = slog.New(handler).With("plugin", "mongodb")
+}
+
 func initMongoClient(uri string, database string) error {
 	clientOptions := options.Client().ApplyURI(uri)
 	client, err := mongo.Connect(context.Background(), clientOptions)
@@ -49,10 +138,16 @@ func initMongoClient(uri string, database string) error {
 }
 
 func main() {
+	initLogger()
+	cache = newQueryCache(
+		time.Duration(getIntFromEnv("TAUTH_OPA_MONGODB_CACHE_TTL", 5))*time.Second,
+		getIntFromEnv("TAUTH_OPA_MONGODB_CACHE_SIZE", 1024),
+	)
+
 	// Initialize MongoDB connection (you'd typically get these from config)
 	err := initMongoClient(getFromEnv("TAUTH_MONGODB_URI"), getFromEnv("TAUTH_MONGODB_DBNAME"))
 	if err != nil {
-		fmt.Println("Failed to connect to MongoDB:", err)
+		logger.Error("Failed to connect to MongoDB", "error", err)
 		os.Exit(1)
 	}
 
@@ -65,32 +160,24 @@ func main() {
 			Nondeterministic: true,
 		},
 		func(bctx rego.BuiltinContext, a, b *ast.Term) (*ast.Term, error) {
-			var collection string
-			var queryMap map[string]interface{}
-
-			// Extract collection name
-			if err := ast.As(a.Value, &collection); err != nil {
-				return nil, fmt.Errorf("first argument must be a string (collection name): %v", err)
-			}
-
-			// Extract query
-			if err := ast.As(b.Value, &queryMap); err != nil {
-				return nil, fmt.Errorf("second argument must be a map (query): %v", err)
-			}
-
-			// Perform MongoDB query
-			results, err := performMongoQuery(collection, queryMap)
-			if err != nil {
-				return nil, err
-			}
+			return queryBuiltin(a, b, nil)
+		},
+	)
 
-			// Convert results to AST value
-			v, err := ast.InterfaceToValue(results)
-			if err != nil {
-				return nil, err
+	// Same as mongodb.query, only fetching the given fields of each document
+	rego.RegisterBuiltin3(
+		&rego.Function{
+			Name:             "mongodb.query_fields",
+			Decl:             types.NewFunction(types.Args(types.S, types.A, types.NewArray(nil, types.S)), types.A),
+			Memoize:          true,
+			Nondeterministic: true,
+		},
+		func(bctx rego.BuiltinContext, a, b, c *ast.Term) (*ast.Term, error) {
+			var fields []string
+			if err := ast.As(c.Value, &fields); err != nil {
+				return nil, fmt.Errorf("third argument must be an array of strings (fields): %v", err)
 			}
-
-			return ast.NewTerm(v), nil
+			return queryBuiltin(a, b, fields)
 		},
 	)
 
@@ -100,6 +187,56 @@ func main() {
 		os.Exit(1)
 	}
 }
+
+func queryBuiltin(a, b *ast.Term, fields []string) (*ast.Term, error) {
+	var collection string
+	var queryMap map[string]interface{}
+
+	// Extract collection name
+	if err := ast.As(a.Value, &collection); err != nil {
+		return nil, fmt.Errorf("first argument must be a string (collection name): %v", err)
+	}
+
+	// Extract query
+	if err := ast.As(b.Value, &queryMap); err != nil {
+		return nil, fmt.Errorf("second argument must be a map (query): %v", err)
+	}
+
+	// JSON encoding sorts map keys, so equivalent queries share an entry
+	canonical, err := json.Marshal([]interface{}{collection, queryMap, fields})
+	if err != nil {
+		return nil, err
+	}
+	key := string(canonical)
+	if v, ok := cache.get(key); ok {
+		logger.Debug("Query cache hit", "collection", collection, "query", key)
+		return ast.NewTerm(v), nil
+	}
+
+	// Perform MongoDB query
+	start := time.Now()
+	results, err := performMongoQuery(collection, queryMap, fields)
+	if err != nil {
+		return nil, err
+	}
+	logger.Debug(
+		"Queried MongoDB",
+		"collection", collection,
+		"query", key,
+		"results", len(results),
+		"duration", time.Since(start),
+	)
+
+	// Convert results to AST value
+	v, err := ast.InterfaceToValue(results)
+	if err != nil {
+		return nil, err
+	}
+	cache.set(key, v)
+
+	return ast.NewTerm(v), nil
+}
+
 func check_collection_allowed(collection string) bool {
 	for _, allowed_collection := range allowed_collections {
 		if collection == allowed_collection {
@@ -110,13 +247,13 @@ func check_collection_allowed(collection string) bool {
 }
 
 // performMongoQuery executes a query on the specified collection
-func performMongoQuery(collection string, queryMap map[string]interface{}) ([]map[string]interface{}, error) {
+func performMongoQuery(collection string, queryMap map[string]interface{}, fields []string) ([]map[string]interface{}, error) {
 	if mongoClient == nil {
 		return nil, fmt.Errorf("MongoDB client not initialized")
 	}
 
 	if !check_collection_allowed(collection) {
-		fmt.Println("Collection not allowed")
+		logger.Debug("Collection not allowed", "collection", collection)
 		return nil, fmt.Errorf("collection not allowed")
 	}
 	if idQuery, ok := queryMap["_id"].(map[string]interface{}); ok {
@@ -148,8 +285,17 @@ func performMongoQuery(collection string, queryMap map[string]interface{}) ([]ma
 	// Convert query map to BSON
 	query := bson.M(queryMap)
 
+	findOptions := options.Find()
+	if fields != nil {
+		projection := bson.M{}
+		for _, field := range fields {
+			projection[field] = 1
+		}
+		findOptions.SetProjection(projection)
+	}
+
 	// Execute query
-	cursor, err := coll.Find(context.Background(), query)
+	cursor, err := coll.Find(context.Background(), query, findOptions)
 	if err != nil {
 		return nil, err
 	}
@@ -160,8 +306,6 @@ func performMongoQuery(collection string, queryMap map[string]interface{}) ([]ma
 	if err = cursor.All(context.Background(), &results); err != nil {
 		return nil, err
 	}
-	fmt.Println("RESULTS FROM MONGO:")
-	fmt.Println(results)
 
 	return results, nil
 }
@@ -21,13 +21,38 @@ alias := object.get(input.request.query, "db_alias", fallback_alias)
 
 datasource_name := input.request.path.name
 
-datasource_resources = mongodb.query(
+# Only the fields read by `parse_resource`
+resource_fields := ["_id", "resource_identifier", "metadata"]
+
+# Resources are read from the snapshot tauth keeps in OPA's data when it is
+# enabled (TAUTH_AUTHZ_ENGINE_SETTINGS_OPA_RESOURCE_SNAPSHOT), and from
+# MongoDB otherwise
+snapshot := data.tauth_resources
+
+datasource_resources := [resource |
+	some resource in snapshot.by_key.datasources[alias][datasource_name]
+] if {
+	snapshot.synced
+} else := mongodb.query_fields(
 	"resources",
 	{
 		"resource_collection": "datasources",
 		"resource_identifier": datasource_name,
 		"metadata.alias": alias,
 	},
+	resource_fields,
+)
+
+resources_by_id(ids) := [resource |
+	some id in ids
+	resource := snapshot.by_id[id]
+	resource.metadata.alias == alias
+] if {
+	snapshot.synced
+} else := mongodb.query_fields(
+	"resources",
+	create_read_many_filter(ids),
+	resource_fields,
 )
 
 
@@ -102,8 +127,7 @@ default read_many := []
 
 read_many := {resources |
 	ds_permissions := [permissions_name | is_ds_permission(input.permissions[i]); permissions_name := parse_permission(input.permissions[i].name)]
-	filter := create_read_many_filter(ds_permissions)
-	raw_resources = mongodb.query("resources", filter)
+	raw_resources := resources_by_id(ds_permissions)
 	some raw_resource in raw_resources
 	resources = parse_resource(raw_resource)
 }
@@ -4,7 +4,8 @@ import rego.v1
 
 build_permission_name(parts) = concat("::", parts)
 
+# `input.permission_index` maps the name of each permission in
+# `input.permissions` to true
 check_permission(target) if {
-	some permission in input.permissions
-	permission.name == target 
-}
\ No newline at end of file
+	input.permission_index[target]
+}
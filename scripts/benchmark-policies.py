@@ -0,0 +1,300 @@
+"""
+Benchmarks the policies in `resources/policies` with synthetic entities.
+
+Each scenario evaluates a policy rule for entities with 10, 1k and 100k
+permissions (the checked permission is always the last one) and reports
+decisions per second and the memory allocated per decision.
+
+The embedded engine is used by default, with `mongodb.query` answered from
+synthetic resources. `--engine opa` targets a running OPA instead (see
+`TAUTH_AUTHZ_ENGINE_SETTINGS_OPA_*`); scenarios calling `mongodb.query` are
+skipped there, as they would need a populated database.
+
+Save a run with `--save results.json` and compare later runs against it with
+`--baseline results.json`: the script exits with status 1 if any scenario
+loses more than `--threshold` of its throughput or allocates that much more.
+
+Usage: python scripts/benchmark-policies.py [--engine embedded|opa]
+    [--permissions N ...] [--duration SECONDS] [--profile]
+    [--save FILE] [--baseline FILE] [--threshold FRACTION]
+"""
+
+import argparse
+import cProfile
+import json
+import pstats
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+from bson import ObjectId
+from loguru import logger
+
+from tauth.authz.engines.interface import AuthorizationInterface
+
+POLICIES_DIR = Path(__file__).parents[1] / "resources" / "policies"
+ROUNDS = 5
+RESOURCES = [
+    {
+        "_id": str(ObjectId()),
+        "resource_collection": "datasources",
+        "resource_identifier": f"datasource-{i}",
+        "metadata": {"alias": "teialabs"},
+    }
+    for i in range(10)
+]
+
+
+@dataclass
+class Scenario:
+    name: str
+    policy_name: str
+    rule: str
+    make_context: Callable[[int], dict]
+    uses_mongodb: bool = False
+
+
+def make_permissions(n: int, last: str) -> dict:
+    """Permissions and their index, as `authz.controllers.authorize` sends."""
+    permissions = [
+        {"name": f"service::permission-{i}", "entity_handle": "/teialabs"}
+        for i in range(n - 1)
+    ]
+    permissions.append({"name": last, "entity_handle": "/teialabs"})
+    return {
+        "permissions": permissions,
+        "permission_index": {p["name"]: True for p in permissions},
+    }
+
+
+def make_entity() -> dict:
+    return {
+        "handle": "user@teialabs.com",
+        "owner_ref": {"handle": "/teialabs", "type": "organization"},
+        "type": "user",
+    }
+
+
+def impersonate(n: int) -> dict:
+    return make_permissions(n, "tauth::impersonator")
+
+
+def melt_key(n: int) -> dict:
+    infostar = {
+        "authprovider_type": "melt-key",
+        "apikey_name": "default",
+        "authprovider_org": "/teialabs",
+    }
+    return {"infostar": infostar} | make_permissions(n, "service::other")
+
+
+def datasource_read(n: int) -> dict:
+    resource = RESOURCES[0]
+    return {
+        "entity": make_entity(),
+        "request": {
+            "query": {},
+            "path": {"name": resource["resource_identifier"]},
+        },
+    } | make_permissions(n, f"ds::read::{resource['_id']}")
+
+
+def datasource_read_many(n: int) -> dict:
+    context = datasource_read(n)
+    # Every tenth permission is a datasource permission
+    for i, permission in enumerate(context["permissions"][:-1]):
+        if i % 10 == 0:
+            resource = RESOURCES[i % len(RESOURCES)]
+            permission["name"] = f"ds::read::{resource['_id']}"
+    context["permission_index"] = {
+        p["name"]: True for p in context["permissions"]
+    }
+    return context
+
+
+SCENARIOS = [
+    Scenario("impersonate.allow", "impersonate", "allow", impersonate),
+    Scenario("melt-key.allow", "melt-key", "allow", melt_key),
+    Scenario(
+        "datasources.ds2_has_read",
+        "datasources",
+        "ds2_has_read",
+        datasource_read,
+        uses_mongodb=True,
+    ),
+    Scenario(
+        "datasources.read_many",
+        "datasources",
+        "read_many",
+        datasource_read_many,
+        uses_mongodb=True,
+    ),
+]
+
+
+def query_resources(collection, query, fields=None) -> list:
+    """Stand-in for `mongodb.query*`, filtering the synthetic resources."""
+
+    def matches(resource: dict) -> bool:
+        for field, condition in query.items():
+            value = resource
+            for part in field.split("."):
+                value = value.get(part) if isinstance(value, dict) else None
+            if isinstance(condition, dict) and "$in" in condition:
+                if value not in condition["$in"]:
+                    return False
+            elif value != condition:
+                return False
+        return True
+
+    return [
+        {k: v for k, v in resource.items() if fields is None or k in fields}
+        for resource in RESOURCES
+        if matches(resource)
+    ]
+
+
+def get_engine(name: str) -> AuthorizationInterface:
+    if name == "opa":
+        from tauth.authz.engines.opa.engine import OPAEngine
+        from tauth.authz.engines.opa.settings import OPASettings
+
+        engine = OPAEngine(OPASettings())
+    else:
+        from tauth.authz.engines.embedded import builtins
+        from tauth.authz.engines.embedded.engine import EmbeddedEngine
+        from tauth.authz.engines.embedded.settings import EmbeddedSettings
+
+        builtins.BUILTINS["mongodb.query"] = query_resources
+        builtins.BUILTINS["mongodb.query_fields"] = query_resources
+        engine = EmbeddedEngine(EmbeddedSettings())
+        # Policies are only loaded from this script, not from the database
+        engine._synced_at = float("inf")
+    for path in sorted(POLICIES_DIR.glob("*.rego")):
+        engine.upsert_policy(path.stem, path.read_text())
+    return engine
+
+
+def measure(
+    engine: AuthorizationInterface,
+    scenario: Scenario,
+    context: dict,
+    duration: float,
+) -> dict:
+    def decide():
+        return engine.is_authorized(
+            scenario.policy_name, scenario.rule, context
+        )
+
+    result = decide()
+    if not result.authorized:
+        raise AssertionError(f"{scenario.name} was not authorized: {result}")
+
+    # Best of several rounds, so that noise only ever makes results slower
+    best = 0.0
+    for _ in range(ROUNDS):
+        runs, start = 0, time.perf_counter()
+        while (
+            elapsed := time.perf_counter() - start
+        ) < duration / ROUNDS or runs == 0:
+            decide()
+            runs += 1
+        best = max(best, runs / elapsed)
+
+    tracemalloc.start()
+    decide()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "decisions_per_second": best,
+        "allocated_kib": current / 1024,
+        "peak_kib": peak / 1024,
+    }
+
+
+def profile(engine: AuthorizationInterface, scenario: Scenario, context):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    for _ in range(10):
+        engine.is_authorized(scenario.policy_name, scenario.rule, context)
+    profiler.disable()
+    pstats.Stats(profiler).sort_stats("tottime").print_stats(10)
+
+
+def regressions(
+    results: dict[str, dict], baseline: dict[str, dict], threshold: float
+) -> list[str]:
+    found = []
+    for key, result in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        throughput = result["decisions_per_second"]
+        if throughput < previous["decisions_per_second"] * (1 - threshold):
+            found.append(
+                f"{key}: {throughput:.0f} decisions/s "
+                f"(baseline {previous['decisions_per_second']:.0f})"
+            )
+        if result["peak_kib"] > previous["peak_kib"] * (1 + threshold):
+            found.append(
+                f"{key}: {result['peak_kib']:.1f} KiB peak "
+                f"(baseline {previous['peak_kib']:.1f})"
+            )
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--engine", choices=["embedded", "opa"], default="embedded"
+    )
+    parser.add_argument(
+        "--permissions", type=int, nargs="+", default=[10, 1000, 100_000]
+    )
+    parser.add_argument("--duration", type=float, default=1.0)
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--save", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    args = parser.parse_args()
+
+    logger.remove()
+    engine = get_engine(args.engine)
+    results: dict[str, dict] = {}
+    print(
+        f"{'scenario':<28} {'permissions':>11} {'decisions/s':>12} "
+        f"{'alloc (KiB)':>12} {'peak (KiB)':>11}"
+    )
+    for scenario in SCENARIOS:
+        if scenario.uses_mongodb and args.engine == "opa":
+            print(f"{scenario.name:<28} skipped (needs mongodb.query data)")
+            continue
+        for n in args.permissions:
+            context = scenario.make_context(n)
+            result = measure(engine, scenario, context, args.duration)
+            results[f"{args.engine}:{scenario.name}:{n}"] = result
+            print(
+                f"{scenario.name:<28} {n:>11} "
+                f"{result['decisions_per_second']:>12.1f} "
+                f"{result['allocated_kib']:>12.1f} "
+                f"{result['peak_kib']:>11.1f}"
+            )
+            if args.profile:
+                profile(engine, scenario, context)
+
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2))
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        found = regressions(results, baseline, args.threshold)
+        if found:
+            print("\nRegressions:", *found, sep="\n  ")
+            sys.exit(1)
+        print("\nNo regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Measures the CPU spent turning entity documents read from MongoDB into a
+response (validating `EntityDAO`s and dumping them), as a list endpoint does.
+
+Reads are measured as TAuth does them, trusting the stored `_id`, and as if
+the id had to be hashed again from the `hashable_fields` (documents without
+`_id`), which is what every dump cost before `StoredHashIdMixin`.
+
+Usage: python scripts/benchmark-reads.py [--entities N ...] [--runs N]
+"""
+
+import argparse
+import time
+
+from bson import ObjectId
+
+from tauth.entities.models import EntityDAO
+from tauth.schemas import Infostar
+
+INFOSTAR = Infostar(
+    request_id=ObjectId(),
+    apikey_name="default",
+    authprovider_org="/",
+    authprovider_type="melt-key",
+    extra={},
+    service_handle="tauth",
+    user_handle="sysadmin@teialabs.com",
+    user_owner_handle="/",
+    original=None,
+    client_ip="127.0.0.1",
+)
+
+
+def make_documents(n: int) -> list[dict]:
+    """Entities as stored in the `entities` collection."""
+    return [
+        EntityDAO(
+            handle=f"user-{i}@teialabs.com",
+            owner_ref={"handle": "/teialabs", "type": "organization"},
+            roles=[{"id": ObjectId()}],
+            external_ids=[{"name": "auth0-id", "value": f"auth0|{i}"}],
+            type="user",
+            created_by=INFOSTAR,
+        ).bson()
+        for i in range(n)
+    ]
+
+
+def read(documents: list[dict]) -> list[dict]:
+    entities = [EntityDAO.model_validate(d) for d in documents]
+    return [e.model_dump(by_alias=True) for e in entities]
+
+
+def measure(documents: list[dict], runs: int) -> float:
+    """Returns the CPU time per request, in microseconds."""
+    for _ in range(min(runs, 10)):
+        read(documents)
+    start = time.process_time()
+    for _ in range(runs):
+        read(documents)
+    return (time.process_time() - start) / runs * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--entities", type=int, nargs="+", default=[1, 100, 1024]
+    )
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'entities':>9} {'hashed (us)':>12} {'stored (us)':>12}")
+    for n in args.entities:
+        stored = make_documents(n)
+        hashed = [{k: v for k, v in d.items() if k != "_id"} for d in stored]
+        assert read(stored) == read(hashed), "Reads produced different ids."
+        before = measure(hashed, args.runs)
+        after = measure(stored, args.runs)
+        print(f"{n:>9} {before:>12.1f} {after:>12.1f}  x{before / after:.1f}")
+
+
+if __name__ == "__main__":
+    main()
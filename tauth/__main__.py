@@ -1,9 +1,15 @@
+import os
 import subprocess
 import sys
+import tempfile
 from pathlib import Path
+from typing import cast
 
+import orjson
 import uvicorn
 
+from .authz.engines.opa import bundle
+from .authz.engines.opa.settings import OPASettings
 from .settings import Settings
 
 
@@ -12,13 +18,35 @@ def main():
 
     # Authorization API
     # improved debug logging: --log-format=json-pretty
-    path_opa_executable = Path(__file__).parents[1] / "opa"
-    subprocess.Popen(
-        f"{path_opa_executable} run --server --log-level=debug --v1-compatible",
-        shell=True,
-        stdout=sys.stdout,
-        stderr=sys.stderr,
-    )
+    if settings.AUTHZ_ENGINE == "opa":
+        path_opa_executable = Path(__file__).parents[1] / "opa"
+        command = (
+            f"{path_opa_executable} run --server --log-level=debug"
+            " --v1-compatible"
+        )
+        env = None
+        opa_settings = cast(OPASettings, settings.AUTHZ_ENGINE_SETTINGS)
+        if opa_settings.UDS:
+            command += f" --addr=unix://{opa_settings.UDS}"
+        if opa_settings.DISTRIBUTION == "bundle":
+            config = bundle.opa_config(
+                opa_settings, opa_settings.BUNDLE_SERVICE_URL
+            )
+            with tempfile.NamedTemporaryFile(
+                "wb", suffix=".json", delete=False
+            ) as config_file:
+                config_file.write(orjson.dumps(config))
+            command += f" --config-file={config_file.name}"
+            env = os.environ | {bundle.TOKEN_ENV: settings.ROOT_API_KEY}
+            if opa_settings.BUNDLE_SIGNING_KEY:
+                env[bundle.SIGNING_KEY_ENV] = opa_settings.BUNDLE_SIGNING_KEY
+        subprocess.Popen(
+            command,
+            shell=True,
+            stdout=sys.stdout,
+            stderr=sys.stderr,
+            env=env,
+        )
 
     uvicorn.run(
         app="tauth.app:create_app",
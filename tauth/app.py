@@ -1,6 +1,7 @@
 from importlib.metadata import version
 
 from fastapi import APIRouter, FastAPI
+from fastapi.responses import PlainTextResponse
 
 from tauth import dependencies
 
@@ -16,6 +17,7 @@ from .resource_management.access.routes import router as resource_access_router
 from .resource_management.resources.routes import router as resources_router
 from .settings import Settings
 from .tauth_keys.routes import router as token_router
+from .utils import metrics
 
 
 def create_app() -> FastAPI:
@@ -31,6 +33,12 @@ def create_app() -> FastAPI:
     def _():
         return {"status": "ok"}
 
+    @app.get("/metrics", status_code=200, tags=["health 🩺"])
+    def _():
+        return PlainTextResponse(
+            metrics.render(), media_type="text/plain; version=0.0.4"
+        )
+
     dependencies.init_app(app, settings)
 
     router = APIRouter()
@@ -7,6 +7,7 @@ from http_error_schemas.schemas import RequestValidationError
 from loguru import logger
 
 from tauth.settings import Settings
+from tauth.utils import identity_map
 from tauth.utils.headers import auth_headers_injector
 
 from ..authn.melt_key import authentication as melt_key
@@ -25,6 +26,7 @@ def authn(ignore_paths: Iterable[str] = ("/", "/api", "/api/")):
         impersonate_entity_handle: str | None = None,
         impersonate_entity_owner: str | None = None,
     ) -> None:
+        identity_map.bind(request)
         req_path: str = request.scope["path"]
         if request.method == "GET" and req_path in ignore_paths:
             return
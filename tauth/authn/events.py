@@ -0,0 +1,149 @@
+"""
+Invalidation events for client-side caches (see `tauth.sdk.AuthCache`),
+served as Server-Sent Events by `GET /authn/events`.
+
+Events come from a MongoDB change stream on the collections decisions
+depend on, so they include changes made by any worker (or directly in the
+database):
+
+- `{"type": "key_revoked", "id": ...}`: a TAuth key was deleted.
+- `{"type": "access_changed"}`: keys, entities, roles or permissions
+  changed, so any cached decision may be stale.
+- `{"type": "reset"}`: events may have been missed (the subscriber fell
+  behind, or the change stream was interrupted), so everything cached
+  should be dropped.
+
+Change streams need a replica set; without them no events are sent and
+clients rely on their TTLs alone.
+"""
+
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from threading import Lock, Thread
+
+from loguru import logger
+from pymongo.errors import OperationFailure, PyMongoError
+
+from ..authz.permissions.models import PermissionDAO
+from ..authz.roles.models import RoleDAO
+from ..entities.models import EntityDAO
+from ..settings import Settings
+from ..utils import serialization
+from .tauth_keys.models import TauthTokenDAO
+
+MEDIA_TYPE = "text/event-stream"
+# Comments sent while idle, so that proxies keep the connection open and
+# disconnected subscribers are noticed
+HEARTBEAT_INTERVAL = 15
+RETRY_INTERVAL = 5
+QUEUE_SIZE = 1024
+# "$changeStream is only supported on replica sets"
+CHANGE_STREAMS_UNSUPPORTED = 40573
+
+Subscriber = tuple[asyncio.AbstractEventLoop, asyncio.Queue]
+
+
+def to_event(change: dict) -> dict | None:
+    collection = change.get("ns", {}).get("coll")
+    if collection == TauthTokenDAO.collection_name():
+        fields = change.get("updateDescription", {}).get("updatedFields", {})
+        if fields.get("deleted") is True:
+            return {
+                "type": "key_revoked",
+                "id": str(change["documentKey"]["_id"]),
+            }
+        if change["operationType"] == "insert":
+            # New keys invalidate nothing
+            return None
+    return {"type": "access_changed"}
+
+
+class EventStream:
+    def __init__(self):
+        self._subscribers: set[Subscriber] = set()
+        self._lock = Lock()
+        self._thread: Thread | None = None
+
+    def subscribe(self) -> Subscriber:
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(QUEUE_SIZE))
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if self._thread is None:
+                self._thread = Thread(
+                    target=self._run, name="tauth-events", daemon=True
+                )
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event: dict):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(_put, queue, event)
+
+    async def serve(self) -> AsyncIterator[bytes]:
+        subscriber = self.subscribe()
+        _, queue = subscriber
+        try:
+            yield b"retry: %d\n\n" % (RETRY_INTERVAL * 1000)
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), HEARTBEAT_INTERVAL
+                    )
+                except TimeoutError:
+                    yield b": heartbeat\n\n"
+                    continue
+                yield b"data: " + serialization.dumps(event) + b"\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    def _run(self):
+        collections = [
+            TauthTokenDAO.collection_name(),
+            EntityDAO.collection_name(),
+            RoleDAO.collection_name(),
+            PermissionDAO.collection_name(),
+        ]
+        pipeline = [{"$match": {"ns.coll": {"$in": collections}}}]
+        database = EntityDAO.collection(
+            alias=Settings.get().REDBABY_ALIAS
+        ).database
+        while True:
+            try:
+                with database.watch(pipeline) as stream:
+                    for change in stream:
+                        event = to_event(change)
+                        if event is not None:
+                            self.publish(event)
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAMS_UNSUPPORTED:
+                    logger.warning(
+                        "Change streams are not available, no invalidation "
+                        "events will be sent."
+                    )
+                    return
+                logger.error(f"Event stream failed: {e}")
+            except PyMongoError as e:
+                logger.error(f"Event stream failed: {e}")
+            # Changes made meanwhile are not known
+            self.publish({"type": "reset"})
+            time.sleep(RETRY_INTERVAL)
+
+
+def _put(queue: asyncio.Queue, event: dict):
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        # Too far behind: start over
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait({"type": "reset"})
+
+
+EVENTS = EventStream()
@@ -1,12 +1,11 @@
 from pymongo import IndexModel
-from redbaby.behaviors.hashids import HashIdMixin
 from redbaby.behaviors.reading import ReadingMixin
 from redbaby.document import Document
 
-from ...utils.teia_behaviors import Authoring
+from ...utils.teia_behaviors import Authoring, StoredHashIdMixin
 
 
-class TokenDAO(Document, Authoring, ReadingMixin, HashIdMixin):
+class TokenDAO(Document, Authoring, ReadingMixin, StoredHashIdMixin):
     client_name: str
     name: str
     value: str
@@ -62,7 +62,9 @@ def register_user(
             "handle": user_email,
             "owner_ref.handle": auth_provider_org_ref["handle"],
         }
-        reading.read_one_filters(infostar=infostar, model=EntityDAO, **filters)
+        reading.read_one_filters(
+            infostar=infostar, model=EntityDAO, fields=(), **filters
+        )
     except HTTPException as e:
         if e.status_code in (s.HTTP_404_NOT_FOUND, s.HTTP_409_CONFLICT):
             user_i = EntityIntermediate(
@@ -3,12 +3,19 @@ from typing import Annotated
 
 from fastapi import APIRouter, Depends
 from fastapi import status as s
+from fastapi.responses import StreamingResponse
 
 from ..dependencies.authentication import authenticate as authenticate_depends
 from ..schemas import Infostar
+from ..utils.serialization import JSONResponse
+from . import events
 
 service_name = Path(__file__).parent.name
-router = APIRouter(prefix=f"/{service_name}", tags=[service_name + " 🪪"])
+router = APIRouter(
+    prefix=f"/{service_name}",
+    tags=[service_name + " 🪪"],
+    default_response_class=JSONResponse,
+)
 
 
 @router.post("", status_code=s.HTTP_200_OK)
@@ -17,3 +24,18 @@ async def authenticate(
     infostar: Annotated[Infostar, Depends(authenticate_depends)]
 ) -> Infostar:
     return infostar
+
+
+@router.get("/events", status_code=s.HTTP_200_OK)
+async def stream_events(
+    infostar: Annotated[Infostar, Depends(authenticate_depends)]
+):
+    """
+    Server-Sent Events to invalidate client-side caches of identities and
+    decisions (see `tauth.authn.events`).
+    """
+    return StreamingResponse(
+        events.EVENTS.serve(),
+        media_type=events.MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache"},
+    )
@@ -5,7 +5,7 @@ from redbaby.pyobjectid import PyObjectId
 from tauth.authz.policies.schemas import AuthorizationDataIn
 
 from ...authz.controllers import authorize
-from ...authz.utils import get_permission_set_from_roles
+from ...authz.utils import get_token_permissions
 from ...entities.models import EntityDAO
 from ...schemas import Creator, Infostar
 from ..utils import SizedCache, get_request_ip
@@ -68,6 +68,8 @@ class RequestAuthenticator:
             )
             creator = Creator.from_infostar(infostar)
 
+            request.state.tauth_token = token_obj
+
         request.state.infostar = infostar
         request.state.creator = creator
 
@@ -75,7 +77,7 @@ class RequestAuthenticator:
     async def can_impersonate(
         cls, request: Request, entity: EntityDAO, token: TauthTokenDAO
     ):
-        token_permissions = get_permission_set_from_roles(token.roles)
+        token_permissions = get_token_permissions(token)
         res = await authorize(
             request,
             entity,
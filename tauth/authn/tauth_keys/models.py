@@ -11,6 +11,7 @@ from redbaby.pyobjectid import PyObjectId
 from tauth.settings import Settings
 
 from ...entities.schemas import EntityRef
+from ...utils import identity_map
 from ...utils.teia_behaviors import Authoring
 from .schemas import TauthTokenDTO
 
@@ -55,14 +56,19 @@ class TauthTokenDAO(
         )
 
     @classmethod
-    def find_one_token(cls, id: str):
-        collection = cls.collection(alias=Settings.get().REDBABY_ALIAS)
-        r = collection.find_one({"_id": PyObjectId(id), "deleted": False})
-        if not r:
+    def find_one_token(cls, id: str) -> "TauthTokenDAO":
+        def load() -> "TauthTokenDAO | None":
+            collection = cls.collection(alias=Settings.get().REDBABY_ALIAS)
+            r = collection.find_one({"_id": PyObjectId(id), "deleted": False})
+            if r:
+                return TauthTokenDAO(**r)
+
+        token = identity_map.get_or_load(cls.collection_name(), str(id), load)
+        if not token:
             logger.warning("API Key not found")
             raise HTTPException(
                 status_code=404,
                 detail="API Key not found",
             )
 
-        return TauthTokenDAO(**r)
+        return token
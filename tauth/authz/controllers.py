@@ -1,6 +1,10 @@
+from collections.abc import Set as AbstractSet
+from typing import NoReturn
+
 from fastapi import HTTPException, Request
 from fastapi import status as s
 from loguru import logger
+from pydantic import TypeAdapter
 
 from tauth.authz.engines.errors import PolicyNotFound, RuleNotFound
 from tauth.authz.engines.interface import AuthorizationResponse
@@ -9,29 +13,144 @@ from tauth.authz.permissions.schemas import PermissionContext
 from ..authz.engines.factory import AuthorizationEngine
 from ..entities.models import EntityDAO
 from ..utils.errors import EngineException
-from .policies.schemas import AuthorizationDataIn
+from .policies.projection import InputProjection, PolicyInputProjections
+from .policies.schemas import RESERVED_CONTEXT_KEYS, AuthorizationDataIn
 from .utils import (
+    DecisionMetrics,
     get_permissions_set,
     get_request_context,
     read_many_permissions,
 )
 
+PERMISSION_CONTEXTS = TypeAdapter(list[PermissionContext])
+
+
+# Input sections computed from the entity being authorized
+ENTITY_SECTIONS = ("entity", "permissions", "permission_index")
+
+
+def reads_entity(
+    projection: InputProjection, authz_data: AuthorizationDataIn
+) -> bool:
+    """Whether the policy input depends on the entity being authorized."""
+    if authz_data.resources:
+        return True
+    return any(projection.includes(section) for section in ENTITY_SECTIONS)
+
 
 async def authorize(
     request: Request,
     entity: EntityDAO,
     authz_data: AuthorizationDataIn,
-    allowed_permissions: set[PermissionContext] | None,
+    allowed_permissions: AbstractSet[PermissionContext] | None,
+    decision: DecisionMetrics | None = None,
 ) -> AuthorizationResponse:
     logger.debug(f"Running authorization for entity: {entity.handle}")
+    if decision is None:
+        decision = DecisionMetrics(authz_data.policy_name, authz_data.rule)
     logger.debug(f"Authorization data: {authz_data}")
+    context = await build_context(
+        request, entity, authz_data, allowed_permissions, decision
+    )
+    result = await evaluate(authz_data, context, decision)
+    decision.record(result, entity.handle)
+    logger.debug(f"Authorization result: {result}.")
+    return result
+
+
+async def build_context(
+    request: Request,
+    entity: EntityDAO | None,
+    authz_data: AuthorizationDataIn,
+    allowed_permissions: AbstractSet[PermissionContext] | None,
+    decision: DecisionMetrics,
+) -> dict:
+    """
+    Policy input for `authz_data`, restricted to what the policy reads.
+
+    `entity` may only be `None` if the policy does not read it (see
+    `reads_entity`).
+    """
+    logger.debug("Adding context.")
+    projection = PolicyInputProjections.get(authz_data.policy_name)
+    # Build a new context: `authz_data` may be shared between requests.
+    # Reserved keys are only ever set below, even if validation was skipped
+    # (e.g., `model_construct`, `model_copy`)
+    context = {
+        key: value
+        for key, value in authz_data.context.items()
+        if key not in RESERVED_CONTEXT_KEYS
+    }
+
+    if projection.includes("tauth_request"):
+        with decision.phase("context_build"):
+            tauth_request = await get_request_context(
+                request, projection.sections("tauth_request")
+            )
+            context["tauth_request"] = projection.prune(
+                "tauth_request", tauth_request
+            )
+
+    if not reads_entity(projection, authz_data):
+        logger.debug("Policy does not read the entity, skipping it.")
+        return context
+    assert entity is not None
+
+    if projection.includes("entity"):
+        with decision.phase("serialization"):
+            context["entity"] = entity.model_dump(
+                mode="json", include=projection.include("entity")
+            )
+
+    if projection.includes("permissions") or projection.includes(
+        "permission_index"
+    ):
+        with decision.phase("permission_resolution"):
+            permissions = get_entity_permissions(
+                entity, authz_data, allowed_permissions
+            )
+        with decision.phase("serialization"):
+            if projection.includes("permissions"):
+                # One call for the whole list is much cheaper than per-item
+                # dumps
+                context["permissions"] = PERMISSION_CONTEXTS.dump_python(
+                    list(permissions), mode="json"
+                )
+            if projection.includes("permission_index"):
+                # Constant-time lookups by name (see `tauth.utils`)
+                context["permission_index"] = {
+                    permission.name: True for permission in permissions
+                }
+    else:
+        logger.debug("Policy does not read permissions, skipping resolution.")
+    return context
+
 
-    logger.debug("Getting authorization engine and adding context.")
+async def evaluate(
+    authz_data: AuthorizationDataIn,
+    context: dict,
+    decision: DecisionMetrics,
+) -> AuthorizationResponse:
+    logger.debug("Executing authorization logic.")
     authz_engine = AuthorizationEngine.get()
+    # TODO: determine if we're gonna support arbitrary outputs here (e.g., filters)
+    try:
+        with decision.phase("engine_call"):
+            # Off the event loop: engines may block on I/O (e.g., OPA)
+            return await authz_engine.is_authorized_async(
+                policy_name=authz_data.policy_name,
+                rule=authz_data.rule,
+                context=context,
+            )
+    except EngineException as e:
+        handle_errors(e)
 
-    authz_data.context["tauth_request"] = await get_request_context(request)
 
-    authz_data.context["entity"] = entity.model_dump(mode="json")
+def get_entity_permissions(
+    entity: EntityDAO,
+    authz_data: AuthorizationDataIn,
+    allowed_permissions: AbstractSet[PermissionContext] | None,
+) -> set[PermissionContext]:
     role_ids = map(lambda x: x.id, entity.roles)
     permissions = get_permissions_set(role_ids, entity.permissions)
 
@@ -74,26 +193,10 @@ async def authorize(
             entity_permissions, "resource", entity_ref=service.to_ref()
         )
         permissions = permissions.union(resource_permissions)
-
-    authz_data.context["permissions"] = [
-        permission.model_dump(mode="json") for permission in permissions
-    ]
-    logger.debug("Executing authorization logic.")
-    # TODO: determine if we're gonna support arbitrary outputs here (e.g., filters)
-    try:
-        result = authz_engine.is_authorized(
-            policy_name=authz_data.policy_name,
-            rule=authz_data.rule,
-            context=authz_data.context,
-        )
-    except EngineException as e:
-        handle_errors(e)
-
-    logger.debug(f"Authorization result: {result}.")
-    return result
+    return permissions
 
 
-def handle_errors(e: EngineException):
+def handle_errors(e: EngineException) -> NoReturn:
     if isinstance(e, (PolicyNotFound | RuleNotFound)):
         raise HTTPException(
             status_code=s.HTTP_404_NOT_FOUND,
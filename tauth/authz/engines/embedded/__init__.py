@@ -0,0 +1,3 @@
+from .settings import EmbeddedSettings
+
+__all__ = ["EmbeddedSettings"]
@@ -0,0 +1,561 @@
+"""
+Built-in functions available to embedded policies.
+
+Builtins receive and return Rego values (see `values`). Invalid arguments
+raise `BuiltinError`, which makes the calling expression undefined, like
+OPA does by default.
+"""
+
+import base64
+import json
+import math
+import re
+import time
+from collections.abc import Callable
+from functools import lru_cache
+from typing import Any
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from loguru import logger
+from redbaby.database import DB
+
+from ....settings import Settings
+from ....utils import serialization
+from .errors import BuiltinError
+from .values import RegoSet, compare, equal, sorted_values, to_json, type_name
+
+Builtin = Callable[..., Any]
+
+BUILTINS: dict[str, Builtin] = {}
+
+
+def builtin(name: str) -> Callable[[Builtin], Builtin]:
+    def register(fn: Builtin) -> Builtin:
+        BUILTINS[name] = fn
+        return fn
+
+    return register
+
+
+def check(value: Any, *types: str) -> Any:
+    if type_name(value) not in types:
+        expected = " or ".join(types)
+        raise BuiltinError(f"Expected {expected}, got {type_name(value)}")
+    return value
+
+
+def number(value: float) -> int | float:
+    """Keeps integral results as integers, like OPA's JSON output."""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+# Operators
+
+
+@builtin("plus")
+def plus(a: Any, b: Any) -> Any:
+    return number(check(a, "number") + check(b, "number"))
+
+
+@builtin("minus")
+def minus(a: Any, b: Any) -> Any:
+    if type_name(a) == "set":
+        return a.difference(check(b, "set"))
+    return number(check(a, "number") - check(b, "number"))
+
+
+@builtin("mul")
+def mul(a: Any, b: Any) -> Any:
+    return number(check(a, "number") * check(b, "number"))
+
+
+@builtin("div")
+def div(a: Any, b: Any) -> Any:
+    if check(b, "number") == 0:
+        raise BuiltinError("Divide by zero")
+    return number(check(a, "number") / b)
+
+
+@builtin("rem")
+def rem(a: Any, b: Any) -> Any:
+    if not isinstance(check(a, "number"), int) or not isinstance(
+        check(b, "number"), int
+    ):
+        raise BuiltinError("Modulo on non-integer numbers")
+    if b == 0:
+        raise BuiltinError("Modulo by zero")
+    return int(math.fmod(a, b))
+
+
+@builtin("and")
+def intersection_operator(a: Any, b: Any) -> Any:
+    return check(a, "set").intersection(check(b, "set"))
+
+
+@builtin("or")
+def union_operator(a: Any, b: Any) -> Any:
+    return check(a, "set").union(check(b, "set"))
+
+
+OPERATORS = {
+    "+": plus,
+    "-": minus,
+    "*": mul,
+    "/": div,
+    "%": rem,
+    "&": intersection_operator,
+    "|": union_operator,
+    "==": equal,
+    "!=": lambda a, b: not equal(a, b),
+    "<": lambda a, b: compare(a, b) < 0,
+    "<=": lambda a, b: compare(a, b) <= 0,
+    ">": lambda a, b: compare(a, b) > 0,
+    ">=": lambda a, b: compare(a, b) >= 0,
+}
+
+
+# Aggregates
+
+
+@builtin("count")
+def count(collection: Any) -> int:
+    return len(check(collection, "string", "array", "object", "set"))
+
+
+@builtin("sum")
+def sum_(collection: Any) -> Any:
+    items = check(collection, "array", "set")
+    return number(sum(check(item, "number") for item in items))
+
+
+@builtin("product")
+def product(collection: Any) -> Any:
+    items = check(collection, "array", "set")
+    return number(math.prod(check(item, "number") for item in items))
+
+
+@builtin("max")
+def max_(collection: Any) -> Any:
+    items = sorted_values(check(collection, "array", "set"))
+    if not items:
+        raise BuiltinError("max of empty collection")
+    return items[-1]
+
+
+@builtin("min")
+def min_(collection: Any) -> Any:
+    items = sorted_values(check(collection, "array", "set"))
+    if not items:
+        raise BuiltinError("min of empty collection")
+    return items[0]
+
+
+@builtin("sort")
+def sort(collection: Any) -> list:
+    return sorted_values(check(collection, "array", "set"))
+
+
+# Strings
+
+
+@builtin("concat")
+def concat(delimiter: Any, collection: Any) -> str:
+    items = check(collection, "array", "set")
+    if type_name(items) == "set":
+        items = sorted_values(items)
+    return check(delimiter, "string").join(
+        check(item, "string") for item in items
+    )
+
+
+@builtin("contains")
+def contains(haystack: Any, needle: Any) -> bool:
+    return check(needle, "string") in check(haystack, "string")
+
+
+@builtin("startswith")
+def startswith(value: Any, prefix: Any) -> bool:
+    return check(value, "string").startswith(check(prefix, "string"))
+
+
+@builtin("endswith")
+def endswith(value: Any, suffix: Any) -> bool:
+    return check(value, "string").endswith(check(suffix, "string"))
+
+
+@builtin("indexof")
+def indexof(value: Any, search: Any) -> int:
+    return check(value, "string").find(check(search, "string"))
+
+
+@builtin("lower")
+def lower(value: Any) -> str:
+    return check(value, "string").lower()
+
+
+@builtin("upper")
+def upper(value: Any) -> str:
+    return check(value, "string").upper()
+
+
+@builtin("replace")
+def replace(value: Any, old: Any, new: Any) -> str:
+    return check(value, "string").replace(
+        check(old, "string"), check(new, "string")
+    )
+
+
+@builtin("split")
+def split(value: Any, delimiter: Any) -> list[str]:
+    return check(value, "string").split(check(delimiter, "string"))
+
+
+@builtin("substring")
+def substring(value: Any, offset: Any, length: Any) -> str:
+    value, offset = check(value, "string"), check(offset, "number")
+    if offset < 0:
+        raise BuiltinError("Negative offset")
+    if check(length, "number") < 0:
+        return value[offset:]
+    return value[offset : offset + length]
+
+
+@builtin("trim")
+def trim(value: Any, cutset: Any) -> str:
+    return check(value, "string").strip(check(cutset, "string"))
+
+
+@builtin("trim_left")
+def trim_left(value: Any, cutset: Any) -> str:
+    return check(value, "string").lstrip(check(cutset, "string"))
+
+
+@builtin("trim_right")
+def trim_right(value: Any, cutset: Any) -> str:
+    return check(value, "string").rstrip(check(cutset, "string"))
+
+
+@builtin("trim_prefix")
+def trim_prefix(value: Any, prefix: Any) -> str:
+    return check(value, "string").removeprefix(check(prefix, "string"))
+
+
+@builtin("trim_suffix")
+def trim_suffix(value: Any, suffix: Any) -> str:
+    return check(value, "string").removesuffix(check(suffix, "string"))
+
+
+@builtin("trim_space")
+def trim_space(value: Any) -> str:
+    return check(value, "string").strip()
+
+
+@builtin("sprintf")
+def sprintf(fmt: Any, args: Any) -> str:
+    def format_arg(match: re.Match) -> str:
+        verb = match.group(1)
+        if verb == "%":
+            return "%"
+        if not values:
+            raise BuiltinError("Not enough arguments for sprintf")
+        value = values.pop(0)
+        if verb in ("s", "v") and isinstance(value, str):
+            return value
+        if verb == "d":
+            return str(int(check(value, "number")))
+        if verb == "f":
+            return f"{check(value, 'number'):f}"
+        return json.dumps(to_json(value), separators=(",", ":"))
+
+    values = list(check(args, "array"))
+    return re.sub(r"%([%svdf])", format_arg, check(fmt, "string"))
+
+
+@builtin("format_int")
+def format_int(value: Any, base: Any) -> str:
+    value = int(math.floor(check(value, "number")))
+    formats = {2: "b", 8: "o", 10: "d", 16: "x"}
+    if base not in formats:
+        raise BuiltinError("Base must be one of 2, 8, 10, 16")
+    return format(value, formats[base])
+
+
+# Regular expressions (Python's dialect, close to RE2 for common patterns)
+
+
+@lru_cache(maxsize=256)
+def compile_pattern(pattern: str) -> re.Pattern:
+    try:
+        return re.compile(pattern)
+    except re.error as e:
+        raise BuiltinError(f"Invalid pattern: {e}")
+
+
+@builtin("regex.match")
+def regex_match(pattern: Any, value: Any) -> bool:
+    compiled = compile_pattern(check(pattern, "string"))
+    return compiled.search(check(value, "string")) is not None
+
+
+@builtin("regex.is_valid")
+def regex_is_valid(pattern: Any) -> bool:
+    try:
+        compile_pattern(check(pattern, "string"))
+    except BuiltinError:
+        return False
+    return True
+
+
+# Types
+
+
+@builtin("type_name")
+def type_name_(value: Any) -> str:
+    return type_name(value)
+
+
+for _name in ("string", "number", "boolean", "array", "set", "object", "null"):
+    BUILTINS[f"is_{_name}"] = lambda value, _name=_name: (
+        type_name(value) == _name
+    )
+
+
+@builtin("to_number")
+def to_number(value: Any) -> Any:
+    match type_name(value):
+        case "number":
+            return value
+        case "boolean":
+            return int(value)
+        case "null":
+            return 0
+        case "string":
+            try:
+                return number(float(value))
+            except ValueError:
+                raise BuiltinError(f"Invalid number: {value!r}")
+    raise BuiltinError(f"Cannot convert {type_name(value)} to number")
+
+
+# Numbers
+
+
+@builtin("abs")
+def abs_(value: Any) -> Any:
+    return abs(check(value, "number"))
+
+
+@builtin("round")
+def round_(value: Any) -> int:
+    return int(math.floor(check(value, "number") + 0.5))
+
+
+@builtin("ceil")
+def ceil(value: Any) -> int:
+    return math.ceil(check(value, "number"))
+
+
+@builtin("floor")
+def floor(value: Any) -> int:
+    return math.floor(check(value, "number"))
+
+
+@builtin("numbers.range")
+def numbers_range(start: Any, stop: Any) -> list[int]:
+    start, stop = int(check(start, "number")), int(check(stop, "number"))
+    step = 1 if stop >= start else -1
+    return list(range(start, stop + step, step))
+
+
+# Arrays
+
+
+@builtin("array.concat")
+def array_concat(a: Any, b: Any) -> list:
+    return check(a, "array") + check(b, "array")
+
+
+@builtin("array.slice")
+def array_slice(array: Any, start: Any, stop: Any) -> list:
+    array = check(array, "array")
+    start = max(int(check(start, "number")), 0)
+    stop = min(int(check(stop, "number")), len(array))
+    return array[start:stop] if start < stop else []
+
+
+@builtin("array.reverse")
+def array_reverse(array: Any) -> list:
+    return check(array, "array")[::-1]
+
+
+# Objects
+
+
+@builtin("object.get")
+def object_get(obj: Any, path: Any, default: Any) -> Any:
+    value = check(obj, "object")
+    keys = path if type_name(path) == "array" else [path]
+    for k in keys:
+        in_object = (
+            isinstance(value, dict)
+            and not isinstance(k, list | dict | RegoSet)
+            and k in value
+        )
+        in_array = (
+            isinstance(value, list) and type(k) is int and 0 <= k < len(value)
+        )
+        if not (in_object or in_array):
+            return default
+        value = value[k]
+    return value
+
+
+@builtin("object.keys")
+def object_keys(obj: Any) -> RegoSet:
+    return RegoSet(check(obj, "object"))
+
+
+@builtin("object.remove")
+def object_remove(obj: Any, keys: Any) -> dict:
+    keys = check(keys, "array", "set", "object")
+    if isinstance(keys, dict):
+        keys = list(keys)
+    return {k: v for k, v in check(obj, "object").items() if k not in keys}
+
+
+@builtin("object.filter")
+def object_filter(obj: Any, keys: Any) -> dict:
+    keys = check(keys, "array", "set", "object")
+    if isinstance(keys, dict):
+        keys = list(keys)
+    return {k: v for k, v in check(obj, "object").items() if k in keys}
+
+
+@builtin("object.union")
+def object_union(a: Any, b: Any) -> dict:
+    a, b = check(a, "object"), check(b, "object")
+    result = dict(a)
+    for k, v in b.items():
+        if isinstance(result.get(k), dict) and isinstance(v, dict):
+            result[k] = object_union(result[k], v)
+        else:
+            result[k] = v
+    return result
+
+
+# Sets
+
+
+@builtin("intersection")
+def intersection(sets: Any) -> RegoSet:
+    items = list(check(sets, "set"))
+    if not items:
+        return RegoSet()
+    result = check(items[0], "set")
+    for item in items[1:]:
+        result = result.intersection(check(item, "set"))
+    return result
+
+
+@builtin("union")
+def union(sets: Any) -> RegoSet:
+    result = RegoSet()
+    for item in check(sets, "set"):
+        result = result.union(check(item, "set"))
+    return result
+
+
+# Encoding
+
+
+@builtin("json.marshal")
+def json_marshal(value: Any) -> str:
+    return json.dumps(to_json(value), separators=(",", ":"))
+
+
+@builtin("json.unmarshal")
+def json_unmarshal(value: Any) -> Any:
+    try:
+        return json.loads(check(value, "string"))
+    except json.JSONDecodeError as e:
+        raise BuiltinError(f"Invalid JSON: {e}")
+
+
+@builtin("base64.encode")
+def base64_encode(value: Any) -> str:
+    return base64.b64encode(check(value, "string").encode()).decode()
+
+
+@builtin("base64.decode")
+def base64_decode(value: Any) -> str:
+    try:
+        return base64.b64decode(check(value, "string")).decode()
+    except ValueError as e:
+        raise BuiltinError(f"Invalid base64: {e}")
+
+
+@builtin("base64url.encode")
+def base64url_encode(value: Any) -> str:
+    return base64.urlsafe_b64encode(check(value, "string").encode()).decode()
+
+
+@builtin("base64url.decode")
+def base64url_decode(value: Any) -> str:
+    value = check(value, "string")
+    try:
+        padded = value + "=" * (-len(value) % 4)
+        return base64.urlsafe_b64decode(padded).decode()
+    except ValueError as e:
+        raise BuiltinError(f"Invalid base64url: {e}")
+
+
+# Database access, mirroring the `mongodb.*` builtins of tauth's OPA build
+
+MONGODB_COLLECTIONS = ("resources",)
+
+
+@builtin("mongodb.query")
+def mongodb_query(collection: Any, query: Any) -> list:
+    return find(collection, query)
+
+
+@builtin("mongodb.query_fields")
+def mongodb_query_fields(collection: Any, query: Any, fields: Any) -> list:
+    projection = {
+        check(field, "string"): 1 for field in check(fields, "array")
+    }
+    return find(collection, query, projection)
+
+
+def find(
+    collection: Any, query: Any, projection: dict | None = None
+) -> list:
+    if check(collection, "string") not in MONGODB_COLLECTIONS:
+        raise BuiltinError(f"Collection not allowed: {collection}")
+    query = dict(check(query, "object"))
+    ids = query.get("_id")
+    if isinstance(ids, dict) and isinstance(ids.get("$in"), list):
+        try:
+            query["_id"] = ids | {"$in": [ObjectId(i) for i in ids["$in"]]}
+        except (InvalidId, TypeError) as e:
+            raise BuiltinError(f"Invalid ObjectId: {e}")
+    db = DB.get(alias=Settings.get().REDBABY_ALIAS)
+    documents = list(db[collection].find(query, projection=projection))
+    return serialization.loads(serialization.dumps(documents))
+
+
+# Misc
+
+
+@builtin("time.now_ns")
+def time_now_ns() -> int:
+    return time.time_ns()
+
+
+@builtin("print")
+def print_(*args: Any) -> bool:
+    logger.debug(" ".join(json_marshal(arg) for arg in args))
+    return True
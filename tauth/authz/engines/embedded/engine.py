@@ -0,0 +1,151 @@
+import time
+from threading import Lock, Thread
+
+from loguru import logger
+from pymongo.errors import PyMongoError
+
+from tauth.authz.policies.models import AuthorizationPolicyDAO
+from tauth.settings import Settings
+
+from ....utils import serialization
+from ..errors import EngineException, PolicyNotFound, RuleNotFound
+from ..interface import AuthorizationInterface, AuthorizationResponse
+from .errors import RegoError
+from .evaluator import (
+    UNDEFINED,
+    Evaluation,
+    Package,
+    build_packages,
+    compile_module,
+)
+from .nodes import Module
+from .settings import EmbeddedSettings
+from .values import to_json
+
+
+class EmbeddedEngine(AuthorizationInterface):
+    """
+    Evaluates policies inside the API process, without an OPA sidecar.
+
+    Only a subset of Rego is supported (see `parser`); policies using
+    anything else are rejected on upsert. Policies are read from the
+    database on startup and re-synced by a background thread, so that
+    changes made through other workers are picked up without decisions
+    ever waiting on the database.
+    """
+
+    def __init__(self, settings: EmbeddedSettings):
+        self.settings = settings
+        self._sources: dict[str, str] = {}
+        # Replaced as a whole so that readers never see a partial update
+        self._state: tuple[
+            dict[str, Module], dict[tuple[str, ...], Package]
+        ] = ({}, {})
+        self._lock = Lock()
+        logger.debug("Embedded AuthZ engine is ready.")
+
+    def _initialize_db_policies(self):
+        self._sync_policies()
+        logger.info(
+            "Loaded DB policies into the embedded engine. "
+            f"Policies loaded: {len(self._state[0])}"
+        )
+        Thread(
+            target=self._run, name="embedded-policy-sync", daemon=True
+        ).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.settings.POLICY_REFRESH)
+            try:
+                self._sync_policies()
+            except PyMongoError as e:
+                logger.error(f"Failed to sync policies: {e}")
+            except Exception:
+                logger.exception("Failed to sync policies.")
+
+    def _sync_policies(self):
+        policies = AuthorizationPolicyDAO.collection(
+            alias=Settings.get().REDBABY_ALIAS
+        ).find({}, projection={"name": 1, "policy": 1})
+        sources = {p["name"]: p["policy"] for p in policies}
+        with self._lock:
+            current, modules = self._state[0], {}
+            for name, source in sources.items():
+                if self._sources.get(name) == source:
+                    if name in current:
+                        modules[name] = current[name]
+                    continue
+                try:
+                    modules[name] = compile_module(source)
+                except RegoError as e:
+                    logger.error(f"Failed to load policy {name!r}: {e}")
+            try:
+                packages = build_packages(list(modules.values()))
+            except RegoError as e:
+                logger.error(f"Failed to sync policies: {e}")
+                return
+            self._sources = sources
+            self._state = (modules, packages)
+
+    def is_authorized(
+        self,
+        policy_name: str,
+        rule: str,
+        context: dict | None = None,
+        **kwargs,
+    ) -> AuthorizationResponse:
+        modules, packages = self._state
+        module = modules.get(policy_name)
+        if module is None:
+            raise PolicyNotFound(f"Policy {policy_name} not found")
+        package = packages[module.package]
+        if not package.has_rule(rule) or package.is_function(rule):
+            raise RuleNotFound(f"Rule {rule} not found in {policy_name}")
+
+        input_data = dict(input={})
+        if context:
+            input_data |= context
+        # Same JSON values OPA would see (e.g., ObjectIds as strings)
+        input_data = serialization.loads(serialization.dumps(input_data))
+        try:
+            value = Evaluation(packages, input_data).query(
+                module.package, rule
+            )
+        except RegoError as e:
+            logger.error(f"Error in embedded engine: {e}")
+            raise EngineException(f"Error during authorization check {e}")
+
+        if value is UNDEFINED:
+            logger.debug(f"Rule {rule} is undefined in {policy_name}.")
+            return AuthorizationResponse(authorized=False, details={})
+        result = to_json(value)
+        # Same semantics as the OPA engine: non-boolean results authorize
+        authorized = result if isinstance(result, bool) else True
+        return AuthorizationResponse(
+            authorized=authorized,
+            details=dict(result=result),
+        )
+
+    def upsert_policy(
+        self, policy_name: str, policy_content: str, **_
+    ) -> bool:
+        logger.debug(f"Upserting policy {policy_name!r} in embedded engine.")
+        module = compile_module(policy_content)
+        with self._lock:
+            modules = self._state[0] | {policy_name: module}
+            self._state = (modules, build_packages(list(modules.values())))
+            self._sources = self._sources | {policy_name: policy_content}
+        return True
+
+    def delete_policy(self, policy_name: str) -> bool:
+        logger.debug(f"Deleting policy: {policy_name}.")
+        with self._lock:
+            modules = {
+                k: v for k, v in self._state[0].items() if k != policy_name
+            }
+            self._state = (modules, build_packages(list(modules.values())))
+            self._sources = {
+                k: v for k, v in self._sources.items() if k != policy_name
+            }
+        return True
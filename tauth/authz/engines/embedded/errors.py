@@ -0,0 +1,21 @@
+from ....utils.errors import EngineException
+
+
+class RegoError(EngineException):
+    pass
+
+
+class RegoParseError(RegoError):
+    def __init__(self, message: str, line: int | None = None):
+        if line is not None:
+            message = f"{message} (line {line})"
+        super().__init__(message)
+        self.line = line
+
+
+class RegoEvalError(RegoError):
+    pass
+
+
+class BuiltinError(RegoError):
+    """Raised by builtins; the calling expression becomes undefined."""
@@ -0,0 +1,688 @@
+"""
+Top-down evaluation of parsed Rego modules.
+
+Bodies are evaluated left to right with backtracking: every statement maps
+an environment (variable bindings) to zero or more extended environments.
+Rule values and function results are memoized for a single evaluation.
+"""
+
+import dataclasses
+from collections.abc import Iterator
+from typing import Any
+
+from .builtins import BUILTINS, OPERATORS
+from .errors import BuiltinError, RegoEvalError, RegoParseError
+from .nodes import (
+    ArrayComprehension,
+    ArrayTerm,
+    Assign,
+    BinaryOp,
+    Call,
+    Every,
+    Expr,
+    Membership,
+    Module,
+    Not,
+    ObjectComprehension,
+    ObjectTerm,
+    Ref,
+    Rule,
+    Scalar,
+    SetComprehension,
+    SetTerm,
+    SomeDecl,
+    SomeIn,
+    Statement,
+    Term,
+    Unify,
+    Var,
+)
+from .parser import parse_module
+from .values import RegoSet, equal, key
+
+Env = dict[str, Any]
+
+
+class _Marker:
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+UNDEFINED = _Marker("UNDEFINED")
+# Variables declared with `some x` (without `in`) until they are bound
+UNBOUND = _Marker("UNBOUND")
+
+MEMOIZED_BUILTINS = {"mongodb.query", "mongodb.query_fields"}
+
+
+class Package:
+    """Rules of every module that shares a package path."""
+
+    def __init__(self, path: tuple[str, ...], modules: list[Module]):
+        self.path = path
+        self.rules: dict[str, list[tuple[Rule, Module]]] = {}
+        self.defaults: dict[str, Any] = {}
+        for module in modules:
+            for name, rules in module.rules.items():
+                entries = self.rules.setdefault(name, [])
+                if entries and entries[0][0].kind != rules[0].kind:
+                    raise RegoParseError(
+                        f"Conflicting definitions of rule {name!r} in "
+                        f"package {'.'.join(path)}",
+                        rules[0].line,
+                    )
+                entries.extend((rule, module) for rule in rules)
+            for name, value in module.defaults.items():
+                if name in self.defaults:
+                    raise RegoParseError(
+                        f"Multiple defaults for {name!r} in package "
+                        f"{'.'.join(path)}"
+                    )
+                self.defaults[name] = value
+
+    def has_rule(self, name: str) -> bool:
+        return name in self.rules or name in self.defaults
+
+    def is_function(self, name: str) -> bool:
+        rules = self.rules.get(name)
+        return bool(rules) and rules[0][0].kind == "function"
+
+
+def build_packages(modules: list[Module]) -> dict[tuple[str, ...], Package]:
+    by_path: dict[tuple[str, ...], list[Module]] = {}
+    for module in modules:
+        by_path.setdefault(module.package, []).append(module)
+    return {path: Package(path, mods) for path, mods in by_path.items()}
+
+
+def validate(module: Module) -> None:
+    """Rejects calls to functions that are neither builtins nor rules."""
+
+    def visit(node: Any, line: int) -> None:
+        if isinstance(node, Call):
+            name = node.name
+            is_rule_call = (
+                name[0] == "data"
+                or name[0] in module.imports
+                or (len(name) == 1 and name[0] in module.rules)
+            )
+            if not is_rule_call and ".".join(name) not in BUILTINS:
+                raise RegoParseError(
+                    f"Function {'.'.join(name)!r} is not supported by the "
+                    "embedded engine",
+                    line,
+                )
+        if isinstance(node, list | tuple):
+            for item in node:
+                visit(item, line)
+        elif dataclasses.is_dataclass(node):
+            for field in dataclasses.fields(node):
+                visit(getattr(node, field.name), line)
+
+    for rules in module.rules.values():
+        for rule in rules:
+            visit(rule, rule.line)
+
+
+class Evaluation:
+    def __init__(
+        self, packages: dict[tuple[str, ...], Package], input: Any
+    ):
+        self.packages = packages
+        self.input = input
+        self._rules: dict[tuple, Any] = {}
+        self._calls: dict[tuple, Any] = {}
+        self._builtins: dict[tuple, Any] = {}
+        self._active: set[tuple] = set()
+
+    # Entry point
+
+    def query(self, package: tuple[str, ...], name: str) -> Any:
+        """Returns the value of a rule, or `UNDEFINED`."""
+        return self.rule_value(self.packages[package], name)
+
+    # Rules and functions
+
+    def rule_value(self, package: Package, name: str) -> Any:
+        cache_key = (package.path, name)
+        if cache_key in self._rules:
+            return self._rules[cache_key]
+        if cache_key in self._active:
+            raise RegoEvalError(f"Recursion in rule {name!r}")
+        self._active.add(cache_key)
+        try:
+            value = self._evaluate_rule(package, name)
+        finally:
+            self._active.discard(cache_key)
+        self._rules[cache_key] = value
+        return value
+
+    def _evaluate_rule(self, package: Package, name: str) -> Any:
+        rules = package.rules.get(name, [])
+        kind = rules[0][0].kind if rules else "complete"
+        if kind == "function":
+            raise RegoEvalError(f"Function {name!r} referenced without args")
+
+        if kind == "set":
+            result = RegoSet()
+            for rule, module in rules:
+                for env in self.eval_body(rule.body, {}, module):
+                    for value, _ in self.eval_term(rule.key, env, module):
+                        result.add(value)
+            return result
+
+        if kind == "object":
+            obj: dict = {}
+            for rule, module in rules:
+                for env in self.eval_body(rule.body, {}, module):
+                    for k, key_env in self.eval_term(rule.key, env, module):
+                        for v, _ in self.eval_term(
+                            rule.value, key_env, module
+                        ):
+                            if k in obj and not equal(obj[k], v):
+                                raise RegoEvalError(
+                                    f"Conflicting values for key {k!r} in "
+                                    f"rule {name!r}"
+                                )
+                            obj[k] = v
+            return obj
+
+        values: list = []
+        for rule, module in rules:
+            for value in self.eval_chain(rule, {}, module):
+                if not any(equal(value, v) for v in values):
+                    values.append(value)
+        if len(values) > 1:
+            raise RegoEvalError(
+                f"Complete rule {name!r} produced multiple outputs"
+            )
+        if values:
+            return values[0]
+        return package.defaults.get(name, UNDEFINED)
+
+    def eval_chain(self, rule: Rule, env: Env, module: Module) -> list:
+        """Values of the first rule in an `else` chain whose body holds."""
+        current: Rule | None = rule
+        while current is not None:
+            values: list = []
+            for body_env in self.eval_body(current.body, env, module):
+                for value, _ in self.eval_term(current.value, body_env, module):
+                    if not any(equal(value, v) for v in values):
+                        values.append(value)
+            if values:
+                return values
+            current = current.orelse
+        return []
+
+    def call_function(
+        self, package: Package, name: str, args: list[Any]
+    ) -> Any:
+        cache_key = (package.path, name, key(args))
+        if cache_key in self._calls:
+            return self._calls[cache_key]
+        values: list = []
+        for rule, module in package.rules[name]:
+            if len(rule.args) != len(args):
+                raise RegoEvalError(
+                    f"Function {name!r} called with {len(args)} arguments"
+                )
+            # Parameters are local even if they shadow a rule name
+            for env in self.unify_all(rule.args, args, {}, module, True):
+                for value in self.eval_chain(rule, env, module):
+                    if not any(equal(value, v) for v in values):
+                        values.append(value)
+        if len(values) > 1:
+            raise RegoEvalError(
+                f"Function {name!r} produced multiple outputs for the same "
+                "inputs"
+            )
+        result = values[0] if values else UNDEFINED
+        self._calls[cache_key] = result
+        return result
+
+    def call_builtin(self, name: str, args: list[Any]) -> Any:
+        fn = BUILTINS.get(name)
+        if fn is None:
+            raise RegoEvalError(f"Unknown function {name!r}")
+        memoize = name in MEMOIZED_BUILTINS
+        if memoize:
+            cache_key = (name, key(args))
+            if cache_key in self._builtins:
+                return self._builtins[cache_key]
+        try:
+            result = fn(*args)
+        except BuiltinError:
+            result = UNDEFINED
+        except TypeError as e:
+            raise RegoEvalError(f"Invalid call to {name!r}: {e}")
+        if memoize:
+            self._builtins[cache_key] = result
+        return result
+
+    # Variables
+
+    def package_of(self, module: Module) -> Package:
+        return self.packages[module.package]
+
+    def is_bound(self, name: str, env: Env, module: Module) -> bool:
+        if name in env:
+            return env[name] is not UNBOUND
+        return (
+            name in ("input", "data")
+            or name in module.imports
+            or self.package_of(module).has_rule(name)
+        )
+
+    def contains_output(self, term: Term, env: Env, module: Module) -> bool:
+        match term:
+            case Var(name=name):
+                return name == "_" or not self.is_bound(name, env, module)
+            case ArrayTerm(items=items):
+                return any(
+                    self.contains_output(item, env, module) for item in items
+                )
+            case ObjectTerm(items=items):
+                return any(
+                    self.contains_output(value, env, module)
+                    for _, value in items
+                )
+        return False
+
+    # Bodies
+
+    def eval_body(
+        self, body: list[Statement], env: Env, module: Module, index: int = 0
+    ) -> Iterator[Env]:
+        if index == len(body):
+            yield env
+            return
+        for next_env in self.eval_statement(body[index], env, module):
+            yield from self.eval_body(body, next_env, module, index + 1)
+
+    def eval_statement(
+        self, statement: Statement, env: Env, module: Module
+    ) -> Iterator[Env]:
+        match statement:
+            case Expr(term=term):
+                for value, next_env in self.eval_term(term, env, module):
+                    if value is not False:
+                        yield next_env
+            case Not(statement=negated):
+                for _ in self.eval_statement(negated, env, module):
+                    return
+                yield env
+            case Assign(target=target, value=value):
+                for v, next_env in self.eval_term(value, env, module):
+                    yield from self.unify(target, v, next_env, module, True)
+            case Unify(left=left, right=right):
+                if self.contains_output(left, env, module):
+                    for v, next_env in self.eval_term(right, env, module):
+                        yield from self.unify(left, v, next_env, module)
+                elif self.contains_output(right, env, module):
+                    for v, next_env in self.eval_term(left, env, module):
+                        yield from self.unify(right, v, next_env, module)
+                else:
+                    for a, env_a in self.eval_term(left, env, module):
+                        for b, env_b in self.eval_term(right, env_a, module):
+                            if equal(a, b):
+                                yield env_b
+            case SomeDecl(names=names):
+                yield env | dict.fromkeys(names, UNBOUND)
+            case SomeIn():
+                yield from self.eval_some_in(statement, env, module)
+            case Every():
+                if self.eval_every(statement, env, module):
+                    yield env
+            case _:
+                raise RegoEvalError(f"Unsupported statement: {statement}")
+
+    def eval_some_in(
+        self, statement: SomeIn, env: Env, module: Module
+    ) -> Iterator[Env]:
+        for collection, outer_env in self.eval_term(
+            statement.collection, env, module
+        ):
+            for k, v in items(collection):
+                envs = self.unify(statement.value, v, outer_env, module, True)
+                if statement.key is None:
+                    yield from envs
+                    continue
+                for value_env in envs:
+                    yield from self.unify(
+                        statement.key, k, value_env, module, True
+                    )
+
+    def eval_every(self, statement: Every, env: Env, module: Module) -> bool:
+        for collection, outer_env in self.eval_term(
+            statement.collection, env, module
+        ):
+            for k, v in items(collection):
+                bound = self.unify(statement.value, v, outer_env, module, True)
+                if statement.key is not None:
+                    bound = (
+                        key_env
+                        for value_env in bound
+                        for key_env in self.unify(
+                            statement.key, k, value_env, module, True
+                        )
+                    )
+                if not any(
+                    True
+                    for item_env in bound
+                    for _ in self.eval_body(statement.body, item_env, module)
+                ):
+                    return False
+            return True
+        return False
+
+    def unify(
+        self,
+        pattern: Term,
+        value: Any,
+        env: Env,
+        module: Module,
+        declare: bool = False,
+    ) -> Iterator[Env]:
+        match pattern:
+            case Var(name="_"):
+                yield env
+                return
+            case Var(name=name) if declare or not self.is_bound(
+                name, env, module
+            ):
+                yield env | {name: value}
+                return
+            case ArrayTerm(items=patterns) if self.contains_output(
+                pattern, env, module
+            ) or declare:
+                if isinstance(value, list) and len(value) == len(patterns):
+                    yield from self.unify_all(
+                        patterns, value, env, module, declare
+                    )
+                return
+            case ObjectTerm(items=pairs) if self.contains_output(
+                pattern, env, module
+            ) or declare:
+                if not isinstance(value, dict) or len(value) != len(pairs):
+                    return
+                keys = []
+                for key_term, _ in pairs:
+                    k = next(self.eval_term(key_term, env, module), None)
+                    if k is None or k[0] not in value:
+                        return
+                    keys.append(k[0])
+                yield from self.unify_all(
+                    [p for _, p in pairs],
+                    [value[k] for k in keys],
+                    env,
+                    module,
+                    declare,
+                )
+                return
+        for v, next_env in self.eval_term(pattern, env, module):
+            if equal(v, value):
+                yield next_env
+
+    def unify_all(
+        self,
+        patterns: list[Term],
+        values: list[Any],
+        env: Env,
+        module: Module,
+        declare: bool = False,
+        index: int = 0,
+    ) -> Iterator[Env]:
+        if index == len(patterns):
+            yield env
+            return
+        for next_env in self.unify(
+            patterns[index], values[index], env, module, declare
+        ):
+            yield from self.unify_all(
+                patterns, values, next_env, module, declare, index + 1
+            )
+
+    # Terms
+
+    def eval_term(
+        self, term: Term, env: Env, module: Module
+    ) -> Iterator[tuple[Any, Env]]:
+        match term:
+            case Scalar(value=value):
+                yield value, env
+            case Var(name=name):
+                value = self.resolve(name, env, module)
+                if value is not UNDEFINED:
+                    yield value, env
+            case Ref():
+                yield from self.eval_ref(term, env, module)
+            case Call():
+                yield from self.eval_call(term, env, module)
+            case BinaryOp(op=op, left=left, right=right):
+                operator = OPERATORS[op]
+                for a, env_a in self.eval_term(left, env, module):
+                    for b, env_b in self.eval_term(right, env_a, module):
+                        try:
+                            yield operator(a, b), env_b
+                        except BuiltinError:
+                            continue
+            case Membership(value=value, collection=collection):
+                for v, env_v in self.eval_term(value, env, module):
+                    for c, env_c in self.eval_term(collection, env_v, module):
+                        yield member(v, c), env_c
+            case ArrayTerm(items=terms):
+                for values, next_env in self.eval_terms(terms, env, module):
+                    yield values, next_env
+            case SetTerm(items=terms):
+                for values, next_env in self.eval_terms(terms, env, module):
+                    yield RegoSet(values), next_env
+            case ObjectTerm(items=pairs):
+                flat = [t for pair in pairs for t in pair]
+                for values, next_env in self.eval_terms(flat, env, module):
+                    yield dict(zip(values[::2], values[1::2], strict=True)), next_env
+            case ArrayComprehension(term=item, body=body):
+                yield [
+                    value
+                    for body_env in self.eval_body(body, env, module)
+                    for value, _ in self.eval_term(item, body_env, module)
+                ], env
+            case SetComprehension(term=item, body=body):
+                yield RegoSet(
+                    value
+                    for body_env in self.eval_body(body, env, module)
+                    for value, _ in self.eval_term(item, body_env, module)
+                ), env
+            case ObjectComprehension(key=key_term, value=value_term, body=body):
+                obj: dict = {}
+                for body_env in self.eval_body(body, env, module):
+                    for k, k_env in self.eval_term(key_term, body_env, module):
+                        for v, _ in self.eval_term(value_term, k_env, module):
+                            if k in obj and not equal(obj[k], v):
+                                raise RegoEvalError(
+                                    f"Conflicting values for key {k!r} in "
+                                    "object comprehension"
+                                )
+                            obj[k] = v
+                yield obj, env
+            case _:
+                raise RegoEvalError(f"Unsupported term: {term}")
+
+    def eval_terms(
+        self, terms: list[Term], env: Env, module: Module
+    ) -> Iterator[tuple[list, Env]]:
+        if not terms:
+            yield [], env
+            return
+        for value, next_env in self.eval_term(terms[0], env, module):
+            for rest, last_env in self.eval_terms(terms[1:], next_env, module):
+                yield [value, *rest], last_env
+
+    def resolve(self, name: str, env: Env, module: Module) -> Any:
+        if name in env:
+            value = env[name]
+            if value is UNBOUND:
+                raise RegoEvalError(f"Variable {name!r} is unsafe")
+            return value
+        if name == "input":
+            return self.input
+        package = self.package_of(module)
+        if package.has_rule(name):
+            return self.rule_value(package, name)
+        if name in module.imports:
+            path = module.imports[name]
+            return self.resolve_path(path, module)
+        raise RegoEvalError(f"Variable {name!r} is unsafe")
+
+    def resolve_path(self, path: tuple[str, ...], module: Module) -> Any:
+        ref = Ref(Var(path[0]), [Scalar(p) for p in path[1:]])
+        for value, _ in self.eval_ref(ref, {}, module):
+            return value
+        return UNDEFINED
+
+    def eval_ref(
+        self, ref: Ref, env: Env, module: Module
+    ) -> Iterator[tuple[Any, Env]]:
+        head, path = ref.head, ref.path
+        if isinstance(head, Var) and head.name not in env:
+            name = head.name
+            if name == "data":
+                yield from self.eval_data_ref(path, env, module)
+                return
+            if name in module.imports and not self.package_of(
+                module
+            ).has_rule(name):
+                imported = module.imports[name]
+                full_path = [Scalar(p) for p in imported[1:]] + path
+                if imported[0] == "data":
+                    yield from self.eval_data_ref(full_path, env, module)
+                else:
+                    yield from self.walk(self.input, full_path, env, module)
+                return
+        for value, next_env in self.eval_term(head, env, module):
+            yield from self.walk(value, path, next_env, module)
+
+    def eval_data_ref(
+        self, path: list[Term], env: Env, module: Module
+    ) -> Iterator[tuple[Any, Env]]:
+        names = []
+        for term in path:
+            if not isinstance(term, Scalar) or not isinstance(term.value, str):
+                break
+            names.append(term.value)
+        for split in range(len(names), 0, -1):
+            package = self.packages.get(tuple(names[:split]))
+            if package is None:
+                continue
+            if split == len(path):
+                # Whole package: an object with the value of every rule
+                document = {}
+                for name in set(package.rules) | set(package.defaults):
+                    if package.is_function(name):
+                        continue
+                    value = self.rule_value(package, name)
+                    if value is not UNDEFINED:
+                        document[name] = value
+                yield document, env
+                return
+            rule_name = names[split] if split < len(names) else None
+            if rule_name is None or not package.has_rule(rule_name):
+                return
+            value = self.rule_value(package, rule_name)
+            if value is not UNDEFINED:
+                yield from self.walk(value, path[split + 1 :], env, module)
+            return
+
+    def walk(
+        self, value: Any, path: list[Term], env: Env, module: Module
+    ) -> Iterator[tuple[Any, Env]]:
+        if not path:
+            yield value, env
+            return
+        term, rest = path[0], path[1:]
+        if isinstance(term, Var) and (
+            term.name == "_" or not self.is_bound(term.name, env, module)
+        ):
+            for k, child in items(value):
+                next_env = env if term.name == "_" else env | {term.name: k}
+                yield from self.walk(child, rest, next_env, module)
+            return
+        for k, next_env in self.eval_term(term, env, module):
+            child = lookup(value, k)
+            if child is not UNDEFINED:
+                yield from self.walk(child, rest, next_env, module)
+
+    def eval_call(
+        self, call: Call, env: Env, module: Module
+    ) -> Iterator[tuple[Any, Env]]:
+        target = self.resolve_function(call.name, module)
+        for args, next_env in self.eval_terms(call.args, env, module):
+            if target is None:
+                result = self.call_builtin(".".join(call.name), args)
+            else:
+                result = self.call_function(target[0], target[1], args)
+            if result is not UNDEFINED:
+                yield result, next_env
+
+    def resolve_function(
+        self, name: tuple[str, ...], module: Module
+    ) -> tuple[Package, str] | None:
+        package = self.package_of(module)
+        if len(name) == 1 and package.is_function(name[0]):
+            return package, name[0]
+        if name[0] in module.imports:
+            name = module.imports[name[0]] + name[1:]
+        if name[0] != "data":
+            return None
+        package = self.packages.get(name[1:-1])
+        if package is None or not package.is_function(name[-1]):
+            raise RegoEvalError(f"Function {'.'.join(name)!r} not found")
+        return package, name[-1]
+
+
+def items(collection: Any) -> Iterator[tuple[Any, Any]]:
+    match collection:
+        case list():
+            yield from enumerate(collection)
+        case dict():
+            yield from collection.items()
+        case RegoSet():
+            for item in collection:
+                yield item, item
+
+
+def lookup(collection: Any, k: Any) -> Any:
+    match collection:
+        case dict():
+            if isinstance(k, list | dict | RegoSet):
+                return UNDEFINED
+            return collection.get(k, UNDEFINED)
+        case list():
+            if isinstance(k, bool) or not isinstance(k, int | float):
+                return UNDEFINED
+            if k != int(k) or not 0 <= k < len(collection):
+                return UNDEFINED
+            return collection[int(k)]
+        case RegoSet():
+            return k if k in collection else UNDEFINED
+    return UNDEFINED
+
+
+def member(value: Any, collection: Any) -> bool:
+    match collection:
+        case list():
+            return any(equal(value, item) for item in collection)
+        case dict():
+            return any(equal(value, item) for item in collection.values())
+        case RegoSet():
+            return value in collection
+    return False
+
+
+def compile_module(source: str) -> Module:
+    """Parses a policy and checks it only uses supported functions."""
+    module = parse_module(source)
+    validate(module)
+    return module
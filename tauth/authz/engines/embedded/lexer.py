@@ -0,0 +1,91 @@
+import json
+import re
+from dataclasses import dataclass
+from typing import Literal
+
+from .errors import RegoParseError
+
+TokenKind = Literal["ident", "string", "number", "op", "newline", "eof"]
+
+OPERATORS = (
+    ":=",
+    "==",
+    "!=",
+    "<=",
+    ">=",
+    "<",
+    ">",
+    "=",
+    "+",
+    "-",
+    "*",
+    "/",
+    "%",
+    "&",
+    "|",
+    "(",
+    ")",
+    "[",
+    "]",
+    "{",
+    "}",
+    ",",
+    ";",
+    ".",
+    ":",
+)
+
+TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<space>[ \t\r]+)
+    | (?P<comment>\#[^\n]*)
+    | (?P<newline>\n)
+    | (?P<number>\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+    | (?P<string>"(?:[^"\\\n]|\\.)*")
+    | (?P<raw_string>`[^`]*`)
+    | (?P<ident>[A-Za-z_][A-Za-z0-9_]*)
+    | (?P<op>{})
+    """.format("|".join(re.escape(op) for op in OPERATORS)),
+    re.VERBOSE,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Token:
+    kind: TokenKind
+    value: str | int | float
+    line: int
+
+
+def tokenize(source: str) -> list[Token]:
+    tokens: list[Token] = []
+    line, position = 1, 0
+    while position < len(source):
+        match = TOKEN_PATTERN.match(source, position)
+        if match is None:
+            raise RegoParseError(
+                f"Unexpected character {source[position]!r}", line
+            )
+        kind = match.lastgroup
+        text = match.group()
+        match kind:
+            case "newline":
+                tokens.append(Token("newline", text, line))
+                line += 1
+            case "number":
+                number = float(text) if any(c in text for c in ".eE") else int(text)
+                tokens.append(Token("number", number, line))
+            case "string":
+                try:
+                    value = json.loads(text)
+                except json.JSONDecodeError:
+                    raise RegoParseError(f"Invalid string {text}", line)
+                tokens.append(Token("string", value, line))
+            case "raw_string":
+                tokens.append(Token("string", text[1:-1], line))
+                line += text.count("\n")
+            case "ident" | "op":
+                tokens.append(Token(kind, text, line))
+        position = match.end()
+    tokens.append(Token("eof", "", line))
+    return tokens
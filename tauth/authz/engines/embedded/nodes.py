@@ -0,0 +1,146 @@
+"""Syntax tree of the supported Rego subset."""
+
+from dataclasses import dataclass, field
+from typing import Any, Literal
+
+
+class Term:
+    pass
+
+
+@dataclass(slots=True)
+class Scalar(Term):
+    value: str | int | float | bool | None
+
+
+@dataclass(slots=True)
+class Var(Term):
+    name: str
+
+
+@dataclass(slots=True)
+class Ref(Term):
+    head: Term
+    path: list[Term]
+
+
+@dataclass(slots=True)
+class ArrayTerm(Term):
+    items: list[Term]
+
+
+@dataclass(slots=True)
+class SetTerm(Term):
+    items: list[Term]
+
+
+@dataclass(slots=True)
+class ObjectTerm(Term):
+    items: list[tuple[Term, Term]]
+
+
+@dataclass(slots=True)
+class ArrayComprehension(Term):
+    term: Term
+    body: list["Statement"]
+
+
+@dataclass(slots=True)
+class SetComprehension(Term):
+    term: Term
+    body: list["Statement"]
+
+
+@dataclass(slots=True)
+class ObjectComprehension(Term):
+    key: Term
+    value: Term
+    body: list["Statement"]
+
+
+@dataclass(slots=True)
+class Call(Term):
+    name: tuple[str, ...]
+    args: list[Term]
+
+
+@dataclass(slots=True)
+class BinaryOp(Term):
+    op: str
+    left: Term
+    right: Term
+
+
+@dataclass(slots=True)
+class Membership(Term):
+    value: Term
+    collection: Term
+
+
+class Statement:
+    pass
+
+
+@dataclass(slots=True)
+class Expr(Statement):
+    term: Term
+
+
+@dataclass(slots=True)
+class Not(Statement):
+    statement: Statement
+
+
+@dataclass(slots=True)
+class Assign(Statement):
+    target: Term
+    value: Term
+
+
+@dataclass(slots=True)
+class Unify(Statement):
+    left: Term
+    right: Term
+
+
+@dataclass(slots=True)
+class SomeDecl(Statement):
+    names: list[str]
+
+
+@dataclass(slots=True)
+class SomeIn(Statement):
+    key: Term | None
+    value: Term
+    collection: Term
+
+
+@dataclass(slots=True)
+class Every(Statement):
+    key: Term | None
+    value: Term
+    collection: Term
+    body: list[Statement]
+
+
+RuleKind = Literal["complete", "function", "set", "object"]
+
+
+@dataclass(slots=True)
+class Rule:
+    kind: RuleKind
+    name: str
+    line: int
+    args: list[Term] = field(default_factory=list)
+    key: Term | None = None
+    value: Term | None = None
+    body: list[Statement] = field(default_factory=list)
+    orelse: "Rule | None" = None
+
+
+@dataclass(slots=True)
+class Module:
+    package: tuple[str, ...]
+    imports: dict[str, tuple[str, ...]]
+    rules: dict[str, list[Rule]]
+    defaults: dict[str, Any]
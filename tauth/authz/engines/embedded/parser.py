@@ -0,0 +1,589 @@
+"""
+Parser for the Rego v1 subset evaluated by the embedded engine.
+
+Supported: package, imports, default values, complete rules (with `else`
+chains), functions, partial set (`contains`) and partial object rules,
+`some`/`in`, `every`, `not`, `:=`/`=`, comparisons, arithmetic, set
+operators and comprehensions. Anything else (e.g., `with`, ref rule heads)
+is rejected with a `RegoParseError`.
+"""
+
+from typing import Any
+
+from .errors import RegoParseError
+from .lexer import Token, tokenize
+from .nodes import (
+    ArrayComprehension,
+    ArrayTerm,
+    Assign,
+    BinaryOp,
+    Call,
+    Every,
+    Expr,
+    Membership,
+    Module,
+    Not,
+    ObjectComprehension,
+    ObjectTerm,
+    Ref,
+    Rule,
+    Scalar,
+    SetComprehension,
+    SetTerm,
+    SomeDecl,
+    SomeIn,
+    Statement,
+    Term,
+    Unify,
+    Var,
+)
+from .values import RegoSet
+
+KEYWORDS = {
+    "as",
+    "contains",
+    "default",
+    "else",
+    "every",
+    "if",
+    "import",
+    "in",
+    "not",
+    "package",
+    "some",
+    "with",
+}
+RELATION_OPERATORS = {"==", "!=", "<", "<=", ">", ">="}
+IGNORED_IMPORTS = {("rego", "v1"), ("future", "keywords")}
+
+
+class Parser:
+    def __init__(self, source: str):
+        self.tokens = tokenize(source)
+        self.position = 0
+        self.allow_pipe = True
+
+    # Token helpers
+
+    @property
+    def token(self) -> Token:
+        return self.tokens[self.position]
+
+    def peek(self, offset: int = 1) -> Token:
+        index = min(self.position + offset, len(self.tokens) - 1)
+        return self.tokens[index]
+
+    def advance(self) -> Token:
+        token = self.token
+        if token.kind != "eof":
+            self.position += 1
+        return token
+
+    def at(self, value: str, kind: str | None = None) -> bool:
+        token = self.token
+        if kind is None:
+            kind = "ident" if value.isidentifier() else "op"
+        return token.kind == kind and token.value == value
+
+    def accept(self, value: str) -> bool:
+        if self.at(value):
+            self.advance()
+            return True
+        return False
+
+    def expect(self, value: str) -> Token:
+        if not self.at(value):
+            self.error(f"Expected {value!r}")
+        return self.advance()
+
+    def expect_ident(self) -> str:
+        token = self.token
+        if token.kind != "ident" or token.value in KEYWORDS:
+            self.error("Expected identifier")
+        self.advance()
+        return str(token.value)
+
+    def skip_newlines(self) -> None:
+        while self.token.kind == "newline":
+            self.advance()
+
+    def error(self, message: str) -> None:
+        token = self.token
+        found = "end of file" if token.kind == "eof" else repr(token.value)
+        raise RegoParseError(f"{message}, found {found}", token.line)
+
+    def unsupported(self, construct: str) -> None:
+        raise RegoParseError(
+            f"{construct} not supported by the embedded engine",
+            self.token.line,
+        )
+
+    # Module
+
+    def parse_module(self) -> Module:
+        self.skip_newlines()
+        self.expect("package")
+        package = tuple(self.parse_dotted_name())
+        self.end_of_statement()
+
+        module = Module(package=package, imports={}, rules={}, defaults={})
+        while True:
+            self.skip_statement_separators()
+            if self.token.kind == "eof":
+                break
+            if self.accept("import"):
+                self.parse_import(module)
+            elif self.accept("default"):
+                self.parse_default(module)
+            else:
+                rule = self.parse_rule()
+                self.add_rule(module, rule)
+            self.end_of_statement()
+        return module
+
+    def skip_statement_separators(self) -> None:
+        while self.token.kind == "newline" or self.at(";"):
+            self.advance()
+
+    def end_of_statement(self) -> None:
+        if self.token.kind not in ("newline", "eof") and not self.at(";"):
+            if self.at("with"):
+                self.unsupported("`with` modifiers are")
+            self.error("Expected end of statement")
+
+    def parse_dotted_name(self) -> list[str]:
+        names = [self.expect_ident_or_root()]
+        while self.accept("."):
+            names.append(self.expect_ident())
+        return names
+
+    def expect_ident_or_root(self) -> str:
+        token = self.token
+        if token.kind != "ident":
+            self.error("Expected identifier")
+        self.advance()
+        return str(token.value)
+
+    def parse_import(self, module: Module) -> None:
+        path = tuple(self.parse_dotted_name())
+        if path[:2] in IGNORED_IMPORTS:
+            return
+        if path[0] not in ("data", "input"):
+            self.unsupported(f"Import {'.'.join(path)!r} is")
+        alias = self.expect_ident() if self.accept("as") else path[-1]
+        if len(path) == 1 and alias == path[0]:
+            return
+        module.imports[alias] = path
+
+    def parse_default(self, module: Module) -> None:
+        line = self.token.line
+        name = self.expect_ident()
+        if self.at("("):
+            self.unsupported("Default functions are")
+        if not (self.accept(":=") or self.accept("=")):
+            self.error("Expected ':=' or '='")
+        term = self.parse_expr()
+        if name in module.defaults:
+            raise RegoParseError(f"Multiple defaults for {name!r}", line)
+        module.defaults[name] = constant(term, line)
+
+    def add_rule(self, module: Module, rule: Rule) -> None:
+        rules = module.rules.setdefault(rule.name, [])
+        if rules and rules[0].kind != rule.kind:
+            raise RegoParseError(
+                f"Conflicting definitions of rule {rule.name!r}", rule.line
+            )
+        if rule.kind == "function" and rules and (
+            len(rules[0].args) != len(rule.args)
+        ):
+            raise RegoParseError(
+                f"Function {rule.name!r} redeclared with different arity",
+                rule.line,
+            )
+        rules.append(rule)
+
+    # Rules
+
+    def parse_rule(self) -> Rule:
+        line = self.token.line
+        name = self.expect_ident()
+        if name in ("input", "data"):
+            raise RegoParseError(f"Rule name {name!r} is reserved", line)
+        if self.at("."):
+            self.unsupported("Rules with ref heads are")
+
+        if self.accept("("):
+            rule = Rule(kind="function", name=name, line=line)
+            rule.args = self.parse_items(")")
+            rule.value = self.parse_rule_value()
+        elif self.accept("contains"):
+            rule = Rule(kind="set", name=name, line=line)
+            rule.key = self.parse_expr()
+        elif self.accept("["):
+            rule = Rule(kind="object", name=name, line=line)
+            self.allow_pipe = True
+            rule.key = self.parse_expr()
+            self.expect("]")
+            rule.value = self.parse_rule_value()
+            if rule.value is None:
+                self.unsupported("Partial set rules without `contains` are")
+        else:
+            rule = Rule(kind="complete", name=name, line=line)
+            rule.value = self.parse_rule_value()
+
+        has_body = self.parse_rule_body(rule)
+        if not has_body and rule.value is None and rule.kind != "set":
+            self.error("Expected rule value or body")
+        if rule.value is None and rule.kind in ("complete", "function"):
+            rule.value = Scalar(True)
+
+        current = rule
+        while self.at_else():
+            if rule.kind not in ("complete", "function"):
+                self.unsupported("`else` on partial rules is")
+            line = self.advance().line
+            orelse = Rule(kind=rule.kind, name=name, line=line, args=rule.args)
+            orelse.value = self.parse_rule_value() or Scalar(True)
+            self.parse_rule_body(orelse)
+            current.orelse = orelse
+            current = orelse
+        return rule
+
+    def at_else(self) -> bool:
+        """Checks for `else`, which may start on the following line."""
+        offset = 0
+        while self.peek(offset).kind == "newline":
+            offset += 1
+        token = self.peek(offset)
+        if token.kind == "ident" and token.value == "else":
+            self.position += offset
+            return True
+        return False
+
+    def parse_rule_value(self) -> Term | None:
+        if self.accept(":=") or self.accept("="):
+            return self.parse_expr()
+        return None
+
+    def parse_rule_body(self, rule: Rule) -> bool:
+        if self.at("{"):
+            self.unsupported("Rule bodies without `if` (Rego v0) are")
+        if not self.accept("if"):
+            return False
+        # Function arguments are declared in the body
+        declared = {name for arg in rule.args for name in term_vars(arg)}
+        if self.accept("{"):
+            rule.body = self.parse_body("}", declared)
+        else:
+            rule.body = [self.parse_statement()]
+            self.declare(rule.body[0], declared)
+        return True
+
+    def parse_body(
+        self, terminator: str, declared: set[str] | None = None
+    ) -> list[Statement]:
+        if declared is None:
+            declared = set()
+        statements = []
+        while True:
+            self.skip_statement_separators()
+            if self.accept(terminator):
+                break
+            statements.append(self.parse_statement())
+            self.declare(statements[-1], declared)
+            if self.at("with"):
+                self.unsupported("`with` modifiers are")
+            if not (
+                self.token.kind == "newline"
+                or self.at(";")
+                or self.at(terminator)
+            ):
+                self.error(f"Expected newline, ';' or {terminator!r}")
+        if not statements:
+            self.error("Empty body")
+        return statements
+
+    def declare(self, statement: Statement, declared: set[str]) -> None:
+        """Rejects `:=` on variables declared earlier in the body, as OPA."""
+        match statement:
+            case Assign(target=target):
+                for name in term_vars(target):
+                    if name in declared:
+                        raise RegoParseError(
+                            f"Var {name!r} assigned above", self.token.line
+                        )
+                    declared.add(name)
+            case SomeDecl(names=names):
+                declared.update(names)
+            case SomeIn(key=key, value=value):
+                for term in (key, value):
+                    if term is not None:
+                        declared.update(term_vars(term))
+
+    # Statements
+
+    def parse_statement(self) -> Statement:
+        previous, self.allow_pipe = self.allow_pipe, True
+        try:
+            if self.accept("not"):
+                return Not(self.parse_statement())
+            if self.accept("some"):
+                return self.parse_some()
+            if self.accept("every"):
+                return self.parse_every()
+            left = self.parse_expr()
+            if self.accept(":="):
+                return Assign(left, self.parse_expr())
+            if self.accept("="):
+                return Unify(left, self.parse_expr())
+            return Expr(left)
+        finally:
+            self.allow_pipe = previous
+
+    def parse_some(self) -> Statement:
+        terms = [self.parse_relation()]
+        while self.accept(","):
+            terms.append(self.parse_relation())
+        if self.accept("in"):
+            if len(terms) > 2:
+                self.error("Expected at most two variables before 'in'")
+            collection = self.parse_relation()
+            key = terms[0] if len(terms) == 2 else None
+            return SomeIn(key=key, value=terms[-1], collection=collection)
+        names = []
+        for term in terms:
+            if not isinstance(term, Var):
+                self.error("Expected variable in `some` declaration")
+            names.append(term.name)
+        return SomeDecl(names)
+
+    def parse_every(self) -> Statement:
+        key, value = None, self.parse_relation()
+        if self.accept(","):
+            key, value = value, self.parse_relation()
+        self.expect("in")
+        collection = self.parse_relation()
+        self.expect("{")
+        return Every(key, value, collection, self.parse_body("}"))
+
+    # Expressions, from lowest to highest precedence
+
+    def parse_expr(self) -> Term:
+        left = self.parse_relation()
+        while self.accept("in"):
+            left = Membership(left, self.parse_relation())
+        return left
+
+    def parse_relation(self) -> Term:
+        left = self.parse_or()
+        while self.token.kind == "op" and self.token.value in RELATION_OPERATORS:
+            op = str(self.advance().value)
+            left = BinaryOp(op, left, self.parse_or())
+        return left
+
+    def parse_or(self) -> Term:
+        left = self.parse_and()
+        while self.allow_pipe and self.accept("|"):
+            left = BinaryOp("|", left, self.parse_and())
+        return left
+
+    def parse_and(self) -> Term:
+        left = self.parse_arith()
+        while self.accept("&"):
+            left = BinaryOp("&", left, self.parse_arith())
+        return left
+
+    def parse_arith(self) -> Term:
+        left = self.parse_factor()
+        while self.at("+") or self.at("-"):
+            op = str(self.advance().value)
+            left = BinaryOp(op, left, self.parse_factor())
+        return left
+
+    def parse_factor(self) -> Term:
+        left = self.parse_unary()
+        while self.at("*") or self.at("/") or self.at("%"):
+            op = str(self.advance().value)
+            left = BinaryOp(op, left, self.parse_unary())
+        return left
+
+    def parse_unary(self) -> Term:
+        if self.accept("-"):
+            if self.token.kind == "number":
+                return self.parse_postfix(Scalar(-self.advance().value))
+            return BinaryOp("-", Scalar(0), self.parse_unary())
+        return self.parse_postfix(self.parse_primary())
+
+    def parse_primary(self) -> Term:
+        token = self.token
+        match token.kind:
+            case "number" | "string":
+                self.advance()
+                return Scalar(token.value)
+            case "ident":
+                return self.parse_name()
+        if self.accept("("):
+            previous, self.allow_pipe = self.allow_pipe, True
+            self.skip_newlines()
+            term = self.parse_expr()
+            self.skip_newlines()
+            self.expect(")")
+            self.allow_pipe = previous
+            return term
+        if self.accept("["):
+            return self.parse_array()
+        if self.accept("{"):
+            return self.parse_object_or_set()
+        self.error("Expected term")
+        raise AssertionError
+
+    def parse_name(self) -> Term:
+        name = str(self.token.value)
+        match name:
+            case "true" | "false":
+                self.advance()
+                return Scalar(name == "true")
+            case "null":
+                self.advance()
+                return Scalar(None)
+            case "with":
+                self.unsupported("`with` modifiers are")
+        if name in KEYWORDS:
+            self.error("Unexpected keyword")
+        self.advance()
+        path = [name]
+        position = self.position
+        while self.at(".") and self.peek().kind == "ident":
+            self.advance()
+            path.append(str(self.advance().value))
+        if self.accept("("):
+            args = self.parse_items(")")
+            if path == ["set"]:
+                if args:
+                    self.error("set() takes no arguments")
+                return SetTerm([])
+            return Call(tuple(path), args)
+        # Not a call: parse the dotted path as a reference
+        self.position = position
+        return Var(name)
+
+    def parse_postfix(self, term: Term) -> Term:
+        path = []
+        while True:
+            if self.at(".") and self.peek().kind == "ident":
+                self.advance()
+                path.append(Scalar(str(self.advance().value)))
+            elif self.at("["):
+                self.advance()
+                previous, self.allow_pipe = self.allow_pipe, True
+                self.skip_newlines()
+                path.append(self.parse_expr())
+                self.skip_newlines()
+                self.expect("]")
+                self.allow_pipe = previous
+            else:
+                break
+        return Ref(term, path) if path else term
+
+    def parse_items(self, terminator: str) -> list[Term]:
+        """Parses comma-separated items; the opening token was consumed."""
+        previous, self.allow_pipe = self.allow_pipe, True
+        items = []
+        self.skip_newlines()
+        while not self.accept(terminator):
+            items.append(self.parse_expr())
+            self.skip_newlines()
+            if not self.accept(","):
+                self.skip_newlines()
+                self.expect(terminator)
+                break
+            self.skip_newlines()
+        self.allow_pipe = previous
+        return items
+
+    def parse_collection_item(self) -> Term:
+        previous, self.allow_pipe = self.allow_pipe, False
+        self.skip_newlines()
+        term = self.parse_expr()
+        self.skip_newlines()
+        self.allow_pipe = previous
+        return term
+
+    def parse_array(self) -> Term:
+        self.skip_newlines()
+        if self.accept("]"):
+            return ArrayTerm([])
+        first = self.parse_collection_item()
+        if self.accept("|"):
+            return ArrayComprehension(first, self.parse_body("]"))
+        items = [first]
+        while self.accept(","):
+            self.skip_newlines()
+            if self.accept("]"):
+                return ArrayTerm(items)
+            items.append(self.parse_collection_item())
+        self.expect("]")
+        return ArrayTerm(items)
+
+    def parse_object_or_set(self) -> Term:
+        self.skip_newlines()
+        if self.accept("}"):
+            return ObjectTerm([])
+        first = self.parse_collection_item()
+        if self.accept(":"):
+            value = self.parse_collection_item()
+            if self.accept("|"):
+                return ObjectComprehension(first, value, self.parse_body("}"))
+            pairs = [(first, value)]
+            while self.accept(","):
+                self.skip_newlines()
+                if self.accept("}"):
+                    return ObjectTerm(pairs)
+                key = self.parse_collection_item()
+                self.expect(":")
+                pairs.append((key, self.parse_collection_item()))
+            self.expect("}")
+            return ObjectTerm(pairs)
+        if self.accept("|"):
+            return SetComprehension(first, self.parse_body("}"))
+        items = [first]
+        while self.accept(","):
+            self.skip_newlines()
+            if self.accept("}"):
+                return SetTerm(items)
+            items.append(self.parse_collection_item())
+        self.expect("}")
+        return SetTerm(items)
+
+
+def term_vars(term: Term) -> list[str]:
+    """Variables bound by a pattern (e.g., `[x, {"k": y}]`)."""
+    match term:
+        case Var(name=name):
+            return [] if name == "_" else [name]
+        case ArrayTerm(items=items):
+            return [name for item in items for name in term_vars(item)]
+        case ObjectTerm(items=items):
+            return [name for _, value in items for name in term_vars(value)]
+    return []
+
+
+def constant(term: Term, line: int) -> Any:
+    """Converts a ground term (e.g., a default value) to a value."""
+    match term:
+        case Scalar(value=value):
+            return value
+        case ArrayTerm(items=items):
+            return [constant(item, line) for item in items]
+        case SetTerm(items=items):
+            return RegoSet(constant(item, line) for item in items)
+        case ObjectTerm(items=items):
+            return {
+                constant(key, line): constant(value, line)
+                for key, value in items
+            }
+    raise RegoParseError("Default values must be constants", line)
+
+
+def parse_module(source: str) -> Module:
+    return Parser(source).parse_module()
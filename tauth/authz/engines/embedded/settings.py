@@ -0,0 +1,12 @@
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class EmbeddedSettings(BaseSettings):
+    # Seconds between syncs with policies changed by other workers
+    POLICY_REFRESH: int = 10
+
+    model_config = SettingsConfigDict(
+        extra="ignore",
+        env_file=".env",
+        env_prefix="TAUTH_AUTHZ_ENGINE_SETTINGS_EMBEDDED_",
+    )
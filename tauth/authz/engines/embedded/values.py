@@ -0,0 +1,160 @@
+"""
+Rego values on top of JSON-like Python values.
+
+Arrays are lists, objects are dicts and sets are `RegoSet`s. Booleans and
+numbers are kept apart (unlike in Python, `true == 1` is false in Rego), so
+values are compared and hashed through `key`.
+"""
+
+from collections.abc import Iterable, Iterator
+from functools import cmp_to_key
+from typing import Any
+
+TYPE_ORDER = {
+    "null": 0,
+    "boolean": 1,
+    "number": 2,
+    "string": 3,
+    "array": 4,
+    "object": 5,
+    "set": 6,
+}
+
+
+class RegoSet:
+    __slots__ = ("_items",)
+
+    def __init__(self, items: Iterable[Any] = ()):
+        self._items = {key(item): item for item in items}
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._items.values())
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, item: Any) -> bool:
+        return key(item) in self._items
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, RegoSet) and self._items.keys() == (
+            other._items.keys()
+        )
+
+    def __hash__(self) -> int:
+        return hash(key(self))
+
+    def __repr__(self) -> str:
+        return f"RegoSet({list(self)!r})"
+
+    def add(self, item: Any) -> None:
+        self._items[key(item)] = item
+
+    def keys(self) -> frozenset:
+        return frozenset(self._items)
+
+    def union(self, other: "RegoSet") -> "RegoSet":
+        result = RegoSet()
+        result._items = self._items | other._items
+        return result
+
+    def intersection(self, other: "RegoSet") -> "RegoSet":
+        result = RegoSet()
+        result._items = {
+            k: v for k, v in self._items.items() if k in other._items
+        }
+        return result
+
+    def difference(self, other: "RegoSet") -> "RegoSet":
+        result = RegoSet()
+        result._items = {
+            k: v for k, v in self._items.items() if k not in other._items
+        }
+        return result
+
+
+def type_name(value: Any) -> str:
+    match value:
+        case None:
+            return "null"
+        case bool():
+            return "boolean"
+        case int() | float():
+            return "number"
+        case str():
+            return "string"
+        case list():
+            return "array"
+        case dict():
+            return "object"
+        case RegoSet():
+            return "set"
+    raise TypeError(f"Unsupported value: {type(value).__name__}")
+
+
+def key(value: Any) -> Any:
+    """Hashable representation of a value, following Rego equality."""
+    match value:
+        case bool():
+            return ("b", value)
+        case str():
+            return value
+        case int() | float():
+            return ("n", value)
+        case None:
+            return ("z",)
+        case list():
+            return ("a", tuple(key(item) for item in value))
+        case dict():
+            return (
+                "o",
+                frozenset((key(k), key(v)) for k, v in value.items()),
+            )
+        case RegoSet():
+            return ("s", value.keys())
+    raise TypeError(f"Unsupported value: {type(value).__name__}")
+
+
+def equal(a: Any, b: Any) -> bool:
+    if type(a) is type(b) and isinstance(a, str | int):
+        return a == b
+    return key(a) == key(b)
+
+
+def compare(a: Any, b: Any) -> int:
+    """Total order over values: by type first, then by value."""
+    type_a, type_b = type_name(a), type_name(b)
+    if type_a != type_b:
+        return TYPE_ORDER[type_a] - TYPE_ORDER[type_b]
+    match type_a:
+        case "null":
+            return 0
+        case "array":
+            for x, y in zip(a, b, strict=False):
+                if result := compare(x, y):
+                    return result
+            return len(a) - len(b)
+        case "object":
+            return compare(
+                sorted_values([[k, v] for k, v in a.items()]),
+                sorted_values([[k, v] for k, v in b.items()]),
+            )
+        case "set":
+            return compare(sorted_values(a), sorted_values(b))
+    return (a > b) - (a < b)
+
+
+def sorted_values(values: Iterable[Any]) -> list[Any]:
+    return sorted(values, key=cmp_to_key(compare))
+
+
+def to_json(value: Any) -> Any:
+    """Converts a value to its JSON representation (sets become arrays)."""
+    match value:
+        case RegoSet():
+            return [to_json(item) for item in sorted_values(value)]
+        case list():
+            return [to_json(item) for item in value]
+        case dict():
+            return {k: to_json(v) for k, v in value.items()}
+    return value
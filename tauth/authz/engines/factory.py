@@ -26,6 +26,14 @@ class AuthorizationEngine:
 
             sets = cast(RemoteSettings, settings.AUTHZ_ENGINE_SETTINGS)
             cls._instance = RemoteEngine(settings=sets)
+
+        elif settings.AUTHZ_ENGINE == "embedded":
+            from .embedded.engine import EmbeddedEngine
+            from .embedded.settings import EmbeddedSettings
+
+            sets = cast(EmbeddedSettings, settings.AUTHZ_ENGINE_SETTINGS)
+            cls._instance = EmbeddedEngine(settings=sets)
+            cls._instance._initialize_db_policies()
         else:
             raise Exception("Invalid authz engine")
 
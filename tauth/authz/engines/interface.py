@@ -2,6 +2,7 @@ from abc import ABC, abstractmethod
 from typing import Any
 
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
 
 class Unauthorized(Exception):
@@ -25,6 +26,18 @@ class AuthorizationInterface(ABC):
         **kwargs,
     ) -> AuthorizationResponse: ...
 
+    async def is_authorized_async(
+        self,
+        policy_name: str,
+        rule: str,
+        context: dict | None = None,
+        **kwargs,
+    ) -> AuthorizationResponse:
+        """Same as `is_authorized`, run in a thread unless overridden."""
+        return await run_in_threadpool(
+            self.is_authorized, policy_name, rule, context, **kwargs
+        )
+
     @abstractmethod
     def upsert_policy(
         self,
@@ -0,0 +1,172 @@
+"""
+OPA bundle built from the policies stored in TAuth's database.
+
+OPA polls the bundle endpoint and activates each new revision atomically,
+instead of TAuth pushing every policy through the policy API. See
+https://www.openpolicyagent.org/docs/latest/management-bundles/.
+"""
+
+import gzip
+import hashlib
+import io
+import re
+import tarfile
+from dataclasses import dataclass
+from threading import Lock
+
+import jwt
+import orjson
+
+from ...policies.models import AuthorizationPolicyDAO
+from .settings import OPASettings
+
+BUNDLE_NAME = "tauth"
+SIGNING_KEY_ID = "tauth"
+# Read by OPA from its environment, so secrets are not written to disk
+TOKEN_ENV = "TAUTH_ROOT_API_KEY"
+SIGNING_KEY_ENV = "TAUTH_AUTHZ_ENGINE_SETTINGS_OPA_BUNDLE_SIGNING_KEY"
+PACKAGE_PATTERN = re.compile(r"^\s*package\s+([\w.]+)\s*$", re.MULTILINE)
+
+
+@dataclass(frozen=True)
+class Bundle:
+    revision: str
+    content: bytes
+
+
+def policy_id(policy_name: str) -> str:
+    """Id OPA gives to a policy loaded from the bundle."""
+    return f"{BUNDLE_NAME}/{policy_name}.rego"
+
+
+def get_revision(policies: list[tuple[str, str]]) -> str:
+    digest = hashlib.sha256()
+    for name, policy in sorted(policies):
+        digest.update(orjson.dumps([name, policy]))
+    return digest.hexdigest()
+
+
+def get_roots(policies: list[tuple[str, str]]) -> list[str]:
+    """
+    Paths owned by the bundle: the packages of its policies.
+
+    Roots may not overlap, so nested packages are covered by their parents.
+    Falls back to owning everything if a package cannot be read.
+    """
+    paths = set()
+    for _, policy in policies:
+        match = PACKAGE_PATTERN.search(policy)
+        if match is None:
+            return [""]
+        paths.add(match.group(1).replace(".", "/"))
+    roots: list[str] = []
+    for path in sorted(paths):
+        if not any(path.startswith(f"{root}/") for root in roots):
+            roots.append(path)
+    return roots
+
+
+def sign(files: dict[str, bytes], key: str) -> bytes:
+    # JSON files are hashed by OPA in their compact, key-sorted form, which
+    # is how the manifest is written
+    payload = {
+        "files": [
+            {
+                "name": name,
+                "hash": hashlib.sha256(content).hexdigest(),
+                "algorithm": "SHA-256",
+            }
+            for name, content in files.items()
+        ],
+        "keyid": SIGNING_KEY_ID,
+    }
+    token = jwt.encode(
+        payload, key, algorithm="HS256", headers={"kid": SIGNING_KEY_ID}
+    )
+    return orjson.dumps({"signatures": [token]})
+
+
+def build(
+    policies: list[tuple[str, str]], signing_key: str | None
+) -> Bundle:
+    revision = get_revision(policies)
+    manifest = {"revision": revision, "roots": get_roots(policies)}
+    files = {
+        ".manifest": orjson.dumps(manifest, option=orjson.OPT_SORT_KEYS)
+    }
+    for name, policy in sorted(policies):
+        files[f"{name}.rego"] = policy.encode()
+    if signing_key:
+        files[".signatures.json"] = sign(files, signing_key)
+
+    buffer = io.BytesIO()
+    # Fixed timestamps so that the same policies give the same bytes
+    with (
+        gzip.GzipFile(fileobj=buffer, mode="wb", mtime=0) as gz,
+        tarfile.open(fileobj=gz, mode="w") as tar,
+    ):
+        for name, content in files.items():
+            info = tarfile.TarInfo(f"/{name}")
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+    return Bundle(revision=revision, content=buffer.getvalue())
+
+
+class PolicyBundle:
+    """Last bundle built by this worker, rebuilt when policies change."""
+
+    _bundle: Bundle | None = None
+    _lock = Lock()
+
+    @classmethod
+    def get(cls, alias: str, settings: OPASettings) -> Bundle:
+        policies = [
+            (p["name"], p["policy"])
+            for p in AuthorizationPolicyDAO.collection(alias=alias).find(
+                {}, projection={"_id": 0, "name": 1, "policy": 1}
+            )
+        ]
+        revision = get_revision(policies)
+        with cls._lock:
+            if cls._bundle is None or cls._bundle.revision != revision:
+                cls._bundle = build(policies, settings.BUNDLE_SIGNING_KEY)
+            return cls._bundle
+
+
+def opa_config(settings: OPASettings, service_url: str) -> dict:
+    """
+    OPA configuration to poll the bundle from TAuth.
+
+    Secrets are referenced as environment variables (`TOKEN_ENV` and
+    `SIGNING_KEY_ENV`), which OPA substitutes when loading the config.
+    """
+    config: dict = {
+        "services": {
+            BUNDLE_NAME: {
+                "url": service_url,
+                "credentials": {
+                    "bearer": {"token": f"${{{TOKEN_ENV}}}"}
+                },
+            }
+        },
+        "bundles": {
+            BUNDLE_NAME: {
+                "service": BUNDLE_NAME,
+                "resource": "authz/policies/bundle",
+                "polling": {
+                    "min_delay_seconds": settings.BUNDLE_POLLING_MIN_DELAY,
+                    "max_delay_seconds": settings.BUNDLE_POLLING_MAX_DELAY,
+                },
+            }
+        },
+    }
+    if settings.BUNDLE_SIGNING_KEY:
+        bundle = config["bundles"][BUNDLE_NAME]
+        bundle["signing"] = {"keyid": SIGNING_KEY_ID}
+        config["keys"] = {
+            SIGNING_KEY_ID: {
+                "algorithm": "HS256",
+                "key": f"${{{SIGNING_KEY_ENV}}}",
+            }
+        }
+    return config
@@ -1,7 +1,10 @@
+import re
+from uuid import uuid4
+
+import httpx
 from fastapi import HTTPException
 from fastapi import status as s
 from loguru import logger
-from opa_client import OpaClient
 from opa_client.errors import (
     CheckPermissionError,
     ConnectionsError,
@@ -15,10 +18,14 @@ from tauth.authz.policies.models import AuthorizationPolicyDAO
 from tauth.settings import Settings
 
 from ....schemas import Infostar
+from ....utils import serialization
 from ...policies.controllers import upsert_one
+from ...policies.projection import PolicyAnalysis
 from ...policies.schemas import AuthorizationPolicyIn
 from ..errors import EngineException, PolicyNotFound, RuleNotFound
 from ..interface import AuthorizationInterface, AuthorizationResponse
+from . import bundle
+from .resources import ResourceSnapshot
 from .settings import OPASettings
 
 SYSTEM_INFOSTAR = Infostar(
@@ -33,21 +40,53 @@ SYSTEM_INFOSTAR = Infostar(
     original=None,
     client_ip="127.0.0.1",
 )
+PACKAGE_PATTERN = re.compile(r"^(\s*package\s+)[\w.]+", re.MULTILINE)
+# Policies are checked under scratch packages: the bundle owns theirs
+CHECK_PACKAGE = "tauth_policy_check"
 
 
 class OPAEngine(AuthorizationInterface):
     def __init__(self, settings: OPASettings):
         self.settings = settings
         logger.debug("Attempting to establish connection with OPA Engine.")
-        self.client = OpaClient(host=settings.HOST, port=settings.PORT)
+        # A single pooled client (thread-safe) keeps connections to OPA alive
+        # across decisions; the UDS transport skips TCP for a local OPA
+        transport = httpx.HTTPTransport(
+            uds=settings.UDS,
+            limits=httpx.Limits(
+                max_connections=settings.MAX_CONNECTIONS,
+                max_keepalive_connections=settings.MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.KEEPALIVE_EXPIRY,
+            ),
+        )
+        self.client = httpx.Client(
+            base_url=f"http://{settings.HOST}:{settings.PORT}/v1",
+            timeout=httpx.Timeout(
+                settings.TIMEOUT, connect=settings.CONNECT_TIMEOUT
+            ),
+            transport=transport,
+        )
+        self._packages: dict[str, tuple[str, frozenset[str]]] = {}
+        self.resources: ResourceSnapshot | None = None
         try:
-            self.client.check_connection()
-        except ConnectionsError as e:
+            self.client.get("/policies").raise_for_status()
+        except httpx.HTTPError as e:
             logger.error(f"Failed to establish connection with OPA: {e}")
-            raise e
+            raise ConnectionsError(
+                "Service unreachable", "Check config and try again"
+            ) from e
         logger.debug("OPA Engine is running.")
 
     def _initialize_db_policies(self):
+        if self.settings.RESOURCE_SNAPSHOT:
+            self.resources = ResourceSnapshot(
+                self.client,
+                alias=Settings.get().REDBABY_ALIAS,
+                interval=self.settings.RESOURCE_SNAPSHOT_INTERVAL,
+            ).start()
+        if self.settings.DISTRIBUTION == "bundle":
+            logger.info("OPA loads the DB policies from the policy bundle.")
+            return
         policies = AuthorizationPolicyDAO.find(
             filter={},
             alias=Settings.get().REDBABY_ALIAS,
@@ -75,6 +114,53 @@ class OPAEngine(AuthorizationInterface):
                     f"Policy {policy_in.name} already exists. Skipping."
                 )
 
+    def _get_package(
+        self, policy_name: str, refresh: bool = False
+    ) -> tuple[str, frozenset[str]]:
+        """Returns the package path and rule names of a policy."""
+        package = self._packages.get(policy_name)
+        if package is None or refresh:
+            policy_id = policy_name
+            if self.settings.DISTRIBUTION == "bundle":
+                policy_id = bundle.policy_id(policy_name)
+            response = self.client.get(f"/policies/{policy_id}")
+            policy = response.json()
+            if response.status_code != s.HTTP_200_OK:
+                raise PolicyNotFoundError(
+                    policy.get("code"), policy.get("message")
+                )
+            ast = policy.get("result", {}).get("ast", {})
+            path = "/".join(
+                p.get("value") for p in ast.get("package", {}).get("path", [])
+            )
+            rules = frozenset(
+                rule.get("head", {}).get("name")
+                for rule in ast.get("rules", [])
+            )
+            package = self._packages[policy_name] = (path, rules)
+        return package
+
+    def _check_permission(
+        self, input_data: bytes, policy_name: str, rule: str
+    ) -> dict:
+        # Policies may have been changed by another worker
+        for refresh in (False, True):
+            package_path, rules = self._get_package(policy_name, refresh)
+            if rule not in rules:
+                continue
+            response = self.client.post(
+                f"/{package_path}/{rule}",
+                content=input_data,
+                headers={"Content-Type": "application/json"},
+            )
+            response.raise_for_status()
+            result = serialization.loads(response.content)
+            if "result" in result or refresh:
+                return result
+        raise CheckPermissionError(
+            rule, f"Rule '{rule}' not found in policy '{policy_name}'"
+        )
+
     def is_authorized(
         self,
         policy_name: str,
@@ -86,10 +172,10 @@ class OPAEngine(AuthorizationInterface):
         if context:
             opa_context |= context
         try:
-            opa_result = self.client.check_permission(
-                input_data=opa_context,
+            opa_result = self._check_permission(
+                input_data=serialization.dumps(dict(input=opa_context)),
                 policy_name=policy_name,
-                rule_name=rule,
+                rule=rule,
             )
         except Exception as e:
             logger.error(f"Error in OPA: {e}")
@@ -118,27 +204,82 @@ class OPAEngine(AuthorizationInterface):
         self, policy_name: str, policy_content: str, **_
     ) -> bool:
         logger.debug(f"Upserting policy {policy_name!r} in OPA.")
-        try:
-            result = self.client.update_policy_from_string(
-                policy_content,
-                policy_name,
-            )
-        except RegoParseError as e:
+        self._packages.pop(policy_name, None)
+        if self.settings.DISTRIBUTION == "bundle":
+            # OPA activates it with the next bundle revision, which it would
+            # reject as a whole if this policy did not compile
+            self._check_policy(policy_content)
+            return True
+        response = self.client.put(
+            f"/policies/{policy_name}",
+            content=policy_content.encode(),
+            headers={"Content-Type": "text/plain"},
+        )
+        if response.status_code != s.HTTP_200_OK:
+            error = response.json()
+            e = RegoParseError(error.get("code"), error.get("message"))
             logger.error(f"Failed to upsert policy in OPA: {e}")
             raise e
-
-        if not result:
-            logger.error(f"Failed to upsert policy in OPA: {result}")
-        return result
+        return True
 
     def delete_policy(self, policy_name: str) -> bool:
         logger.debug(f"Deleting policy: {policy_name}.")
-        try:
-            result = self.client.delete_policy(policy_name)
-        except DeletePolicyError as e:
+        self._packages.pop(policy_name, None)
+        if self.settings.DISTRIBUTION == "bundle":
+            self._check_dependents(policy_name)
+            return True
+        response = self.client.delete(f"/policies/{policy_name}")
+        if response.status_code != s.HTTP_200_OK:
+            error = response.json()
+            e = DeletePolicyError(error.get("code"), error.get("message"))
             logger.error(f"Failed to delete policy in OPA: {e}")
             raise e
+        return True
+
+    def _check_policy(self, policy_content: str) -> None:
+        """Compiles a policy in OPA, along with the active bundle."""
+        check_id = uuid4().hex
+        content = PACKAGE_PATTERN.sub(
+            rf"\g<1>{CHECK_PACKAGE}.p{check_id}", policy_content, count=1
+        )
+        response = self.client.put(
+            f"/policies/{CHECK_PACKAGE}/{check_id}",
+            content=content.encode(),
+            headers={"Content-Type": "text/plain"},
+        )
+        if response.status_code != s.HTTP_200_OK:
+            error = response.json()
+            e = RegoParseError(error.get("code"), error.get("message"))
+            logger.error(f"Failed to compile policy in OPA: {e}")
+            raise e
+        self.client.delete(f"/policies/{CHECK_PACKAGE}/{check_id}")
 
-        if not result:
-            logger.error(f"Failed to upsert policy in OPA: {result}")
-        return result
+    def _check_dependents(self, policy_name: str) -> None:
+        """
+        Refuses to delete a policy others depend on, as OPA does in "api"
+        distribution (the bundle would no longer compile).
+        """
+        analyses = {
+            p["name"]: PolicyAnalysis(p["name"], p["policy"])
+            for p in AuthorizationPolicyDAO.collection(
+                alias=Settings.get().REDBABY_ALIAS
+            ).find({}, projection={"name": 1, "policy": 1})
+        }
+        deleted = analyses.pop(policy_name, None)
+        if deleted is None or any(
+            other.package == deleted.package for other in analyses.values()
+        ):
+            # Other modules still define the package
+            return
+        dependents = sorted(
+            name
+            for name, other in analyses.items()
+            if other.depends_on(deleted.package)
+        )
+        if dependents:
+            e = DeletePolicyError(
+                "rego_compile_error",
+                f"Package {deleted.package!r} is used by: {dependents}",
+            )
+            logger.error(f"Failed to delete policy in OPA: {e}")
+            raise e
@@ -0,0 +1,172 @@
+"""
+Snapshot of the `resources` collection kept in OPA's data.
+
+Policies read `data.tauth_resources` instead of calling `mongodb.query` at
+decision time:
+
+- `synced`: true once the snapshot has been loaded.
+- `by_id[id]`: each resource.
+- `by_key[collection][alias][identifier][id]`: resources with a
+  `metadata.alias`, for lookups by identifier.
+
+The snapshot is loaded in full on startup and then kept up to date from a
+MongoDB change stream, writing only the documents that changed. Writes are
+idempotent, so every worker can keep its own watcher. Without change streams
+(they need a replica set), the snapshot is reloaded periodically instead.
+"""
+
+import time
+from threading import Thread
+from urllib.parse import quote
+
+import httpx
+from loguru import logger
+from pymongo.errors import OperationFailure, PyMongoError
+
+from ....resource_management.resources.models import ResourceDAO
+from ....utils import serialization
+
+DATA_ROOT = "tauth_resources"
+FIELDS = (
+    "service_ref",
+    "resource_collection",
+    "resource_identifier",
+    "metadata",
+)
+# "$changeStream is only supported on replica sets"
+CHANGE_STREAMS_UNSUPPORTED = 40573
+
+
+def to_document(resource: dict) -> dict:
+    document = {"_id": resource["_id"]} | {
+        field: resource.get(field) for field in FIELDS
+    }
+    return serialization.loads(serialization.dumps(document))
+
+
+def key_path(document: dict) -> tuple[str, ...] | None:
+    alias = (document.get("metadata") or {}).get("alias")
+    collection = document.get("resource_collection")
+    identifier = document.get("resource_identifier")
+    segments = (collection, alias, identifier)
+    if not all(isinstance(s, str) and s for s in segments):
+        return None
+    return ("by_key", *segments, document["_id"])
+
+
+class ResourceSnapshot:
+    def __init__(self, client: httpx.Client, alias: str, interval: int):
+        self.client = client
+        self.alias = alias
+        self.interval = interval
+        # Where each resource is indexed by key, to remove it on changes
+        self._key_paths: dict[str, tuple[str, ...] | None] = {}
+
+    def start(self) -> "ResourceSnapshot":
+        Thread(
+            target=self._run, name="opa-resource-snapshot", daemon=True
+        ).start()
+        return self
+
+    def load(self):
+        collection = ResourceDAO.collection(alias=self.alias)
+        projection = dict.fromkeys(FIELDS, 1)
+        data: dict = {"synced": True, "by_id": {}, "by_key": {}}
+        key_paths = {}
+        for resource in collection.find({}, projection=projection):
+            document = to_document(resource)
+            data["by_id"][document["_id"]] = document
+            path = key_paths[document["_id"]] = key_path(document)
+            if path is not None:
+                node = data
+                for segment in path[:-1]:
+                    node = node.setdefault(segment, {})
+                node[path[-1]] = document
+        self._put((), data)
+        self._key_paths = key_paths
+        logger.info(f"Loaded {len(key_paths)} resources into OPA data.")
+
+    def apply(self, change: dict):
+        operation = change["operationType"]
+        if operation not in ("insert", "replace", "update", "delete"):
+            # drop, rename, invalidate, ...: start over
+            raise PyMongoError(f"Unexpected change stream event: {operation}")
+        id = str(change["documentKey"]["_id"])
+        document = change.get("fullDocument")
+        previous = self._key_paths.pop(id, None)
+        if document is None:
+            # Deleted (possibly after an update, when looked up)
+            self._delete(("by_id", id))
+            if previous is not None:
+                self._delete(previous)
+            return
+        document = to_document(document)
+        path = self._key_paths[id] = key_path(document)
+        if previous is not None and previous != path:
+            self._delete(previous)
+        self._put(("by_id", id), document)
+        if path is not None:
+            self._put(path, document)
+
+    def _run(self):
+        collection = ResourceDAO.collection(alias=self.alias)
+        while True:
+            try:
+                # Opened before loading, so no change is missed in between
+                with collection.watch(full_document="updateLookup") as stream:
+                    self.load()
+                    for change in stream:
+                        logger.debug(
+                            f"Resource change: {change['operationType']}"
+                        )
+                        self.apply(change)
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAMS_UNSUPPORTED:
+                    logger.warning(
+                        "Change streams are not available, reloading "
+                        f"resources every {self.interval}s."
+                    )
+                    return self._poll()
+                logger.error(f"Resource snapshot failed: {e}")
+            except (PyMongoError, httpx.HTTPError) as e:
+                logger.error(f"Resource snapshot failed: {e}")
+            except Exception:
+                logger.exception("Resource snapshot failed.")
+            # Until reloaded, policies fall back to querying MongoDB
+            self._unsync()
+            time.sleep(self.interval)
+
+    def _poll(self):
+        while True:
+            try:
+                self.load()
+            except (PyMongoError, httpx.HTTPError) as e:
+                logger.error(f"Failed to reload resources: {e}")
+                self._unsync()
+            except Exception:
+                logger.exception("Failed to reload resources.")
+                self._unsync()
+            time.sleep(self.interval)
+
+    def _unsync(self):
+        try:
+            self._put(("synced",), False)
+        except httpx.HTTPError as e:
+            logger.error(f"Failed to mark resources as not synced: {e}")
+
+    def _url(self, path: tuple[str, ...]) -> str:
+        segments = (DATA_ROOT, *path)
+        return "/data/" + "/".join(quote(s, safe="") for s in segments)
+
+    def _put(self, path: tuple[str, ...], value: dict | bool):
+        # OPA creates any missing parent documents
+        self.client.put(
+            self._url(path),
+            content=serialization.dumps(value),
+            headers={"Content-Type": "application/json"},
+        ).raise_for_status()
+
+    def _delete(self, path: tuple[str, ...]):
+        response = self.client.delete(self._url(path))
+        if response.status_code != httpx.codes.NOT_FOUND:
+            response.raise_for_status()
@@ -1,9 +1,27 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class OPASettings(BaseSettings):
     HOST: str = "localhost"
     PORT: int = 8181
+    # Unix domain socket OPA listens on (`--addr=unix://...`), if any
+    UDS: str | None = None
+    TIMEOUT: float = 1.5
+    CONNECT_TIMEOUT: float = 1.5
+    MAX_CONNECTIONS: int = 100
+    MAX_KEEPALIVE_CONNECTIONS: int = 20
+    KEEPALIVE_EXPIRY: float = 30.0
+    # "api" pushes each policy to OPA, "bundle" has OPA poll TAuth for them
+    DISTRIBUTION: Literal["api", "bundle"] = "api"
+    BUNDLE_SERVICE_URL: str = "http://localhost:5000"
+    BUNDLE_SIGNING_KEY: str | None = None
+    BUNDLE_POLLING_MIN_DELAY: int = 5
+    BUNDLE_POLLING_MAX_DELAY: int = 10
+    # Mirror the resources collection into OPA data (`data.tauth_resources`)
+    RESOURCE_SNAPSHOT: bool = False
+    RESOURCE_SNAPSHOT_INTERVAL: int = 30
 
     model_config = SettingsConfigDict(
         extra="ignore",
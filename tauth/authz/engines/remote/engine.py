@@ -1,26 +1,51 @@
+import hashlib
+from threading import Lock
+
 import httpx
+import orjson
+from cachetools import TTLCache
 from fastapi import status as s
 from loguru import logger
 
 from tauth.authz.policies.schemas import ResourceAuthorizationRequest
 
+from ....utils import serialization
 from ..interface import AuthorizationInterface, AuthorizationResponse
 from .settings import RemoteSettings
 
+# Token hash, policy name, rule and hash of the context and impersonation
+DecisionKey = tuple[str, str, str, str]
+
 
 class RemoteEngine(AuthorizationInterface):
     def __init__(self, settings: RemoteSettings):
         self.settings = settings
-        self.client = httpx.Client(base_url=self.settings.API_URL)
-        logger.debug("Establishing connection with remote AuthZ engine.")
-        try:
-            self.client.get("/")
-        except Exception as e:
-            logger.error(
-                f"Failed to establish connection with remote AuthZ engine: {e}"
+        limits = httpx.Limits(
+            max_connections=settings.MAX_CONNECTIONS,
+            max_keepalive_connections=settings.MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.KEEPALIVE_EXPIRY,
+        )
+        timeout = httpx.Timeout(
+            settings.TIMEOUT, connect=settings.CONNECT_TIMEOUT
+        )
+        # Connections are opened on first use, not at startup
+        self.client = httpx.Client(
+            base_url=settings.API_URL, limits=limits, timeout=timeout
+        )
+        self.async_client = httpx.AsyncClient(
+            base_url=settings.API_URL, limits=limits, timeout=timeout
+        )
+        self._allowed: TTLCache[DecisionKey, AuthorizationResponse] | None
+        self._denied: TTLCache[DecisionKey, AuthorizationResponse] | None
+        self._allowed = self._denied = None
+        if settings.CACHE_TTL > 0:
+            self._allowed = TTLCache(settings.CACHE_SIZE, settings.CACHE_TTL)
+        if settings.NEGATIVE_CACHE_TTL > 0:
+            self._denied = TTLCache(
+                settings.CACHE_SIZE, settings.NEGATIVE_CACHE_TTL
             )
-            raise e
-        logger.debug("Remote AuthZ engine is running.")
+        self._cache_lock = Lock()
+        logger.debug(f"Using remote AuthZ engine at {settings.API_URL}.")
 
     @staticmethod
     def _get_authorization_header(access_token: str) -> str:
@@ -38,7 +63,45 @@ class RemoteEngine(AuthorizationInterface):
         **kwargs,
     ) -> AuthorizationResponse:
         logger.debug(f"Authorizing user using policy {policy_name}")
+        headers, content = self._build_request(
+            policy_name, rule, access_token, context, user_email, **kwargs
+        )
+        key = self._cache_key(policy_name, rule, headers, content)
+        if (cached := self._get_cached(key)) is not None:
+            return cached
+        response = self.client.post("/authz", headers=headers, content=content)
+        return self._parse(policy_name, response, key)
+
+    async def is_authorized_async(
+        self,
+        policy_name: str,
+        rule: str,
+        access_token: str,
+        context: dict | None = None,
+        user_email: str | None = None,
+        **kwargs,
+    ) -> AuthorizationResponse:
+        logger.debug(f"Authorizing user using policy {policy_name}")
+        headers, content = self._build_request(
+            policy_name, rule, access_token, context, user_email, **kwargs
+        )
+        key = self._cache_key(policy_name, rule, headers, content)
+        if (cached := self._get_cached(key)) is not None:
+            return cached
+        response = await self.async_client.post(
+            "/authz", headers=headers, content=content
+        )
+        return self._parse(policy_name, response, key)
 
+    def _build_request(
+        self,
+        policy_name: str,
+        rule: str,
+        access_token: str,
+        context: dict | None,
+        user_email: str | None,
+        **kwargs,
+    ) -> tuple[dict[str, str], bytes]:
         headers = {
             "Authorization": self._get_authorization_header(access_token),
             "X-User-Email": user_email,
@@ -60,7 +123,7 @@ class RemoteEngine(AuthorizationInterface):
             pass
         else:
             if isinstance(resources, ResourceAuthorizationRequest):
-                body["resources"] = resources.model_dump(mode="json")
+                body["resources"] = resources.model_dump()
             elif isinstance(resources, dict):
                 body["resources"] = resources
             else:
@@ -70,19 +133,68 @@ class RemoteEngine(AuthorizationInterface):
                     f"Resources should be either {cls_path} or a dictionary."
                 )
         body = {k: v for k, v in body.items() if v is not None}
-        response = self.client.post("/authz", headers=headers, json=body)
-        if response.status_code != s.HTTP_200_OK:
-            logger.warning(f"Authorization failed using policy {policy_name}")
-            return AuthorizationResponse(
-                authorized=False,
-                details=response.json(),
-            )
-        logger.debug(f"Authorization raw response: {response.json()}")
-        res = AuthorizationResponse(**response.json())
+        headers["Content-Type"] = "application/json"
+        # Sorted, so that equal contexts give equal cache keys
+        content = serialization.dumps(body, option=orjson.OPT_SORT_KEYS)
+        return headers, content
+
+    def _cache_key(
+        self,
+        policy_name: str,
+        rule: str,
+        headers: dict[str, str],
+        content: bytes,
+    ) -> DecisionKey | None:
+        if self._allowed is None and self._denied is None:
+            return None
+        token = hashlib.sha256(headers["Authorization"].encode()).hexdigest()
+        # Impersonation headers change the decision as much as the context
+        digest = hashlib.sha256(content)
+        for name in sorted(headers):
+            if name.startswith("X-"):
+                digest.update(f"\n{name}: {headers[name]}".encode())
+        return token, policy_name, rule, digest.hexdigest()
+
+    def _get_cached(
+        self, key: DecisionKey | None
+    ) -> AuthorizationResponse | None:
+        if key is None:
+            return None
+        with self._cache_lock:
+            for cache in (self._allowed, self._denied):
+                if cache is None:
+                    continue
+                result = cache.get(key)
+                if result is not None:
+                    logger.debug("Using cached authorization decision.")
+                    return result
+        return None
+
+    def _parse(
+        self,
+        policy_name: str,
+        response: httpx.Response,
+        key: DecisionKey | None,
+    ) -> AuthorizationResponse:
+        details = serialization.loads(response.content)
+        if response.status_code == s.HTTP_200_OK:
+            logger.debug(f"Authorization raw response: {details}")
+            res = AuthorizationResponse(**details)
+        else:
+            res = AuthorizationResponse(authorized=False, details=details)
         if not res.authorized:
             logger.warning(f"Authorization failed using policy {policy_name}")
         else:
             logger.debug(f"Authorization succeeded using policy {policy_name}")
+        # Only actual decisions are cached, not errors (e.g., invalid tokens)
+        if key is not None and response.status_code in (
+            s.HTTP_200_OK,
+            s.HTTP_403_FORBIDDEN,
+        ):
+            cache = self._allowed if res.authorized else self._denied
+            if cache is not None:
+                with self._cache_lock:
+                    cache[key] = res
         return res
 
     def upsert_policy(
@@ -3,6 +3,15 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class RemoteSettings(BaseSettings):
     API_URL: str
+    TIMEOUT: float = 5.0
+    CONNECT_TIMEOUT: float = 2.0
+    MAX_CONNECTIONS: int = 100
+    MAX_KEEPALIVE_CONNECTIONS: int = 20
+    KEEPALIVE_EXPIRY: float = 30.0
+    # Seconds to reuse allowed and denied decisions for (0 disables caching)
+    CACHE_TTL: float = 0
+    NEGATIVE_CACHE_TTL: float = 0
+    CACHE_SIZE: int = 4096
 
     model_config = SettingsConfigDict(
         extra="ignore",
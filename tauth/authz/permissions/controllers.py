@@ -11,6 +11,7 @@ from tauth.schemas.gen_fields import GeneratedFields
 from tauth.schemas.infostar import Infostar
 
 from ...settings import Settings
+from ...utils import identity_map
 from ..roles.models import RoleDAO
 from .models import PermissionDAO, PermissionType
 from .schemas import PermissionContext, PermissionIn, PermissionIntermediate
@@ -19,9 +20,17 @@ from .schemas import PermissionContext, PermissionIn, PermissionIntermediate
 def read_permissions_from_roles(
     roles: Iterable[PyObjectId],
 ) -> dict[PyObjectId, list[PermissionContext]]:
+    return identity_map.get_many_or_load(
+        "authz-roles.permissions", roles, _aggregate_permissions_from_roles
+    )
+
+
+def _aggregate_permissions_from_roles(
+    roles: list[PyObjectId],
+) -> dict[PyObjectId, list[PermissionContext]]:
 
     pipeline = [
-        {"$match": {"_id": {"$in": list(roles)}}},
+        {"$match": {"_id": {"$in": roles}}},
         {
             "$lookup": {
                 "from": "authz-permissions",
@@ -66,22 +75,23 @@ def read_many_permissions(
     type: PermissionType | None = None,
     entity_ref: EntityRef | None = None,
 ) -> set[PermissionContext]:
-
-    permission_coll = PermissionDAO.collection(
-        alias=Settings.get().REDBABY_ALIAS
-    )
-    filters: dict = {"_id": {"$in": list(perms)}}
-    if type:
-        filters["type"] = type
-    if entity_ref:
-        filters["entity_ref.handle"] = entity_ref.handle
-        if entity_ref.owner_handle:
-            filters["entity_ref.owner_handle"] = entity_ref.owner_handle
-
-    permissions = permission_coll.find(filters)
+    # Documents are cached by ID, so the type and entity filters are applied
+    # in memory instead of being pushed down to the query.
+    permissions = read_permissions_by_id(perms)
 
     s = set()
-    for p in permissions:
+    for p in permissions.values():
+        if type and p.get("type") != type:
+            continue
+        if entity_ref:
+            if p["entity_ref"]["handle"] != entity_ref.handle:
+                continue
+            if (
+                entity_ref.owner_handle
+                and p["entity_ref"].get("owner_handle")
+                != entity_ref.owner_handle
+            ):
+                continue
         s.add(
             PermissionContext(
                 name=p["name"],
@@ -92,6 +102,23 @@ def read_many_permissions(
     return s
 
 
+def read_permissions_by_id(
+    perms: Iterable[PyObjectId],
+) -> dict[PyObjectId, dict]:
+    """Permission documents by ID, read with a single query."""
+    return identity_map.get_many_or_load(
+        PermissionDAO.collection_name(), perms, _find_permissions
+    )
+
+
+def _find_permissions(perms: list[PyObjectId]) -> dict[PyObjectId, dict]:
+    permission_coll = PermissionDAO.collection(
+        alias=Settings.get().REDBABY_ALIAS
+    )
+    permissions = permission_coll.find({"_id": {"$in": perms}})
+    return {p["_id"]: p for p in permissions}
+
+
 def upsert_permission(permission_in: PermissionIn, infostar: Infostar):
     entity_ref = EntityDAO.from_handle_to_ref(
         permission_in.entity_ref.handle,
@@ -11,8 +11,10 @@ from fastapi import (
     HTTPException,
     Query,
     Request,
+    Response,
 )
 from fastapi import status as s
+from fastapi.responses import StreamingResponse
 from loguru import logger
 from redbaby.pyobjectid import PyObjectId
 
@@ -62,6 +64,27 @@ async def create_one(
     return GeneratedFields(**permission.model_dump(by_alias=True))
 
 
+# Declared before `/{permission_id}`, which would match it
+@router.get("/$export", status_code=s.HTTP_200_OK)
+async def export(
+    infostar: Infostar = Depends(privileges.is_valid_user),
+    entity_handle: str | None = Query(None),
+    fields: str | None = Query(
+        None, description="Comma-separated fields to export (all by default)."
+    ),
+):
+    """Streams all matching permissions as newline-delimited JSON."""
+    return StreamingResponse(
+        reading.export(
+            infostar=infostar,
+            model=PermissionDAO,
+            fields=reading.parse_fields(fields),
+            **{"entity_ref.handle": entity_handle},
+        ),
+        media_type=reading.NDJSON_MEDIA_TYPE,
+    )
+
+
 @router.get("/{permission_id}", status_code=s.HTTP_200_OK)
 @router.get(
     "/{permission_id}/", status_code=s.HTTP_200_OK, include_in_schema=False
@@ -83,18 +106,30 @@ async def read_one(
 @router.get("/", status_code=s.HTTP_200_OK, include_in_schema=False)
 async def read_many(
     request: Request,
+    response: Response,
     infostar: Infostar = Depends(privileges.is_valid_user),
     name: str | None = Query(None),
     ends_with: str | None = Query(None),
     entity_handle: str | None = Query(None),
     offset: int = Query(0, ge=0),
     limit: int = Query(1024, gt=0, le=1024),
+    cursor: str | None = Query(
+        None,
+        description=(
+            "`X-Next-Cursor` of the previous page, or empty to start paging "
+            "by cursor."
+        ),
+    ),
+    fields: str | None = Query(
+        None, description="Comma-separated fields to return (all by default)."
+    ),
 ):
     logger.debug(f"Reading permissions with filters: {request.query_params}")
     # Decode the URL-encoded query parameters
     decoded_query_params = {
         key: unquote(value) if isinstance(value, str) else value
         for key, value in request.query_params.items()
+        if key not in ("limit", "offset", "cursor", "fields")
     }
     if name:
         decoded_query_params["name"] = {  # type: ignore
@@ -113,8 +148,13 @@ async def read_many(
     permissions = reading.read_many(
         infostar=infostar,
         model=PermissionDAO,
+        limit=limit,
+        offset=offset,
+        cursor=cursor,
+        fields=reading.parse_fields(fields),
         **decoded_query_params,
     )
+    reading.set_next_cursor(response, permissions, limit, cursor)
     return permissions
 
 
@@ -1,3 +1,5 @@
+from typing import cast
+
 from fastapi import HTTPException
 from fastapi import status as s
 from loguru import logger
@@ -7,31 +9,19 @@ from ...schemas.gen_fields import GeneratedFields
 from ...settings import Settings
 from ...utils import reading
 from ..engines.factory import AuthorizationEngine
+from ..engines.opa import bundle
+from ..engines.opa.settings import OPASettings
 from ..policies.models import AuthorizationPolicyDAO
 from ..policies.schemas import AuthorizationPolicyIn
+from .projection import PolicyInputProjections
 
 
 def upsert_one(
     body: AuthorizationPolicyIn,
     infostar: Infostar,
 ) -> GeneratedFields:
-    # Insert policy in TAuth's database
-    logger.debug("Inserting policy in TAuth.")
-    policy_col = AuthorizationPolicyDAO.collection(
-        alias=Settings.get().REDBABY_ALIAS
-    )
-    policy_content = body.model_dump(by_alias=True) | {
-        "created_by": infostar.model_dump()
-    }
-    result = policy_col.update_one(
-        {"name": body.name},
-        {"$set": policy_content},
-        upsert=True,
-    )
-    logger.debug(f"Policy upsert result: {result}.")
-    policy = AuthorizationPolicyDAO(**policy_content)
-
-    # Insert policy in authorization provider
+    # Insert policy in authorization provider first: it is only stored if
+    # it compiles (OPA bundles are built from the stored policies)
     logger.debug("Inserting policy in AuthZ provider.")
     authz_engine = AuthorizationEngine.get()
     try:
@@ -50,17 +40,31 @@ def upsert_one(
         )
     if not result:
         logger.debug("Failed to create policy in authorization engine.")
-        authz_policy_col = AuthorizationPolicyDAO.collection()
-        result = authz_policy_col.delete_one({"name": body.name})
-        logger.debug(f"Deleted objects from TAuth DB: {result.deleted_count}.")
         raise HTTPException(
             status_code=s.HTTP_400_BAD_REQUEST,
             detail=dict(
                 msg=f"Failed to create policy {body.name!r} in engine."
             ),
         )
-
     logger.debug("Inserted policy in authorization engine.")
+
+    # Insert policy in TAuth's database
+    logger.debug("Inserting policy in TAuth.")
+    policy_col = AuthorizationPolicyDAO.collection(
+        alias=Settings.get().REDBABY_ALIAS
+    )
+    policy_content = body.model_dump(by_alias=True) | {
+        "created_by": infostar.model_dump()
+    }
+    result = policy_col.update_one(
+        {"name": body.name},
+        {"$set": policy_content},
+        upsert=True,
+    )
+    logger.debug(f"Policy upsert result: {result}.")
+    policy = AuthorizationPolicyDAO(**policy_content)
+
+    PolicyInputProjections.register(body.name, body.policy)
     return GeneratedFields(**policy.model_dump(by_alias=True))
 
 
@@ -88,6 +92,20 @@ def read_many(
     return policy
 
 
+def read_bundle() -> bundle.Bundle:
+    settings = Settings.get()
+    if settings.AUTHZ_ENGINE == "opa":
+        opa_settings = cast(OPASettings, settings.AUTHZ_ENGINE_SETTINGS)
+        if opa_settings.DISTRIBUTION == "bundle":
+            return bundle.PolicyBundle.get(
+                settings.REDBABY_ALIAS, opa_settings
+            )
+    raise HTTPException(
+        status_code=s.HTTP_404_NOT_FOUND,
+        detail=dict(msg="Policies are not distributed as a bundle."),
+    )
+
+
 def delete_one(id: str) -> None:
     logger.debug("Deleting policy from TAuth.")
     policy = reading.read_one(
@@ -95,12 +113,9 @@ def delete_one(id: str) -> None:
         model=AuthorizationPolicyDAO,
         identifier=id,
     )
-    policy_col = AuthorizationPolicyDAO.collection(
-        alias=Settings.get().REDBABY_ALIAS
-    )
-    result = policy_col.delete_one({"name": policy.name})
-    logger.debug(f"Deleted objects from TAuth DB: {result.deleted_count}.")
 
+    # Deleted from the authorization provider first: it refuses to delete
+    # policies others depend on
     logger.debug("Deleting policy from AuthZ provider.")
     authz_engine = AuthorizationEngine.get()
     try:
@@ -125,3 +140,10 @@ def delete_one(id: str) -> None:
             ),
         )
     logger.debug("Deleted policy from authorization engine.")
+
+    policy_col = AuthorizationPolicyDAO.collection(
+        alias=Settings.get().REDBABY_ALIAS
+    )
+    result = policy_col.delete_one({"name": policy.name})
+    logger.debug(f"Deleted objects from TAuth DB: {result.deleted_count}.")
+    PolicyInputProjections.unregister(policy.name)
@@ -0,0 +1,275 @@
+"""
+Static analysis of Rego policies to project the input sent to the engine.
+
+Every `input.*` reference in a policy (and in the tauth policies it depends
+on through `data.*` references) is collected into a tree of paths. The
+authorization controller uses that tree to build only the parts of the input
+a policy can actually read. Policies with `data` references that can't be
+resolved statically (e.g., `data[x]`) get the full input.
+"""
+
+import re
+import time
+from collections.abc import Iterable
+from threading import Lock, Thread
+from typing import Any, Literal
+
+from loguru import logger
+from pymongo.errors import PyMongoError
+
+from ...settings import Settings
+from .models import AuthorizationPolicyDAO
+
+# True means "the whole subtree is referenced"
+InputTree = dict[str, "InputTree"] | Literal[True]
+
+PACKAGE_PATTERN = re.compile(r"^\s*package\s+([\w.]+)", re.MULTILINE)
+# Static segments, then whether a dynamic key (e.g., `data.x[y]`) follows;
+# fields named `data` (e.g., `resource.data`) are not references
+DATA_REF_PATTERN = re.compile(
+    r"""(?<![.\w])data\b"""
+    r"""((?:\s*\.\s*[A-Za-z_]\w*|\s*\[\s*"(?:[^"\\]|\\.)*"\s*\])*)(\s*\[)?"""
+)
+INPUT_REF_PATTERN = re.compile(
+    r"""\binput((?:\s*\.\s*[A-Za-z_]\w*|\s*\[\s*"(?:[^"\\]|\\.)*"\s*\])*)"""
+)
+REF_SEGMENT_PATTERN = re.compile(
+    r"""\.\s*([A-Za-z_]\w*)|\[\s*"((?:[^"\\]|\\.)*)"\s*\]"""
+)
+
+
+def strip_comments(policy: str) -> str:
+    lines = []
+    for line in policy.splitlines():
+        in_string = False
+        for i, char in enumerate(line):
+            if char == '"' and (i == 0 or line[i - 1] != "\\"):
+                in_string = not in_string
+            elif char == "#" and not in_string:
+                line = line[:i]
+                break
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def merge_path(tree: InputTree, path: Iterable[str]) -> InputTree:
+    """Adds `path` to `tree`; shorter paths absorb longer ones."""
+    if tree is True:
+        return True
+    path = list(path)
+    if not path:
+        return True
+    node: dict[str, Any] = tree
+    for key in path[:-1]:
+        child = node.get(key)
+        if child is True:
+            return tree
+        if child is None:
+            child = node[key] = {}
+        node = child
+    node[path[-1]] = True
+    return tree
+
+
+def merge_trees(tree: InputTree, other: InputTree) -> InputTree:
+    if tree is True or other is True:
+        return True
+    for key, value in other.items():
+        if value is True:
+            tree[key] = True
+        elif key not in tree:
+            tree[key] = merge_trees({}, value)
+        elif tree[key] is not True:
+            tree[key] = merge_trees(tree[key], value)
+    return tree
+
+
+class PolicyAnalysis:
+    def __init__(self, name: str, policy: str):
+        self.name = name
+        source = strip_comments(policy)
+        match = PACKAGE_PATTERN.search(source)
+        self.package = match.group(1) if match else ""
+        self.data_refs: set[str] = set()
+        # Whether some `data` reference may reach any package
+        self.dynamic_data = False
+        for m in DATA_REF_PATTERN.finditer(source):
+            path = ref_path(m.group(1))
+            if not path or m.group(2):
+                self.dynamic_data = True
+            else:
+                self.data_refs.add(".".join(path))
+        self.input_refs: InputTree = {}
+        for m in INPUT_REF_PATTERN.finditer(source):
+            path = ref_path(m.group(1))
+            # Dynamic keys (e.g., `input.permissions[i]`) and bare `input`
+            # references need the whole subtree
+            self.input_refs = merge_path(self.input_refs, path)
+
+    def depends_on(self, package: str) -> bool:
+        # Refs may name a rule in the package, or a prefix of it (e.g.,
+        # `import data.tauth` and then `tauth.utils.check_permission`)
+        return any(
+            ref == package
+            or ref.startswith(f"{package}.")
+            or package.startswith(f"{ref}.")
+            for ref in self.data_refs
+        )
+
+
+def ref_path(segments: str) -> list[str]:
+    return [
+        segment.group(1) or segment.group(2)
+        for segment in REF_SEGMENT_PATTERN.finditer(segments)
+    ]
+
+
+class InputProjection:
+    """Subset of the authorization input referenced by a policy."""
+
+    def __init__(self, tree: InputTree):
+        self.tree = tree
+
+    @property
+    def is_full(self) -> bool:
+        return self.tree is True
+
+    def includes(self, key: str) -> bool:
+        return self.tree is True or key in self.tree
+
+    def subtree(self, key: str) -> InputTree:
+        if self.tree is True:
+            return True
+        return self.tree.get(key, {})
+
+    def sections(self, key: str) -> list[str] | None:
+        """Referenced keys under `key`; `None` means all of them."""
+        subtree = self.subtree(key)
+        return None if subtree is True else list(subtree)
+
+    def include(self, key: str) -> Any:
+        """Pydantic `include` specification for the model under `key`."""
+        subtree = self.subtree(key)
+        return None if subtree is True else subtree
+
+    def prune(self, key: str, value: Any) -> Any:
+        return prune(value, self.subtree(key))
+
+
+def prune(value: Any, tree: InputTree) -> Any:
+    if tree is True or not isinstance(value, dict):
+        return value
+    return {k: prune(value[k], sub) for k, sub in tree.items() if k in value}
+
+
+FULL_PROJECTION = InputProjection(True)
+
+
+class PolicyInputProjections:
+    """
+    Registry of analyzed policies, kept in sync with `AuthorizationPolicyDAO`.
+
+    Policies are updated in-process on upsert/delete and reloaded from the
+    database periodically by a background thread (see `start`), so workers
+    pick up changes made by other workers. Until the first reload, policies
+    not registered in-process get the full input.
+    """
+
+    _policies: dict[str, PolicyAnalysis] = {}
+    _projections: dict[str, InputProjection] = {}
+    _thread: Thread | None = None
+    _lock = Lock()
+
+    @classmethod
+    def start(cls) -> None:
+        settings = Settings.get()
+        if (
+            not settings.AUTHZ_INPUT_PROJECTION
+            or settings.AUTHZ_ENGINE == "remote"
+        ):
+            return
+        with cls._lock:
+            if cls._thread is None:
+                cls._thread = Thread(
+                    target=cls._run, name="policy-projections", daemon=True
+                )
+                cls._thread.start()
+
+    @classmethod
+    def register(cls, name: str, policy: str) -> None:
+        with cls._lock:
+            analysis = PolicyAnalysis(name, policy)
+            cls._policies = cls._policies | {name: analysis}
+            cls._projections = {}
+
+    @classmethod
+    def unregister(cls, name: str) -> None:
+        with cls._lock:
+            cls._policies = {
+                k: v for k, v in cls._policies.items() if k != name
+            }
+            cls._projections = {}
+
+    @classmethod
+    def reload(cls) -> None:
+        policies = AuthorizationPolicyDAO.collection(
+            alias=Settings.get().REDBABY_ALIAS
+        ).find({}, projection={"name": 1, "policy": 1})
+        analyses = {
+            p["name"]: PolicyAnalysis(p["name"], p["policy"]) for p in policies
+        }
+        with cls._lock:
+            cls._policies = analyses
+            cls._projections = {}
+        logger.debug(f"Analyzed input references of {len(analyses)} policies.")
+
+    @classmethod
+    def get(cls, name: str) -> InputProjection:
+        settings = Settings.get()
+        # Remote engines evaluate policies this instance does not store
+        if (
+            not settings.AUTHZ_INPUT_PROJECTION
+            or settings.AUTHZ_ENGINE == "remote"
+        ):
+            return FULL_PROJECTION
+        # Taken first: projections built from replaced policies are dropped
+        projections = cls._projections
+        projection = projections.get(name)
+        if projection is None:
+            projection = projections[name] = cls._build(name)
+        return projection
+
+    @classmethod
+    def _run(cls) -> None:
+        while True:
+            try:
+                cls.reload()
+            except PyMongoError as e:
+                logger.error(f"Failed to reload policy projections: {e}")
+            time.sleep(Settings.get().AUTHZ_INPUT_PROJECTION_REFRESH)
+
+    @classmethod
+    def _build(cls, name: str) -> InputProjection:
+        policies = cls._policies
+        if name not in policies:
+            # Unknown policies (e.g., loaded directly into the engine)
+            return FULL_PROJECTION
+        tree: InputTree = {}
+        pending, visited = [policies[name]], set()
+        while pending:
+            analysis = pending.pop()
+            if analysis.name in visited:
+                continue
+            if analysis.dynamic_data:
+                return FULL_PROJECTION
+            visited.add(analysis.name)
+            tree = merge_trees(tree, analysis.input_refs)
+            for other in policies.values():
+                if other.name in visited:
+                    continue
+                # Modules sharing a package contribute rules to each other
+                if other.package == analysis.package or analysis.depends_on(
+                    other.package
+                ):
+                    pending.append(other)
+        return InputProjection(tree)
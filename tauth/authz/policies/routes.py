@@ -1,6 +1,6 @@
 from pathlib import Path
 
-from fastapi import APIRouter, Body, Depends, Query, Request
+from fastapi import APIRouter, Body, Depends, Header, Query, Request, Response
 from fastapi import status as s
 
 from ...authz import privileges
@@ -28,6 +28,25 @@ async def upsert_one(
     return result
 
 
+@router.get("/policies/bundle", status_code=s.HTTP_200_OK)
+async def read_bundle(
+    request: Request,
+    infostar: Infostar = Depends(privileges.is_valid_admin),
+    if_none_match: str | None = Header(None),
+) -> Response:
+    bundle = authz_controller.read_bundle()
+    etag = f'"{bundle.revision}"'
+    if if_none_match == etag:
+        return Response(
+            status_code=s.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+    return Response(
+        content=bundle.content,
+        media_type="application/gzip",
+        headers={"ETag": etag},
+    )
+
+
 @router.get("/policies/{id}", status_code=s.HTTP_200_OK)
 @router.get(
     "/policies/{id}/", status_code=s.HTTP_200_OK, include_in_schema=False
@@ -17,14 +17,21 @@ class ResourceAuthorizationRequest(BaseModel):
     service_ref: EntityRefIn
 
 
-def check_reserved_keys(context: dict):
-    reserved_keywords = {
+# Input keys TAuth computes itself (see `authz.controllers.build_context`)
+RESERVED_CONTEXT_KEYS = frozenset(
+    {
         "infostar",
         "tauth_request",
         "entity",
         "permissions",
+        "permission_index",
         "resources",
     }
+)
+
+
+def check_reserved_keys(context: dict):
+    reserved_keywords = RESERVED_CONTEXT_KEYS
     if any(key in reserved_keywords for key in context):
         violations = sorted(reserved_keywords & context.keys())
         raise ValueError(f"Context contains reserved keywords: {violations}")
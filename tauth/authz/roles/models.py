@@ -6,6 +6,7 @@ from redbaby.document import Document
 from redbaby.pyobjectid import PyObjectId
 
 from ...entities.schemas import EntityRef
+from ...utils import identity_map
 from ...utils.teia_behaviors import Authoring
 from .schemas import RoleRef
 
@@ -35,16 +36,24 @@ class RoleDAO(Document, ObjectIdMixin, Authoring, ReadingMixin):
 
     @classmethod
     def from_ref(cls, ref: RoleRef) -> "RoleDAO | None":
-        collection = cls.collection(alias="tauth")
-        role = collection.find_one({"_id": ref.id})
-        if role:
-            return RoleDAO(**role)
+        def load() -> "RoleDAO | None":
+            collection = cls.collection(alias="tauth")
+            role = collection.find_one({"_id": ref.id})
+            if role:
+                return RoleDAO(**role)
+
+        return identity_map.get_or_load(cls.collection_name(), ref.id, load)
 
     @classmethod
     def from_name(cls, name: str, entity_handle: str) -> "RoleDAO | None":
-        collection = cls.collection(alias="tauth")
-        role = collection.find_one(
-            {"entity_ref.handle": entity_handle, "name": name}
+        def load() -> "RoleDAO | None":
+            collection = cls.collection(alias="tauth")
+            role = collection.find_one(
+                {"entity_ref.handle": entity_handle, "name": name}
+            )
+            if role:
+                return RoleDAO(**role)
+
+        return identity_map.get_or_load(
+            cls.collection_name(), (entity_handle, name), load
         )
-        if role:
-            return RoleDAO(**role)
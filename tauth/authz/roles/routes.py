@@ -3,7 +3,15 @@ from datetime import UTC, datetime
 from pathlib import Path
 from urllib.parse import unquote
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
 from fastapi import status as s
 from loguru import logger
 from redbaby.pyobjectid import PyObjectId
@@ -14,6 +22,7 @@ from ...schemas import Infostar
 from ...schemas.gen_fields import GeneratedFields
 from ...settings import Settings
 from ...utils import creation, reading
+from ..permissions.controllers import read_permissions_by_id
 from ..permissions.models import PermissionDAO
 from ..permissions.schemas import PermissionOut
 from .models import RoleDAO
@@ -92,42 +101,33 @@ async def read_one(
         identifier=role_id,
     )
 
-    # Decode permissions and entity handle
-    permission_coll = PermissionDAO.collection(
-        alias=Settings.get().REDBABY_ALIAS
-    )
-    permissions = []
-    if role.permissions:
-        permission_list = permission_coll.find(
-            {"_id": {"$in": role.permissions}}
-        )
-        permissions = [PermissionOut(**p) for p in permission_list]
-        permissions = sorted(permissions, key=lambda p: p.name)
-    role_out = RoleOut(
-        **role.model_dump(
-            by_alias=True, exclude={"permissions", "entity_ref"}
-        ),
-        permissions=permissions,
-        entity_handle=role.entity_ref.handle,
-    )
-    return role_out
+    return to_roles_out([role])[0]
 
 
 @router.get("", status_code=s.HTTP_200_OK)
 @router.get("/", status_code=s.HTTP_200_OK, include_in_schema=False)
 async def read_many(
     request: Request,
+    response: Response,
     infostar: Infostar = Depends(privileges.is_valid_user),
     name: str | None = Query(None),
     entity_handle: str | None = Query(None),
     limit: int = Query(1024, gt=0, le=1024),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(
+        None,
+        description=(
+            "`X-Next-Cursor` of the previous page, or empty to start paging "
+            "by cursor."
+        ),
+    ),
 ) -> list[RoleOut]:
     logger.debug(f"Reading roles with filters: {request.query_params}")
     # Decode the URL-encoded query parameters
     decoded_query_params = {
         key: unquote(value) if isinstance(value, str) else value
         for key, value in request.query_params.items()
+        if key not in ("limit", "offset", "cursor")
     }
     if name:
         decoded_query_params["name"] = {  # type: ignore
@@ -142,32 +142,15 @@ async def read_many(
     roles = reading.read_many(
         infostar=infostar,
         model=RoleDAO,
+        limit=limit,
+        offset=offset,
+        cursor=cursor,
         **decoded_query_params,
     )
     logger.debug(f"Roles: {roles}")
+    reading.set_next_cursor(response, roles, limit, cursor)
 
-    # Decode permissions and entity handle
-    roles_out = []
-    permission_coll = PermissionDAO.collection(
-        alias=Settings.get().REDBABY_ALIAS
-    )
-    for role in roles:
-        permissions = []
-        if role.permissions:
-            permission_list = permission_coll.find(
-                {"_id": {"$in": role.permissions}}
-            )
-            permissions = [PermissionOut(**p) for p in permission_list]
-            permissions = sorted(permissions, key=lambda p: p.name)
-        role_out = RoleOut(
-            **role.model_dump(
-                by_alias=True, exclude={"permissions", "entity_ref"}
-            ),
-            permissions=permissions,
-            entity_handle=role.entity_ref.handle,
-        )
-        roles_out.append(role_out)
-    return roles_out
+    return to_roles_out(roles)
 
 
 @router.patch("/{role_id}", status_code=s.HTTP_204_NO_CONTENT)
@@ -242,3 +225,27 @@ async def delete(
             detail=f"Role with ID {role_id!r} not found.",
         )
     logger.debug(f"Delete result: {res}")
+
+
+def to_roles_out(roles: list[RoleDAO]) -> list[RoleOut]:
+    """Decodes permissions and entity handles with a single query."""
+    permission_ids = {p for role in roles for p in role.permissions}
+    documents = read_permissions_by_id(permission_ids)
+    roles_out = []
+    for role in roles:
+        # Permissions that no longer exist are left out
+        permissions = [
+            PermissionOut(**documents[p])
+            for p in dict.fromkeys(role.permissions)
+            if p in documents
+        ]
+        permissions = sorted(permissions, key=lambda p: p.name)
+        role_out = RoleOut(
+            **role.model_dump(
+                by_alias=True, exclude={"permissions", "entity_ref"}
+            ),
+            permissions=permissions,
+            entity_handle=role.entity_ref.handle,
+        )
+        roles_out.append(role_out)
+    return roles_out
@@ -6,13 +6,18 @@ from fastapi import status as s
 from tauth.entities.models import EntityDAO
 from tauth.schemas.infostar import Infostar
 
+from ..utils.serialization import JSONResponse
 from . import controllers as authz_controllers
 from .engines.interface import AuthorizationResponse
 from .policies.schemas import AuthorizationDataIn
-from .utils import get_allowed_permissions
+from .utils import DecisionMetrics, get_allowed_permissions
 
 service_name = Path(__file__).parent.name
-router = APIRouter(prefix=f"/{service_name}", tags=[service_name + " 🔐"])
+router = APIRouter(
+    prefix=f"/{service_name}",
+    tags=[service_name + " 🔐"],
+    default_response_class=JSONResponse,
+)
 
 
 @router.post("", status_code=s.HTTP_200_OK)
@@ -22,13 +27,19 @@ async def authorize(
     authz_data: AuthorizationDataIn = Body(),
 ) -> AuthorizationResponse:
     infostar: Infostar = request.state.infostar
-    entity = EntityDAO.from_handle_assert(
-        handle=infostar.user_handle,
-        owner_handle=infostar.user_owner_handle,
-    )
+    decision = DecisionMetrics(authz_data.policy_name, authz_data.rule)
+    with decision.phase("entity_load"):
+        entity = EntityDAO.from_handle_assert(
+            handle=infostar.user_handle,
+            owner_handle=infostar.user_owner_handle,
+        )
     allowed_permissions = get_allowed_permissions(request)
 
     result = await authz_controllers.authorize(
-        request, entity, authz_data, allowed_permissions=allowed_permissions
+        request,
+        entity,
+        authz_data,
+        allowed_permissions=allowed_permissions,
+        decision=decision,
     )
     return result
@@ -1,36 +1,151 @@
-from collections.abc import Iterable
+import random
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from typing import Any
 
 from fastapi import HTTPException, Request
+from loguru import logger
 from redbaby.pyobjectid import PyObjectId
 
 from tauth.authn.tauth_keys.models import TauthTokenDAO
+from tauth.authz.engines.interface import AuthorizationResponse
 from tauth.authz.permissions.controllers import (
     read_many_permissions,
     read_permissions_from_roles,
 )
 from tauth.authz.permissions.schemas import PermissionContext
 from tauth.schemas.infostar import Infostar
+from tauth.settings import Settings
 
 from ..authn.tauth_keys.utils import TauthKeyParseError, parse_key
-
-
-async def get_request_context(request: Request) -> dict:
-    context = {}
-    context["query"] = dict(request.query_params)
-    context["headers"] = dict(request.headers)
-    context["path"] = request.path_params
-    context["method"] = request.method
-    context["url"] = str(request.url)
-
-    content_type = request.headers.get("content-type", "")
-    if (
-        content_type
-        and "application/json" in content_type
-        and await request.body()
-    ):
-        context["body"] = await request.json()
-
-    return context
+from ..utils import identity_map, metrics
+
+REQUEST_CONTEXT_SECTIONS = ("query", "headers", "path", "method", "url", "body")
+
+
+class RequestContext:
+    """
+    Lazily evaluated request data exposed to policies.
+
+    Each section is computed at most once per request and the instance is
+    cached in `request.state.request_context`.
+    """
+
+    def __init__(self, request: Request, max_body_size: int):
+        self.request = request
+        self.max_body_size = max_body_size
+        self._sections: dict[str, Any] = {}
+
+    @classmethod
+    def from_request(cls, request: Request) -> "RequestContext":
+        context = getattr(request.state, "request_context", None)
+        if context is None:
+            context = cls(
+                request,
+                max_body_size=Settings.get().AUTHZ_CONTEXT_MAX_BODY_SIZE,
+            )
+            request.state.request_context = context
+        return context
+
+    async def build(self, sections: Iterable[str] | None = None) -> dict:
+        if sections is None:
+            sections = REQUEST_CONTEXT_SECTIONS
+        context = {}
+        for section in sections:
+            if section not in self._sections:
+                self._sections[section] = await self._compute(section)
+            value = self._sections[section]
+            if value is not None:
+                context[section] = value
+        return context
+
+    async def _compute(self, section: str) -> Any:
+        match section:
+            case "query":
+                return dict(self.request.query_params)
+            case "headers":
+                return dict(self.request.headers)
+            case "path":
+                return self.request.path_params
+            case "method":
+                return self.request.method
+            case "url":
+                return str(self.request.url)
+            case "body":
+                return await self._read_json_body()
+        return None
+
+    async def _read_json_body(self) -> Any:
+        content_type = self.request.headers.get("content-type", "")
+        if "application/json" not in content_type:
+            return None
+        # Skip oversized bodies before reading them whenever possible
+        content_length = self.request.headers.get("content-length")
+        if (
+            content_length
+            and content_length.isdigit()
+            and int(content_length) > self.max_body_size
+        ):
+            logger.debug(
+                f"Request body ({content_length} bytes) exceeds context limit."
+            )
+            return None
+        body = await self.request.body()
+        if not body or len(body) > self.max_body_size:
+            return None
+        return await self.request.json()
+
+
+class DecisionMetrics:
+    """
+    Phase timings of a single authorization decision.
+
+    Each phase is observed in `metrics.AUTHZ_PHASE_SECONDS`; a sample of the
+    decisions is also logged with its timings (see
+    `AUTHZ_DECISION_LOG_SAMPLE_RATE`).
+    """
+
+    def __init__(self, policy_name: str, rule: str):
+        self.labels = dict(
+            policy_name=policy_name,
+            rule=rule,
+            engine=Settings.get().AUTHZ_ENGINE,
+        )
+        self.durations: dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.durations[name] = self.durations.get(name, 0.0) + elapsed
+            metrics.AUTHZ_PHASE_SECONDS.observe(
+                elapsed, phase=name, **self.labels
+            )
+
+    def record(self, result: AuthorizationResponse, entity_handle: str):
+        authorized = "true" if result.authorized else "false"
+        metrics.AUTHZ_DECISIONS.inc(authorized=authorized, **self.labels)
+        sample_rate = Settings.get().AUTHZ_DECISION_LOG_SAMPLE_RATE
+        if sample_rate and random.random() < sample_rate:
+            durations = {
+                phase: round(duration * 1000, 3)
+                for phase, duration in self.durations.items()
+            }
+            logger.bind(decision_log=True).info(
+                f"Authorization decision: {self.labels} "
+                f"entity={entity_handle!r} authorized={authorized} "
+                f"durations_ms={durations}"
+            )
+
+
+async def get_request_context(
+    request: Request, sections: Iterable[str] | None = None
+) -> dict:
+    return await RequestContext.from_request(request).build(sections)
 
 
 def get_permissions_set(
@@ -52,14 +167,34 @@ def get_permission_set_from_roles(
     return s
 
 
-def get_allowed_permissions(request: Request) -> set[PermissionContext] | None:
+def get_token_permissions(
+    token: TauthTokenDAO,
+) -> frozenset[PermissionContext]:
+    # Compiled at most once per request (e.g., impersonation checks and the
+    # route's own authorization); never across requests, so role and
+    # permission changes apply immediately
+    return identity_map.get_or_load(
+        "token-permissions",
+        tuple(sorted(token.roles)),
+        lambda: frozenset(get_permission_set_from_roles(token.roles)),
+    )
+
+
+def get_allowed_permissions(
+    request: Request,
+) -> frozenset[PermissionContext] | None:
     infostar: Infostar = request.state.infostar
     # If it is an impersonation, do not use token permissions
     if infostar.authprovider_type == "tauth-key" and infostar.original is None:
-        token = request.headers.get("Authorization")
-        assert token
-        token_obj = resolve_token(token)
-        return get_permission_set_from_roles(token_obj.roles)
+        # The authenticator attaches the token it resolved
+        token_obj: TauthTokenDAO | None = getattr(
+            request.state, "tauth_token", None
+        )
+        if token_obj is None:
+            token = request.headers.get("Authorization")
+            assert token
+            token_obj = resolve_token(token)
+        return get_token_permissions(token_obj)
     return None
 
 
@@ -1,3 +1,8 @@
+import asyncio
+from collections.abc import Set as AbstractSet
+from typing import Annotated
+
+from cachetools import TTLCache
 from fastapi import (
     APIRouter,
     BackgroundTasks,
@@ -7,91 +12,230 @@ from fastapi import (
     Request,
 )
 from fastapi import status as s
-from fastapi.security import HTTPAuthorizationCredentials
+from starlette.concurrency import run_in_threadpool
 
 from tauth.authz import controllers as authz_controllers
 from tauth.authz.engines.remote.engine import RemoteEngine
+from tauth.authz.permissions.schemas import PermissionContext
+from tauth.authz.policies.projection import (
+    InputProjection,
+    PolicyInputProjections,
+)
 from tauth.authz.policies.schemas import AuthorizationDataIn
-from tauth.authz.utils import get_allowed_permissions, get_request_context
+from tauth.authz.utils import (
+    DecisionMetrics,
+    get_allowed_permissions,
+    get_request_context,
+)
 from tauth.entities.models import EntityDAO
 from tauth.schemas.infostar import Infostar
 from tauth.settings import Settings
 
 from ..authz.engines.factory import AuthorizationEngine
 from ..authz.engines.interface import AuthorizationResponse
-from ..utils.headers import auth_headers_injector
-from .authentication import authn
+from ..utils import identity_map
+from ..utils.headers import (
+    AccessTokenHeader,
+    ImpersonateEntityHandleHeader,
+    ImpersonateEntityOwnerHeader,
+    UserEmail,
+)
+from .authentication import authenticate
 
 
 def setup_engine():
     AuthorizationEngine.setup()
+    PolicyInputProjections.start()
 
 
-def init_app(app: FastAPI, authz_data: AuthorizationDataIn):
-    app.router.dependencies.append(Depends(authz(authz_data), use_cache=True))
+def init_app(
+    app: FastAPI, authz_data: AuthorizationDataIn, cache_ttl: float = 0
+):
+    app.router.dependencies.append(
+        Depends(authz(authz_data, cache_ttl), use_cache=True)
+    )
+
 
+def init_router(
+    router: APIRouter, authz_data: AuthorizationDataIn, cache_ttl: float = 0
+):
+    router.dependencies.append(
+        Depends(authz(authz_data, cache_ttl), use_cache=True)
+    )
 
-def init_router(router: APIRouter, authz_data: AuthorizationDataIn):
-    router.dependencies.append(Depends(authz(authz_data), use_cache=True))
 
+# Infostar fields the decision may depend on, besides the token permissions
+IdentityKey = tuple[str, str, str, str, tuple[str, str] | None]
+
+
+def identity_key(infostar: Infostar) -> IdentityKey:
+    original = None
+    if infostar.original is not None:
+        original = (
+            infostar.original.user_handle,
+            infostar.original.user_owner_handle,
+        )
+    return (
+        infostar.authprovider_type,
+        infostar.apikey_name,
+        infostar.user_handle,
+        infostar.user_owner_handle,
+        original,
+    )
+
+
+def authz(authz_data: AuthorizationDataIn, cache_ttl: float = 0):
+    """
+    Dependency authorizing requests with `authz_data`.
+
+    With `cache_ttl`, decisions are reused per identity for that many seconds
+    when the policy does not read the request (e.g., a role check guarding a
+    whole router). Changes to roles and permissions take up to `cache_ttl`
+    seconds to apply.
+    """
+    decisions: TTLCache[
+        tuple[IdentityKey, AbstractSet[PermissionContext] | None],
+        AuthorizationResponse,
+    ] | None = None
+    if cache_ttl > 0:
+        decisions = TTLCache(maxsize=1024, ttl=cache_ttl)
 
-def authz(
-    authz_data: AuthorizationDataIn, infostar: Infostar = Depends(authn())
-):
-    @auth_headers_injector
     async def _authorize(
         request: Request,
         background_tasks: BackgroundTasks,
-        user_email: str | None = None,
-        authorization: HTTPAuthorizationCredentials | None = None,
-        impersonate_entity_handle: str | None = None,
-        impersonate_entity_owner: str | None = None,
+        # Shared with the app's or router's `authenticate`, if any (FastAPI
+        # caches dependencies per request)
+        infostar: Annotated[Infostar, Depends(authenticate)],
+        user_email: UserEmail = None,
+        authorization: AccessTokenHeader = None,
+        impersonate_entity_handle: ImpersonateEntityHandleHeader = None,
+        impersonate_entity_owner: ImpersonateEntityOwnerHeader = None,
     ) -> AuthorizationResponse:
         if not authz_data:
             raise HTTPException(
                 status_code=s.HTTP_422_UNPROCESSABLE_ENTITY,
                 detail="Invalid or missing authorization data.",
             )
-        authz_data.context["request"] = await get_request_context(request)
+        identity_map.bind(request)
+        # Copy the context: `authz_data` is shared by every request
+        context = dict(authz_data.context)
+        decision = DecisionMetrics(authz_data.policy_name, authz_data.rule)
         if Settings.get().AUTHN_ENGINE == "remote":
+            with decision.phase("context_build"):
+                context["request"] = await get_request_context(request)
             engine: RemoteEngine = AuthorizationEngine.get()  # type: ignore
             assert authorization
-            result = engine.is_authorized(
-                policy_name=authz_data.policy_name,
-                rule=authz_data.rule,
-                context=authz_data.context,
-                resources=authz_data.resources,
-                access_token=authorization.credentials,
-                user_email=user_email,
-                impersonate_handle=impersonate_entity_handle,
-                impersonate_entity_owner=impersonate_entity_owner,
-            )
+            with decision.phase("engine_call"):
+                result = await engine.is_authorized_async(
+                    policy_name=authz_data.policy_name,
+                    rule=authz_data.rule,
+                    context=context,
+                    resources=authz_data.resources,
+                    access_token=authorization.credentials,
+                    user_email=user_email,
+                    impersonate_handle=impersonate_entity_handle,
+                    impersonate_entity_owner=impersonate_entity_owner,
+                )
+            decision.record(result, infostar.user_handle)
         else:
-            entity = EntityDAO.from_handle(
-                handle=infostar.user_handle,
-                owner_handle=infostar.user_owner_handle,
+            projection = PolicyInputProjections.get(authz_data.policy_name)
+            allowed_permissions = get_allowed_permissions(request)
+            key = None
+            if decisions is not None and not (
+                projection.includes("request")
+                or projection.includes("tauth_request")
+            ):
+                key = (identity_key(infostar), allowed_permissions)
+                result = decisions.get(key)
+                if result is not None:
+                    decision.record(result, infostar.user_handle)
+                    return check_result(request, result)
+            result = await decide(
+                request,
+                projection,
+                context,
+                decision,
+                infostar,
+                allowed_permissions,
             )
-            if not entity:
-                message = (
-                    f"Entity not found for handle: {infostar.user_handle}."
-                )
-                raise HTTPException(
-                    status_code=s.HTTP_401_UNAUTHORIZED,
-                    detail=dict(msg=message),
+            if key is not None and decisions is not None:
+                decisions[key] = result
+
+        return check_result(request, result)
+
+    async def decide(
+        request: Request,
+        projection: InputProjection,
+        context: dict,
+        decision: DecisionMetrics,
+        infostar: Infostar,
+        allowed_permissions: AbstractSet[PermissionContext] | None,
+    ) -> AuthorizationResponse:
+        data = authz_data.model_copy(update={"context": context})
+
+        def load_entity() -> EntityDAO | None:
+            with decision.phase("entity_load"):
+                return EntityDAO.from_handle(
+                    handle=infostar.user_handle,
+                    owner_handle=infostar.user_owner_handle,
                 )
 
-            result = await authz_controllers.authorize(
+        async def build_request_context():
+            if projection.includes("request"):
+                with decision.phase("context_build"):
+                    context["request"] = projection.prune(
+                        "request",
+                        await get_request_context(
+                            request, projection.sections("request")
+                        ),
+                    )
+
+        if authz_controllers.reads_entity(projection, data):
+            # The entity is read while the request context is built
+            entity, _ = await asyncio.gather(
+                run_in_threadpool(load_entity), build_request_context()
+            )
+            check_entity(infostar, entity)
+            return await authz_controllers.authorize(
                 request,
                 entity,
-                authz_data,
-                allowed_permissions=get_allowed_permissions(request),
+                data,
+                allowed_permissions=allowed_permissions,
+                decision=decision,
             )
 
-        if not result.authorized:
-            raise HTTPException(
-                status_code=s.HTTP_403_FORBIDDEN, detail=result.details
-            )
-        request.state.authz_result = result
+        # The policy input does not depend on the entity: check that it
+        # exists while the engine decides
+        await build_request_context()
+        policy_input = await authz_controllers.build_context(
+            request, None, data, allowed_permissions, decision
+        )
+        entity, result = await asyncio.gather(
+            run_in_threadpool(load_entity),
+            authz_controllers.evaluate(data, policy_input, decision),
+        )
+        check_entity(infostar, entity)
+        decision.record(result, infostar.user_handle)
         return result
 
     return _authorize
+
+
+def check_entity(infostar: Infostar, entity: EntityDAO | None):
+    if not entity:
+        message = f"Entity not found for handle: {infostar.user_handle}."
+        raise HTTPException(
+            status_code=s.HTTP_401_UNAUTHORIZED,
+            detail=dict(msg=message),
+        )
+
+
+def check_result(
+    request: Request, result: AuthorizationResponse
+) -> AuthorizationResponse:
+    if not result.authorized:
+        raise HTTPException(
+            status_code=s.HTTP_403_FORBIDDEN, detail=result.details
+        )
+    request.state.authz_result = result
+    return result
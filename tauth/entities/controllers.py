@@ -0,0 +1,206 @@
+"""
+Bulk assignment of roles and permissions to entities.
+
+Each operation reads what it needs with one query per collection and then
+writes every change with a single `bulk_write`, one `$addToSet`/`$pull`
+per entity, whatever the number of pairs.
+"""
+
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+
+from fastapi import status as s
+from loguru import logger
+from pymongo import UpdateOne
+from redbaby.pyobjectid import PyObjectId
+
+from ..authz.permissions.models import PermissionDAO
+from ..authz.roles.models import RoleDAO
+from ..schemas.bulk import BulkItemResult
+from ..settings import Settings
+from .models import EntityDAO
+from .schemas import EntityPermissionIn, EntityRoleIn
+
+
+def assign_roles(pairs: Sequence[EntityRoleIn]) -> list[BulkItemResult]:
+    """
+    Attaches each role to its entity. As when attaching a single role,
+    roles named like one the entity already has are rejected (409).
+    """
+    entities = _read_entities(pairs, "roles")
+    attached = {
+        id: {ref["id"] for ref in entity.get("roles", [])}
+        for id, entity in entities.items()
+    }
+    # Names of the requested and the attached roles, in the same query
+    role_ids = {p.role_id for p in pairs}.union(*attached.values())
+    names = {
+        role["_id"]: role["name"]
+        for role in RoleDAO.collection(
+            alias=Settings.get().REDBABY_ALIAS
+        ).find({"_id": {"$in": list(role_ids)}}, projection={"name": 1})
+    }
+    attached_names = {
+        id: {names[r] for r in roles if r in names}
+        for id, roles in attached.items()
+    }
+
+    results = []
+    updates: dict[str, list[dict]] = defaultdict(list)
+    for index, pair in enumerate(pairs):
+        name = names.get(pair.role_id)
+        if pair.entity_id not in entities:
+            results.append(_not_found(index, "Entity"))
+        elif name is None:
+            results.append(_not_found(index, "Role"))
+        elif name in attached_names[pair.entity_id]:
+            results.append(
+                _conflict(index, f"Role {name!r} already attached.")
+            )
+        else:
+            attached_names[pair.entity_id].add(name)
+            updates[pair.entity_id].append({"id": pair.role_id})
+            results.append(_ok(index))
+    _write(
+        UpdateOne({"_id": id}, {"$addToSet": {"roles": {"$each": refs}}})
+        for id, refs in updates.items()
+    )
+    return results
+
+
+def revoke_roles(pairs: Sequence[EntityRoleIn]) -> list[BulkItemResult]:
+    entities = _read_entities(pairs, "roles")
+    attached = {
+        id: {ref["id"] for ref in entity.get("roles", [])}
+        for id, entity in entities.items()
+    }
+    results, updates = _revocations(
+        pairs, attached, [p.role_id for p in pairs], "Role"
+    )
+    _write(
+        UpdateOne({"_id": id}, {"$pull": {"roles": {"id": {"$in": ids}}}})
+        for id, ids in updates.items()
+    )
+    return results
+
+
+def assign_permissions(
+    pairs: Sequence[EntityPermissionIn],
+) -> list[BulkItemResult]:
+    entities = _read_entities(pairs, "permissions")
+    attached = {
+        id: set(entity.get("permissions", []))
+        for id, entity in entities.items()
+    }
+    found = {
+        permission["_id"]
+        for permission in PermissionDAO.collection(
+            alias=Settings.get().REDBABY_ALIAS
+        ).find(
+            {"_id": {"$in": list({p.permission_id for p in pairs})}},
+            projection={"_id": 1},
+        )
+    }
+
+    results = []
+    updates: dict[str, list[PyObjectId]] = defaultdict(list)
+    for index, pair in enumerate(pairs):
+        if pair.entity_id not in entities:
+            results.append(_not_found(index, "Entity"))
+        elif pair.permission_id not in found:
+            results.append(_not_found(index, "Permission"))
+        elif pair.permission_id in attached[pair.entity_id]:
+            results.append(
+                _conflict(
+                    index,
+                    f"Permission {pair.permission_id!s} already attached.",
+                )
+            )
+        else:
+            attached[pair.entity_id].add(pair.permission_id)
+            updates[pair.entity_id].append(pair.permission_id)
+            results.append(_ok(index))
+    _write(
+        UpdateOne(
+            {"_id": id}, {"$addToSet": {"permissions": {"$each": ids}}}
+        )
+        for id, ids in updates.items()
+    )
+    return results
+
+
+def revoke_permissions(
+    pairs: Sequence[EntityPermissionIn],
+) -> list[BulkItemResult]:
+    entities = _read_entities(pairs, "permissions")
+    attached = {
+        id: set(entity.get("permissions", []))
+        for id, entity in entities.items()
+    }
+    results, updates = _revocations(
+        pairs, attached, [p.permission_id for p in pairs], "Permission"
+    )
+    _write(
+        UpdateOne({"_id": id}, {"$pull": {"permissions": {"$in": ids}}})
+        for id, ids in updates.items()
+    )
+    return results
+
+
+def _read_entities(
+    pairs: Sequence[EntityRoleIn | EntityPermissionIn], field: str
+) -> dict[str, dict]:
+    ids = list({p.entity_id for p in pairs})
+    cursor = EntityDAO.collection(alias=Settings.get().REDBABY_ALIAS).find(
+        {"_id": {"$in": ids}}, projection={field: 1}
+    )
+    return {entity["_id"]: entity for entity in cursor}
+
+
+def _revocations(
+    pairs: Sequence[EntityRoleIn | EntityPermissionIn],
+    attached: dict[str, set[PyObjectId]],
+    ids: list[PyObjectId],
+    kind: str,
+) -> tuple[list[BulkItemResult], dict[str, list[PyObjectId]]]:
+    results = []
+    updates: dict[str, list[PyObjectId]] = defaultdict(list)
+    for index, (pair, id) in enumerate(zip(pairs, ids, strict=True)):
+        if pair.entity_id not in attached:
+            results.append(_not_found(index, "Entity"))
+        elif id not in attached[pair.entity_id]:
+            results.append(_not_found(index, kind, "attached"))
+        else:
+            attached[pair.entity_id].discard(id)
+            updates[pair.entity_id].append(id)
+            results.append(_ok(index))
+    return results, updates
+
+
+def _write(operations: Iterable[UpdateOne]) -> None:
+    requests = list(operations)
+    if not requests:
+        return
+    res = EntityDAO.collection(alias=Settings.get().REDBABY_ALIAS).bulk_write(
+        requests, ordered=False
+    )
+    logger.debug(f"Bulk write result: {res.bulk_api_result!r}.")
+
+
+def _ok(index: int) -> BulkItemResult:
+    return BulkItemResult(index=index, status=s.HTTP_200_OK)
+
+
+def _not_found(index: int, kind: str, state: str = "found") -> BulkItemResult:
+    return BulkItemResult(
+        index=index,
+        status=s.HTTP_404_NOT_FOUND,
+        error="DocumentNotFound",
+        msg=f"{kind} not {state}.",
+    )
+
+
+def _conflict(index: int, msg: str) -> BulkItemResult:
+    return BulkItemResult(
+        index=index, status=s.HTTP_409_CONFLICT, error="Conflict", msg=msg
+    )
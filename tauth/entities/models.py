@@ -1,21 +1,23 @@
-from collections.abc import Iterator
+from collections.abc import Iterable, Iterator
 from typing import Literal, Optional
 
 from fastapi import HTTPException
 from pydantic import BaseModel, Field
 from pymongo import IndexModel
-from redbaby.behaviors.hashids import HashIdMixin
 from redbaby.behaviors.reading import ReadingMixin
 from redbaby.document import Document
 from redbaby.pyobjectid import PyObjectId
 
 from ..authz.roles.schemas import RoleRef
 from ..schemas.attribute import Attribute
-from ..utils.teia_behaviors import Authoring
+from ..utils import identity_map
+from ..utils.teia_behaviors import Authoring, StoredHashIdMixin
 from .schemas import EntityRef
 
 
-class EntityDAO(Document, Authoring, ReadingMixin, HashIdMixin):
+class EntityDAO(
+    Document, Authoring, ReadingMixin, StoredHashIdMixin
+):
     external_ids: list[Attribute] = Field(
         default_factory=list
     )  # e.g., url, azuread-id/auth0-id, ...
@@ -52,12 +54,17 @@ class EntityDAO(Document, Authoring, ReadingMixin, HashIdMixin):
     def from_handle(
         cls, handle: str, owner_handle: str | None
     ) -> Optional["EntityDAO"]:
-        filters = {"handle": handle}
-        if owner_handle:
-            filters["owner_ref.handle"] = owner_handle
-        out = cls.collection(alias="tauth").find_one(filters)
-        if out:
-            return EntityDAO(**out)
+        def load() -> Optional["EntityDAO"]:
+            filters = {"handle": handle}
+            if owner_handle:
+                filters["owner_ref.handle"] = owner_handle
+            out = cls.collection(alias="tauth").find_one(filters)
+            if out:
+                return EntityDAO(**out)
+
+        return identity_map.get_or_load(
+            cls.collection_name(), (handle, owner_handle), load
+        )
 
     @classmethod
     def from_handle_assert(
@@ -78,15 +85,58 @@ class EntityDAO(Document, Authoring, ReadingMixin, HashIdMixin):
     def from_handle_to_ref(
         cls, handle: str, owner_handle: str | None
     ) -> EntityRef | None:
-        entity = cls.from_handle(handle, owner_handle)
-        if entity:
-            return EntityRef(
-                type=entity.type,
-                handle=entity.handle,
-                owner_handle=(
-                    entity.owner_ref.handle if entity.owner_ref else None
-                ),
-            )
+        # Reuse the entity if this request already read it, otherwise only
+        # read the fields of the reference
+        loaded = identity_map.current()
+        if loaded is not None:
+            entity = loaded.get(cls.collection_name(), (handle, owner_handle))
+            if entity is not None:
+                return entity.to_ref()
+        filters = {"handle": handle}
+        if owner_handle:
+            filters["owner_ref.handle"] = owner_handle
+        out = cls.collection(alias="tauth").find_one(
+            filters, projection={"type": 1, "handle": 1, "owner_ref.handle": 1}
+        )
+        if out:
+            return _to_ref(out)
+
+    @classmethod
+    def from_handles_to_refs(
+        cls, keys: Iterable[tuple[str, str | None]]
+    ) -> dict[tuple[str, str | None], EntityRef]:
+        """
+        `from_handle_to_ref` for many `(handle, owner_handle)` pairs, in a
+        single query. Pairs that match no entity are left out.
+        """
+        found = cls.ids_and_refs_from_handles(keys)
+        return {key: ref for key, (_, ref) in found.items()}
+
+    @classmethod
+    def ids_and_refs_from_handles(
+        cls, keys: Iterable[tuple[str, str | None]]
+    ) -> dict[tuple[str, str | None], tuple[str, EntityRef]]:
+        """Same as `from_handles_to_refs`, along with each entity's id."""
+        keys = set(keys)
+        if not keys:
+            return {}
+        filters = []
+        for handle, owner_handle in keys:
+            f = {"handle": handle}
+            if owner_handle:
+                f["owner_ref.handle"] = owner_handle
+            filters.append(f)
+        cursor = cls.collection(alias="tauth").find(
+            {"$or": filters},
+            projection={"type": 1, "handle": 1, "owner_ref.handle": 1},
+        )
+        found: dict[tuple[str, str | None], tuple[str, EntityRef]] = {}
+        for out in cursor:
+            ref = _to_ref(out)
+            for key in ((ref.handle, ref.owner_handle), (ref.handle, None)):
+                if key in keys:
+                    found.setdefault(key, (out["_id"], ref))
+        return found
 
     def to_ref(self) -> EntityRef:
         return EntityRef(
@@ -102,7 +152,17 @@ class EntityDAO(Document, Authoring, ReadingMixin, HashIdMixin):
         return fields
 
 
-class EntityRelationshipsDAO(Document, Authoring, ReadingMixin, HashIdMixin):
+def _to_ref(out: dict) -> EntityRef:
+    return EntityRef(
+        type=out["type"],
+        handle=out["handle"],
+        owner_handle=(out.get("owner_ref") or {}).get("handle"),
+    )
+
+
+class EntityRelationshipsDAO(
+    Document, Authoring, ReadingMixin, StoredHashIdMixin
+):
     origin: EntityRef
     target: EntityRef
     type: Literal["parent", "child"]
@@ -1,9 +1,21 @@
 from pathlib import Path
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request
+from bson.errors import InvalidId
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
 from fastapi import Path as PathParam
 from fastapi import status as s
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from loguru import logger
+from pydantic import ValidationError
 from redbaby.pyobjectid import PyObjectId
 
 from tauth.authz.permissions.models import PermissionDAO
@@ -13,11 +25,13 @@ from ..authz import privileges
 from ..authz.roles.models import RoleDAO
 from ..authz.roles.schemas import RoleRef
 from ..schemas import Infostar
+from ..schemas.bulk import BulkItemResult, BulkResult
 from ..schemas.gen_fields import GeneratedFields
 from ..settings import Settings
 from ..utils import creation, reading
+from . import controllers
 from .models import EntityDAO, EntityIntermediate
-from .schemas import EntityIn
+from .schemas import EntityIn, EntityPermissionIn, EntityRoleIn
 
 service_name = Path(__file__).parent.name
 router = APIRouter(prefix=f"/{service_name}", tags=[service_name + " 👥💻🏢"])
@@ -52,6 +66,113 @@ async def create_one(
     return GeneratedFields(**entity.model_dump(by_alias=True))
 
 
+@router.post("/$bulk", status_code=s.HTTP_200_OK)
+async def create_many(
+    request: Request,
+    infostar: Infostar = Depends(privileges.is_valid_admin),
+) -> BulkResult:
+    """
+    Creates many entities, sent as NDJSON (`application/x-ndjson`) or as a
+    JSON array of `EntityIn`.
+
+    Owners are resolved in a single query and must already exist. Entities
+    are inserted at once, and the result reports each one by its index:
+    `201` when created, or `400`, `404` (owner not found) or `409` (already
+    exists) with the error.
+    """
+    items = creation.parse_items(
+        await request.body(), request.headers.get("content-type")
+    )
+    results: list[BulkItemResult] = []
+    bodies: dict[int, EntityIn] = {}
+    for index, item in enumerate(items):
+        try:
+            bodies[index] = EntityIn.model_validate(item)
+        except ValidationError as e:
+            results.append(
+                BulkItemResult(
+                    index=index,
+                    status=s.HTTP_400_BAD_REQUEST,
+                    error="ValidationError",
+                    msg=str(e),
+                )
+            )
+
+    owner_refs = EntityDAO.from_handles_to_refs(
+        (b.owner_ref.handle, b.owner_ref.owner_handle)
+        for b in bodies.values()
+        if b.owner_ref
+    )
+    indexes: list[int] = []
+    schemas_in: list[EntityIntermediate] = []
+    for index, body in bodies.items():
+        owner_ref = None
+        if body.owner_ref:
+            key = (body.owner_ref.handle, body.owner_ref.owner_handle)
+            owner_ref = owner_refs.get(key)
+            if not owner_ref:
+                results.append(
+                    BulkItemResult(
+                        index=index,
+                        status=s.HTTP_404_NOT_FOUND,
+                        error="DocumentNotFound",
+                        msg="Owner not found.",
+                    )
+                )
+                continue
+        try:
+            roles = [RoleRef(id=PyObjectId(x)) for x in body.roles]
+        except InvalidId as e:
+            results.append(
+                BulkItemResult(
+                    index=index,
+                    status=s.HTTP_400_BAD_REQUEST,
+                    error="InvalidRole",
+                    msg=str(e),
+                )
+            )
+            continue
+        indexes.append(index)
+        schemas_in.append(
+            EntityIntermediate(
+                owner_ref=owner_ref,
+                roles=roles,
+                **body.model_dump(exclude={"owner_ref", "roles"}),
+            )
+        )
+
+    entities, errors = await run_in_threadpool(
+        creation.create_many, schemas_in, EntityDAO, infostar
+    )
+    for i, (index, entity) in enumerate(zip(indexes, entities, strict=True)):
+        error = errors.get(i)
+        if error is None:
+            results.append(
+                BulkItemResult(
+                    index=index, status=s.HTTP_201_CREATED, id=entity.id
+                )
+            )
+        else:
+            duplicate = error["error"] == "DuplicateKeyError"
+            results.append(
+                BulkItemResult(
+                    index=index,
+                    status=(
+                        s.HTTP_409_CONFLICT
+                        if duplicate
+                        else s.HTTP_500_INTERNAL_SERVER_ERROR
+                    ),
+                    error=error["error"],
+                    msg=error["msg"],
+                )
+            )
+    logger.info(
+        f"Bulk created {len(entities) - len(errors)} of {len(items)} "
+        "entities."
+    )
+    return BulkResult.from_results(results)
+
+
 @router.post("/{entity_id}", status_code=s.HTTP_200_OK)
 @router.post("/{entitiy_id}/", status_code=s.HTTP_200_OK, include_in_schema=False)
 async def read_one(
@@ -73,6 +194,7 @@ async def read_one(
 @router.get("", status_code=s.HTTP_200_OK)
 async def read_many(
     request: Request,
+    response: Response,
     infostar: Infostar = Depends(authenticate),
     handle: str | None = Query(None),
     owner_handle: str | None = Query(None),
@@ -80,6 +202,16 @@ async def read_many(
     external_id_value: str | None = Query(None, alias="external_ids.value"),
     limit: int = Query(1024, gt=0, le=1024),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(
+        None,
+        description=(
+            "`X-Next-Cursor` of the previous page, or empty to start paging "
+            "by cursor."
+        ),
+    ),
+    fields: str | None = Query(
+        None, description="Comma-separated fields to return (all by default)."
+    ),
 ):
     filters = {
         "handle": handle,
@@ -92,11 +224,76 @@ async def read_many(
         model=EntityDAO,
         limit=limit,
         offset=offset,
+        cursor=cursor,
+        fields=reading.parse_fields(fields),
         **filters,
     )
+    reading.set_next_cursor(response, orgs, limit, cursor)
     return orgs
 
 
+@router.get("/$export", status_code=s.HTTP_200_OK)
+async def export(
+    infostar: Infostar = Depends(authenticate),
+    handle: str | None = Query(None),
+    owner_handle: str | None = Query(None),
+    fields: str | None = Query(
+        None, description="Comma-separated fields to export (all by default)."
+    ),
+):
+    """Streams all matching entities as newline-delimited JSON."""
+    filters = {"handle": handle, "owner_ref.handle": owner_handle}
+    return StreamingResponse(
+        reading.export(
+            infostar=infostar,
+            model=EntityDAO,
+            fields=reading.parse_fields(fields),
+            **filters,
+        ),
+        media_type=reading.NDJSON_MEDIA_TYPE,
+    )
+
+
+@router.post("/roles/$assign", status_code=s.HTTP_200_OK)
+async def assign_roles(
+    pairs: list[EntityRoleIn],
+    infostar: Infostar = Depends(authenticate),
+) -> BulkResult:
+    """Attaches many roles to entities, reporting each pair by its index."""
+    results = await run_in_threadpool(controllers.assign_roles, pairs)
+    return BulkResult.from_results(results)
+
+
+@router.post("/roles/$revoke", status_code=s.HTTP_200_OK)
+async def revoke_roles(
+    pairs: list[EntityRoleIn],
+    infostar: Infostar = Depends(authenticate),
+) -> BulkResult:
+    """Detaches many roles from entities, reporting each pair by its index."""
+    results = await run_in_threadpool(controllers.revoke_roles, pairs)
+    return BulkResult.from_results(results)
+
+
+@router.post("/permissions/$assign", status_code=s.HTTP_200_OK)
+async def assign_permissions(
+    pairs: list[EntityPermissionIn],
+    infostar: Infostar = Depends(authenticate),
+) -> BulkResult:
+    """Attaches many permissions to entities, reporting each pair by index."""
+    results = await run_in_threadpool(controllers.assign_permissions, pairs)
+    return BulkResult.from_results(results)
+
+
+@router.post("/permissions/$revoke", status_code=s.HTTP_200_OK)
+async def revoke_permissions(
+    pairs: list[EntityPermissionIn],
+    infostar: Infostar = Depends(authenticate),
+) -> BulkResult:
+    """Detaches many permissions from entities, reporting each by index."""
+    results = await run_in_threadpool(controllers.revoke_permissions, pairs)
+    return BulkResult.from_results(results)
+
+
 @router.post("/{entity_id}/roles", status_code=s.HTTP_201_CREATED)
 @router.post(
     "/{entity_id}/roles/",
@@ -150,15 +347,17 @@ async def add_entity_role(
             detail="Role not found.",
         )
     logger.debug(f"Role found: {role!r}.")
-    # 409 in case the role is already attached
-    for role_ref in entity.roles:
-        r = RoleDAO.from_ref(role_ref)
-        assert r
-        if r.name == role.name:
-            raise HTTPException(
-                status_code=s.HTTP_409_CONFLICT,
-                detail=f"Role {role.name!r} already attached to entity {entity.handle!r}.",
-            )
+    # 409 in case a role with the same name is already attached
+    role_coll = RoleDAO.collection(alias=Settings.get().REDBABY_ALIAS)
+    attached = role_coll.find_one(
+        {"_id": {"$in": [r.id for r in entity.roles]}, "name": role.name},
+        projection={"_id": 1},
+    )
+    if attached:
+        raise HTTPException(
+            status_code=s.HTTP_409_CONFLICT,
+            detail=f"Role {role.name!r} already attached to entity {entity.handle!r}.",
+        )
     # Add role to entity
     role_ref = RoleRef(id=role.id)
     entity_coll = EntityDAO.collection(alias=Settings.get().REDBABY_ALIAS)
@@ -2,6 +2,7 @@ from typing import Literal
 
 from fastapi.openapi.models import Example
 from pydantic import BaseModel, Field
+from redbaby.pyobjectid import PyObjectId
 
 from ..schemas.attribute import Attribute
 
@@ -63,3 +64,13 @@ class EntityIn(BaseModel):
             ),
         }
         return examples
+
+
+class EntityRoleIn(BaseModel):
+    entity_id: str
+    role_id: PyObjectId
+
+
+class EntityPermissionIn(BaseModel):
+    entity_id: str
+    permission_id: PyObjectId
@@ -0,0 +1,194 @@
+"""
+Bulk `$grant`/`$revoke`: the resources, the entities (including the
+resources' services) and the permissions of all grants are each read with
+one query, whatever the number of grants, e.g., when sharing a resource
+with a whole team.
+"""
+
+from collections.abc import Callable, Sequence
+from typing import NamedTuple
+
+from fastapi import status as s
+from loguru import logger
+from pymongo import errors as pymongo_errors
+from redbaby.pyobjectid import PyObjectId
+
+from ...authz.permissions.models import PermissionDAO
+from ...entities import controllers as entity_controllers
+from ...entities.models import EntityDAO
+from ...entities.schemas import EntityPermissionIn, EntityRef
+from ...schemas import Infostar
+from ...schemas.bulk import BulkItemResult
+from ...settings import Settings
+from ..resources.models import ResourceDAO
+from .schemas import GrantIn
+
+GRANT_DESCRIPTION = "Permission created for resource access, by tauth $grant"
+
+# Permissions are unique by name and service handle
+PermissionKey = tuple[str, str]
+
+
+class Resolved(NamedTuple):
+    permission: PermissionKey
+    service_ref: EntityRef
+    entity_id: str
+
+
+def grant_many(
+    grants: Sequence[GrantIn], infostar: Infostar
+) -> list[BulkItemResult]:
+    """
+    `$grant` for each item: creates the missing permissions and attaches
+    them to the entities, with `entities.controllers.assign_permissions`.
+    """
+    results, resolved = _resolve(grants)
+    missing = {r.permission: r.service_ref for r in resolved.values()}
+    permissions = _find_permissions(missing)
+    for key in permissions:
+        missing.pop(key, None)
+    if missing:
+        permissions |= _create_permissions(missing, infostar)
+    return results + _assign(
+        entity_controllers.assign_permissions, resolved, permissions
+    )
+
+
+def revoke_many(grants: Sequence[GrantIn]) -> list[BulkItemResult]:
+    """Detaches the permissions of each item from the entities."""
+    results, resolved = _resolve(grants)
+    permissions = _find_permissions(
+        {r.permission: r.service_ref for r in resolved.values()}
+    )
+    return results + _assign(
+        entity_controllers.revoke_permissions, resolved, permissions
+    )
+
+
+def _resolve(
+    grants: Sequence[GrantIn],
+) -> tuple[list[BulkItemResult], dict[int, Resolved]]:
+    """
+    Reads the resources and entities of `grants`. Returns the errors and,
+    by index, what the other grants resolved to.
+    """
+    resources = {
+        resource["_id"]: resource
+        for resource in ResourceDAO.collection(
+            alias=Settings.get().REDBABY_ALIAS
+        ).find(
+            {"_id": {"$in": list({g.resource_id for g in grants})}},
+            projection={"service_ref": 1},
+        )
+    }
+    services = {
+        id: (
+            resource["service_ref"]["handle"],
+            resource["service_ref"].get("owner_handle"),
+        )
+        for id, resource in resources.items()
+    }
+    entity_keys = [
+        (g.entity_ref.handle, g.entity_ref.owner_handle) for g in grants
+    ]
+    found = EntityDAO.ids_and_refs_from_handles(
+        [*entity_keys, *services.values()]
+    )
+
+    results = []
+    resolved = {}
+    for index, grant in enumerate(grants):
+        key = entity_keys[index]
+        service = services.get(grant.resource_id)
+        if service is None:
+            results.append(_not_found(index, "Resource"))
+        elif service not in found:
+            results.append(_not_found(index, "Service"))
+        elif key not in found:
+            results.append(_not_found(index, "Entity"))
+        else:
+            _, service_ref = found[service]
+            resolved[index] = Resolved(
+                permission=(grant.permission_name, service_ref.handle),
+                service_ref=service_ref,
+                entity_id=found[key][0],
+            )
+    return results, resolved
+
+
+def _find_permissions(
+    keys: dict[PermissionKey, EntityRef],
+) -> dict[PermissionKey, PyObjectId]:
+    if not keys:
+        return {}
+    cursor = PermissionDAO.collection(alias=Settings.get().REDBABY_ALIAS).find(
+        {
+            "$or": [
+                {"name": name, "entity_ref.handle": handle}
+                for name, handle in keys
+            ]
+        },
+        projection={"name": 1, "entity_ref.handle": 1},
+    )
+    return {(p["name"], p["entity_ref"]["handle"]): p["_id"] for p in cursor}
+
+
+def _create_permissions(
+    keys: dict[PermissionKey, EntityRef], infostar: Infostar
+) -> dict[PermissionKey, PyObjectId]:
+    permissions = {
+        key: PermissionDAO(
+            name=key[0],
+            description=GRANT_DESCRIPTION,
+            entity_ref=service_ref,
+            type="resource",
+            created_by=infostar,
+        )
+        for key, service_ref in keys.items()
+    }
+    coll = PermissionDAO.collection(alias=Settings.get().REDBABY_ALIAS)
+    try:
+        coll.insert_many(
+            [p.bson() for p in permissions.values()], ordered=False
+        )
+    except pymongo_errors.BulkWriteError:
+        # Created meanwhile by another grant: read them instead
+        logger.debug("Some permissions already existed, reading them.")
+        return _find_permissions(keys)
+    logger.debug(f"Created {len(permissions)} permissions.")
+    return {key: p.id for key, p in permissions.items()}
+
+
+def _assign(
+    assign: Callable[[list[EntityPermissionIn]], list[BulkItemResult]],
+    resolved: dict[int, Resolved],
+    permissions: dict[PermissionKey, PyObjectId],
+) -> list[BulkItemResult]:
+    results = []
+    indexes = []
+    pairs = []
+    for index, r in resolved.items():
+        permission_id = permissions.get(r.permission)
+        if permission_id is None:
+            results.append(_not_found(index, "Permission"))
+            continue
+        indexes.append(index)
+        pairs.append(
+            EntityPermissionIn(
+                entity_id=r.entity_id, permission_id=permission_id
+            )
+        )
+    if pairs:
+        for result in assign(pairs):
+            result.index = indexes[result.index]
+            results.append(result)
+    return results
+
+
+def _not_found(index: int, kind: str) -> BulkItemResult:
+    return BulkItemResult(
+        index=index,
+        status=s.HTTP_404_NOT_FOUND,
+        error="DocumentNotFound",
+        msg=f"{kind} not found.",
+    )
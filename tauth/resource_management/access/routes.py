@@ -1,6 +1,7 @@
 from pathlib import Path
 
 from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
 from loguru import logger
 
 from tauth.authz.permissions.controllers import upsert_permission
@@ -12,7 +13,9 @@ from tauth.utils import reading
 
 from ...entities.models import EntityDAO
 from ...schemas import Infostar
+from ...schemas.bulk import BulkResult
 from ..resources.models import ResourceDAO
+from . import controllers
 from .schemas import GrantIn, GrantResponse
 
 service_name = Path(__file__).parents[1].name
@@ -54,3 +57,33 @@ async def grant_access(
     return GrantResponse(
         permission=body.permission_name, entity_id=str(entity.id)
     )
+
+
+@router.post("/$grant/bulk", status_code=200)
+async def grant_access_many(
+    grants: list[GrantIn],
+    infostar: Infostar = Depends(authenticate),
+) -> BulkResult:
+    """
+    `$grant` for many items (e.g., one resource for a whole team), in a
+    constant number of queries. Each item is reported by its index: `200`,
+    `404` (resource, service or entity not found) or `409` (already
+    granted).
+    """
+    results = await run_in_threadpool(
+        controllers.grant_many, grants, infostar
+    )
+    return BulkResult.from_results(results)
+
+
+@router.post("/$revoke/bulk", status_code=200)
+async def revoke_access_many(
+    grants: list[GrantIn],
+    infostar: Infostar = Depends(authenticate),
+) -> BulkResult:
+    """
+    Revokes what `$grant` gave, for many items. Each item is reported by
+    its index: `200` or `404` (not found, or not granted).
+    """
+    results = await run_in_threadpool(controllers.revoke_many, grants)
+    return BulkResult.from_results(results)
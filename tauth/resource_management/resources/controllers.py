@@ -1,6 +1,7 @@
 from fastapi import HTTPException
 from fastapi import status as s
 from loguru import logger
+from pydantic import BaseModel
 from pymongo.errors import DuplicateKeyError
 
 from tauth.entities.models import EntityDAO
@@ -51,7 +52,9 @@ def read_many(
     resource_collection: str | None,
     limit: int,
     offset: int,
-) -> list[ResourceDAO]:
+    cursor: str | None = None,
+    fields: list[str] | None = None,
+) -> list[ResourceDAO] | list[BaseModel]:
     filters = {}
     if service_handle:
         filters["service_ref.handle"] = service_handle
@@ -62,6 +65,8 @@ def read_many(
         infostar=infostar,
         limit=limit,
         offset=offset,
+        cursor=cursor,
+        fields=fields,
         model=ResourceDAO,
         **filters,
     )
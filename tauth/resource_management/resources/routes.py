@@ -1,7 +1,8 @@
 from pathlib import Path
 
-from fastapi import APIRouter, Body, Depends, Query
+from fastapi import APIRouter, Body, Depends, Query, Response
 from fastapi import status as s
+from fastapi.responses import StreamingResponse
 from loguru import logger
 from redbaby.pyobjectid import PyObjectId
 
@@ -10,7 +11,7 @@ from tauth.dependencies.authentication import authenticate
 from ...schemas import Infostar
 from ...schemas.gen_fields import GeneratedFields
 from ...settings import Settings
-from ...utils import reading
+from ...utils import reading, serialization
 from . import controllers
 from .models import ResourceDAO
 from .schemas import ResourceIn, ResourceUpdate
@@ -36,20 +37,66 @@ async def create_one(
 @router.get("", status_code=s.HTTP_200_OK)
 @router.get("/", status_code=s.HTTP_200_OK, include_in_schema=False)
 async def read_many(
+    response: Response,
     infostar: Infostar = Depends(authenticate),
     service_handle: str | None = Query(None),
     resource_collection: str | None = Query(None),
     offset: int = Query(0, ge=0),
     limit: int = Query(1024, gt=0, le=1024),
+    cursor: str | None = Query(
+        None,
+        description=(
+            "`X-Next-Cursor` of the previous page, or empty to start paging "
+            "by cursor."
+        ),
+    ),
+    fields: str | None = Query(
+        None, description="Comma-separated fields to return (all by default)."
+    ),
 ) -> list[ResourceDAO]:
     logger.debug(f"Reading many Resources for {infostar.user_handle}")
 
-    return controllers.read_many(
+    resources = controllers.read_many(
         infostar=infostar,
         service_handle=service_handle,
         resource_collection=resource_collection,
         limit=limit,
         offset=offset,
+        cursor=cursor,
+        fields=reading.parse_fields(fields),
+    )
+    reading.set_next_cursor(response, resources, limit, cursor)
+    if fields:
+        # Projected documents would not validate as `ResourceDAO`
+        return serialization.JSONResponse(
+            [r.model_dump(mode="json", by_alias=True) for r in resources],
+            headers=dict(response.headers),
+        )
+    return resources
+
+
+@router.get("/$export", status_code=s.HTTP_200_OK)
+async def export(
+    infostar: Infostar = Depends(authenticate),
+    service_handle: str | None = Query(None),
+    resource_collection: str | None = Query(None),
+    fields: str | None = Query(
+        None, description="Comma-separated fields to export (all by default)."
+    ),
+):
+    """Streams all matching resources as newline-delimited JSON."""
+    filters = {
+        "service_ref.handle": service_handle,
+        "resource_collection": resource_collection,
+    }
+    return StreamingResponse(
+        reading.export(
+            infostar=infostar,
+            model=ResourceDAO,
+            fields=reading.parse_fields(fields),
+            **filters,
+        ),
+        media_type=reading.NDJSON_MEDIA_TYPE,
     )
 
 
@@ -103,6 +150,7 @@ async def update_one(
         infostar=infostar,
         model=ResourceDAO,
         identifier=resource_id,
+        fields=(),
     )
     update = {}
 
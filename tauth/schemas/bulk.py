@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from redbaby.pyobjectid import PyObjectId
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    status: int
+    id: str | PyObjectId | None = None
+    error: str | None = None
+    msg: str | None = None
+
+
+class BulkResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: list[BulkItemResult]
+
+    @classmethod
+    def from_results(cls, results: list[BulkItemResult]) -> "BulkResult":
+        results.sort(key=lambda r: r.index)
+        failed = sum(r.error is not None for r in results)
+        return cls(
+            succeeded=len(results) - failed, failed=failed, results=results
+        )
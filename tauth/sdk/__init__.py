@@ -1,3 +1,5 @@
+from .async_sdk import AsyncTAuthClient
+from .cache import AuthCache
 from .sdk import TAuthClient
 
-__all__ = ["TAuthClient"]
+__all__ = ["AsyncTAuthClient", "AuthCache", "TAuthClient"]
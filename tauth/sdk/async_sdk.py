@@ -0,0 +1,260 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any, TypeVar
+
+import httpx
+import orjson
+
+from ..authz.engines.interface import AuthorizationResponse
+from ..authz.permissions.models import PermissionDAO
+from ..authz.policies.schemas import AuthorizationDataIn
+from ..resource_management.access.schemas import GrantIn, GrantResponse
+from ..resource_management.resources.schemas import ResourceIn
+from ..schemas import Infostar
+from ..schemas.bulk import BulkResult
+from ..schemas.gen_fields import GeneratedFields
+from ..utils import serialization
+from .cache import AuthCache, token_hash
+
+T = TypeVar("T")
+U = TypeVar("U")
+
+
+class AsyncTAuthClient:
+    """
+    `TAuthClient` for asyncio services, with batch helpers.
+
+    Connections are pooled (and multiplexed, with `http2=True`, which needs
+    `httpx[http2]`); `*_many` methods send their requests concurrently, at
+    most `concurrency` at a time, or use TAuth's bulk endpoints.
+
+    Like `TAuthClient`, nothing is cached by default. With a positive
+    `decision_cache_ttl`, identities from `authenticate` and decisions from
+    `authorize` are cached for that many seconds, per token and request;
+    pass a shared `cache` instead to configure it, and run `follow_events`
+    to drop entries as soon as TAuth changes. Use it as an async context
+    manager, or call `aclose`.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        url: str,
+        *,
+        concurrency: int = 10,
+        http2: bool = False,
+        timeout: float = 10,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        decision_cache_ttl: float = 0,
+        decision_cache_size: int = 4096,
+        cache: AuthCache | None = None,
+    ):
+        self.api_key = api_key
+        self.url = url.removesuffix("/")
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+        }
+        self.http_client = httpx.AsyncClient(
+            base_url=self.url,
+            headers=self.headers,
+            http2=http2,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+        )
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._pending: dict[tuple[str, bytes], asyncio.Future] = {}
+        self.cache = cache
+        if cache is None and decision_cache_ttl > 0:
+            self.cache = AuthCache(
+                ttl=decision_cache_ttl, maxsize=decision_cache_size
+            )
+
+    async def __aenter__(self) -> "AsyncTAuthClient":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.http_client.aclose()
+
+    async def create_resource(self, resource: ResourceIn) -> GeneratedFields:
+        response = await self._request(
+            "POST",
+            "/resource_management/resources",
+            json=resource.model_dump(),
+        )
+        return GeneratedFields(**response.json())
+
+    async def create_resources_many(
+        self, resources: Iterable[ResourceIn]
+    ) -> list[GeneratedFields | httpx.HTTPError]:
+        """Creates `resources` concurrently; failures are returned."""
+        return await self._gather(self.create_resource, resources)
+
+    async def grant_access(self, grant: GrantIn) -> GrantResponse:
+        response = await self._request(
+            "POST",
+            "/resource_management/access/$grant",
+            json=grant.model_dump(mode="json"),
+        )
+        return GrantResponse(**response.json())
+
+    async def grant_access_many(
+        self, grants: Iterable[GrantIn]
+    ) -> BulkResult:
+        """Grants all `grants` in a single request."""
+        return await self._bulk(
+            "/resource_management/access/$grant/bulk", grants
+        )
+
+    async def revoke_access_many(
+        self, grants: Iterable[GrantIn]
+    ) -> BulkResult:
+        return await self._bulk(
+            "/resource_management/access/$revoke/bulk", grants
+        )
+
+    async def delete_permission(self, permission_id: str) -> int:
+        response = await self._request(
+            "DELETE", f"/authz/permissions/{permission_id}"
+        )
+        return response.status_code
+
+    async def read_permissions(self, params: dict) -> list[PermissionDAO]:
+        response = await self._request(
+            "GET", "/authz/permissions", params=params
+        )
+        return [PermissionDAO(**x) for x in response.json()]
+
+    async def delete_resource(self, resource_id: str) -> int:
+        response = await self._request(
+            "DELETE", f"/resource_management/resources/{resource_id}"
+        )
+        return response.status_code
+
+    async def remove_permission_from_entity(
+        self, entity_id: str, permission_id: str
+    ) -> int:
+        response = await self._request(
+            "DELETE", f"/entities/{entity_id}/permissions/{permission_id}"
+        )
+        return response.status_code
+
+    async def add_permission_to_entity(
+        self, entity_id: str, permission_id: str
+    ) -> int:
+        response = await self._request(
+            "POST", f"/entities/{entity_id}/permissions/{permission_id}"
+        )
+        return response.status_code
+
+    async def read_entities(self, params: dict) -> list[dict]:
+        response = await self._request("GET", "/entities", params=params)
+        return response.json()
+
+    async def authenticate(self, token: str | None = None) -> Infostar:
+        """Identifies whoever holds `token` (by default, this client)."""
+        token = token or self.api_key
+        if self.cache is not None:
+            cached = self.cache.get_identity(token)
+            if cached is not None:
+                return cached
+        response = await self._request(
+            "POST", "/authn", headers=_authorization(token)
+        )
+        infostar = Infostar(**response.json())
+        if self.cache is not None:
+            self.cache.set_identity(token, infostar)
+        return infostar
+
+    async def authorize(
+        self, authz_data: AuthorizationDataIn, token: str | None = None
+    ) -> AuthorizationResponse:
+        """Decides `authz_data` for `token` (by default, this client)."""
+        token = token or self.api_key
+        body = serialization.dumps(
+            authz_data.model_dump(mode="json"), option=orjson.OPT_SORT_KEYS
+        )
+        if self.cache is not None:
+            cached = self.cache.get_decision(token, body)
+            if cached is not None:
+                return cached
+        # Identical requests made meanwhile wait for the same response
+        key = (token_hash(token), body)
+        pending = self._pending.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        pending = self._pending[key] = asyncio.ensure_future(
+            self._authorize(body, token)
+        )
+        try:
+            result = await asyncio.shield(pending)
+        finally:
+            del self._pending[key]
+        if self.cache is not None:
+            self.cache.set_decision(token, body, result)
+        return result
+
+    async def authorize_many(
+        self, requests: Iterable[AuthorizationDataIn]
+    ) -> list[AuthorizationResponse | httpx.HTTPError]:
+        """Decides `requests` concurrently; failures are returned."""
+        return await self._gather(self.authorize, requests)
+
+    async def follow_events(self) -> None:
+        """
+        Invalidates the cache with TAuth's events, until cancelled; run it
+        as a task.
+        """
+        if self.cache is not None:
+            await self.cache.afollow(self.http_client)
+
+    async def _authorize(
+        self, body: bytes, token: str
+    ) -> AuthorizationResponse:
+        response = await self._request(
+            "POST",
+            "/authz",
+            content=body,
+            headers={
+                **_authorization(token),
+                "Content-Type": "application/json",
+            },
+        )
+        return AuthorizationResponse(**response.json())
+
+    async def _request(
+        self, method: str, path: str, **kwargs: Any
+    ) -> httpx.Response:
+        async with self._semaphore:
+            response = await self.http_client.request(method, path, **kwargs)
+        response.raise_for_status()
+        return response
+
+    async def _bulk(self, path: str, items: Iterable[GrantIn]) -> BulkResult:
+        response = await self._request(
+            "POST",
+            path,
+            json=[item.model_dump(mode="json") for item in items],
+        )
+        return BulkResult(**response.json())
+
+    async def _gather(
+        self, fn: Callable[[T], Awaitable[U]], items: Iterable[T]
+    ) -> list[U | httpx.HTTPError]:
+        async def run(item: T) -> U | httpx.HTTPError:
+            try:
+                return await fn(item)
+            except httpx.HTTPError as e:
+                return e
+
+        return await asyncio.gather(*(run(item) for item in items))
+
+
+def _authorization(token: str) -> dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,183 @@
+"""
+Client-side cache of identities (`Infostar`) and decisions, so that services
+can skip TAuth for tokens they have seen recently.
+
+Entries are kept per token hash (decisions also per request) for at most
+`ttl` seconds, and never past the token's expiry (`exp`, for JWTs). They
+can also be invalidated as soon as TAuth sees a change, by following its
+event stream (`GET /authn/events`, see `tauth.authn.events`) with
+`follow` (in a thread) or `afollow` (in an asyncio task).
+"""
+
+import asyncio
+import hashlib
+import math
+import time
+from contextlib import suppress
+from threading import Lock
+from typing import Any, NamedTuple
+
+import httpx
+import jwt
+from cachetools import TLRUCache
+from loguru import logger
+
+from ..authn.tauth_keys.utils import TauthKeyParseError, parse_key
+from ..authz.engines.interface import AuthorizationResponse
+from ..schemas import Infostar
+from ..utils import serialization
+
+EVENTS_PATH = "/authn/events"
+RETRY_INTERVAL = 5
+# TAuth sends a heartbeat every 15s
+READ_TIMEOUT = 60
+
+
+class Entry(NamedTuple):
+    value: Any
+    # `time.monotonic` deadline
+    expires: float
+    key_id: str | None
+
+
+class AuthCache:
+    def __init__(self, ttl: float = 60, maxsize: int = 4096):
+        self.ttl = ttl
+        self._identities: TLRUCache[str, Entry] = TLRUCache(
+            maxsize, ttu=self._ttu
+        )
+        self._decisions: TLRUCache[tuple[str, str], Entry] = TLRUCache(
+            maxsize, ttu=self._ttu
+        )
+        self._lock = Lock()
+
+    def get_identity(self, token: str) -> Infostar | None:
+        with self._lock:
+            entry = self._identities.get(token_hash(token))
+        return entry.value if entry else None
+
+    def set_identity(self, token: str, infostar: Infostar):
+        with self._lock:
+            self._identities[token_hash(token)] = _entry(token, infostar)
+
+    def get_decision(
+        self, token: str, request: bytes
+    ) -> AuthorizationResponse | None:
+        with self._lock:
+            entry = self._decisions.get(_decision_key(token, request))
+        return entry.value if entry else None
+
+    def set_decision(
+        self, token: str, request: bytes, result: AuthorizationResponse
+    ):
+        with self._lock:
+            key = _decision_key(token, request)
+            self._decisions[key] = _entry(token, result)
+
+    def clear(self):
+        with self._lock:
+            self._identities.clear()
+            self._decisions.clear()
+
+    def apply(self, event: dict):
+        """Invalidates what an event from TAuth makes stale."""
+        logger.debug(f"Cache invalidation event: {event}")
+        type = event.get("type")
+        with self._lock:
+            if type == "key_revoked":
+                for cache in (self._identities, self._decisions):
+                    for key, entry in list(cache.items()):
+                        if entry.key_id == event.get("id"):
+                            cache.pop(key, None)
+            elif type == "access_changed":
+                self._decisions.clear()
+            else:
+                self._identities.clear()
+                self._decisions.clear()
+
+    def follow(self, client: httpx.Client):
+        """Applies TAuth's events until the process exits; blocks."""
+        while True:
+            try:
+                with client.stream(
+                    "GET", EVENTS_PATH, timeout=_stream_timeout()
+                ) as response:
+                    response.raise_for_status()
+                    # Changes may have been missed while disconnected
+                    self.clear()
+                    parser = EventParser()
+                    for line in response.iter_lines():
+                        if (event := parser.feed(line)) is not None:
+                            self.apply(event)
+            except httpx.HTTPError as e:
+                logger.warning(f"TAuth event stream failed: {e}")
+            time.sleep(RETRY_INTERVAL)
+
+    async def afollow(self, client: httpx.AsyncClient):
+        """`follow` for asyncio; run it as a task and cancel it to stop."""
+        while True:
+            try:
+                async with client.stream(
+                    "GET", EVENTS_PATH, timeout=_stream_timeout()
+                ) as response:
+                    response.raise_for_status()
+                    self.clear()
+                    parser = EventParser()
+                    async for line in response.aiter_lines():
+                        if (event := parser.feed(line)) is not None:
+                            self.apply(event)
+            except httpx.HTTPError as e:
+                logger.warning(f"TAuth event stream failed: {e}")
+            await asyncio.sleep(RETRY_INTERVAL)
+
+    def _ttu(self, key: Any, entry: Entry, now: float) -> float:
+        return min(now + self.ttl, entry.expires)
+
+
+def token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class EventParser:
+    """Parses a Server-Sent Events stream, one line at a time."""
+
+    def __init__(self):
+        self._data: list[str] = []
+
+    def feed(self, line: str) -> dict | None:
+        """Returns the event (its JSON `data`) that `line` ends, if any."""
+        line = line.rstrip("\r\n")
+        if line.startswith("data:"):
+            self._data.append(line.removeprefix("data:").strip())
+        elif not line and self._data:
+            data, self._data = "\n".join(self._data), []
+            return serialization.loads(data)
+        return None
+
+
+def _decision_key(token: str, request: bytes) -> tuple[str, str]:
+    return token_hash(token), hashlib.sha256(request).hexdigest()
+
+
+def _entry(token: str, value: Any) -> Entry:
+    key_id = None
+    if token.startswith("TAUTH_"):
+        with suppress(TauthKeyParseError):
+            key_id, _ = parse_key(token)
+    return Entry(value=value, expires=_expires(token), key_id=key_id)
+
+
+def _expires(token: str) -> float:
+    """When `token` expires, as a `time.monotonic` deadline."""
+    try:
+        claims = jwt.decode(token, options={"verify_signature": False})
+    except jwt.PyJWTError:
+        return math.inf
+    exp = claims.get("exp")
+    if not isinstance(exp, int | float):
+        return math.inf
+    return time.monotonic() + (exp - time.time())
+
+
+def _stream_timeout() -> httpx.Timeout:
+    return httpx.Timeout(10, read=READ_TIMEOUT)
@@ -1,21 +1,30 @@
 from collections.abc import Iterable
 
 import httpx
+import orjson
 
+from ..authz.engines.interface import AuthorizationResponse
 from ..authz.permissions.models import PermissionDAO
+from ..authz.policies.schemas import AuthorizationDataIn
 from ..resource_management.access.schemas import GrantIn, GrantResponse
 from ..resource_management.resources.schemas import ResourceIn
+from ..schemas import Infostar
 from ..schemas.gen_fields import GeneratedFields
+from ..utils import serialization
+from .cache import AuthCache
 
 
 class TAuthClient:
-    def __init__(self, api_key: str, url: str):
+    def __init__(
+        self, api_key: str, url: str, cache: AuthCache | None = None
+    ):
         self.api_key = api_key
         self.url = url.removesuffix("/")
         self.headers = {
             "Authorization": f"Bearer {api_key}",
         }
         self.http_client = httpx.Client(base_url=url, headers=self.headers)
+        self.cache = cache
 
     def create_resource(self, resource: ResourceIn) -> GeneratedFields:
         response = self.http_client.post(
@@ -69,3 +78,51 @@ class TAuthClient:
         response = self.http_client.get("/entities", params=params)
         response.raise_for_status()
         return response.json()
+
+    def authenticate(self, token: str | None = None) -> Infostar:
+        token = token or self.api_key
+        if self.cache is not None:
+            cached = self.cache.get_identity(token)
+            if cached is not None:
+                return cached
+        response = self.http_client.post(
+            "/authn", headers={"Authorization": f"Bearer {token}"}
+        )
+        response.raise_for_status()
+        infostar = Infostar(**response.json())
+        if self.cache is not None:
+            self.cache.set_identity(token, infostar)
+        return infostar
+
+    def authorize(
+        self, authz_data: AuthorizationDataIn, token: str | None = None
+    ) -> AuthorizationResponse:
+        token = token or self.api_key
+        body = serialization.dumps(
+            authz_data.model_dump(mode="json"), option=orjson.OPT_SORT_KEYS
+        )
+        if self.cache is not None:
+            cached = self.cache.get_decision(token, body)
+            if cached is not None:
+                return cached
+        response = self.http_client.post(
+            "/authz",
+            content=body,
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json",
+            },
+        )
+        response.raise_for_status()
+        result = AuthorizationResponse(**response.json())
+        if self.cache is not None:
+            self.cache.set_decision(token, body, result)
+        return result
+
+    def follow_events(self):
+        """
+        Invalidates the cache with TAuth's events; blocks, so run it in a
+        daemon thread.
+        """
+        if self.cache is not None:
+            self.cache.follow(self.http_client)
@@ -5,6 +5,7 @@ from pydantic import computed_field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from .authn import remote as authn_remote
+from .authz.engines import embedded as authz_embedded
 from .authz.engines import opa as authz_opa
 from .authz.engines import remote as authz_remote
 
@@ -24,7 +25,11 @@ class Settings(BaseSettings):
     # Security
     ROOT_API_KEY: str = "MELT_/--default--1"
     AUTHN_ENGINE: Literal["database", "remote"]
-    AUTHZ_ENGINE: Literal["opa", "remote"]
+    AUTHZ_ENGINE: Literal["opa", "remote", "embedded"]
+    AUTHZ_CONTEXT_MAX_BODY_SIZE: int = 64 * 1024
+    AUTHZ_INPUT_PROJECTION: bool = True
+    AUTHZ_INPUT_PROJECTION_REFRESH: int = 10
+    AUTHZ_DECISION_LOG_SAMPLE_RATE: float = 0.0
 
     @computed_field
     @property
@@ -35,11 +40,17 @@ class Settings(BaseSettings):
     @property
     def AUTHZ_ENGINE_SETTINGS(
         self,
-    ) -> authz_opa.OPASettings | authz_remote.RemoteSettings:
+    ) -> (
+        authz_opa.OPASettings
+        | authz_remote.RemoteSettings
+        | authz_embedded.EmbeddedSettings
+    ):
         if self.AUTHZ_ENGINE == "opa":
             return authz_opa.OPASettings()
         elif self.AUTHZ_ENGINE == "remote":
             return authz_remote.RemoteSettings()  # type: ignore
+        elif self.AUTHZ_ENGINE == "embedded":
+            return authz_embedded.EmbeddedSettings()
         else:
             raise ValueError("Invalid AUTHZ_ENGINE_SETTINGS value")
 
@@ -1,4 +1,5 @@
-from typing import Type, TypeVar
+from collections.abc import Sequence
+from typing import TypeVar
 
 from fastapi import HTTPException
 from pydantic import BaseModel
@@ -7,11 +8,15 @@ from redbaby.document import Document
 
 from ..schemas import Infostar
 from ..settings import Settings
+from . import serialization
+from .reading import NDJSON_MEDIA_TYPE
 
 T = TypeVar("T", bound=Document)
 
+DUPLICATE_KEY = 11000
 
-def create_one(item_in: BaseModel, model: Type[T], infostar: Infostar) -> T:
+
+def create_one(item_in: BaseModel, model: type[T], infostar: Infostar) -> T:
     item = model(**item_in.model_dump(), created_by=infostar)  # type: ignore
     try:
         res = model.collection(alias=Settings.get().REDBABY_ALIAS).insert_one(
@@ -27,3 +32,53 @@ def create_one(item_in: BaseModel, model: Type[T], infostar: Infostar) -> T:
     # TODO: add logging
     # TODO: add event tracking
     return item
+
+
+def create_many(
+    items_in: Sequence[BaseModel], model: type[T], infostar: Infostar
+) -> tuple[list[T], dict[int, dict]]:
+    """
+    Inserts all `items_in` at once, with `insert_many(ordered=False)`, so
+    that one failed item (e.g., a duplicate) does not stop the others.
+
+    Returns the items and the errors of those not inserted, by index.
+    """
+    items = [
+        model(**item_in.model_dump(), created_by=infostar)  # type: ignore
+        for item_in in items_in
+    ]
+    if not items:
+        return items, {}
+    errors: dict[int, dict] = {}
+    try:
+        model.collection(alias=Settings.get().REDBABY_ALIAS).insert_many(
+            [item.bson() for item in items], ordered=False
+        )
+    except pymongo_errors.BulkWriteError as e:
+        for error in e.details.get("writeErrors", []):
+            duplicate = error.get("code") == DUPLICATE_KEY
+            errors[error["index"]] = {
+                "error": "DuplicateKeyError" if duplicate else "WriteError",
+                "msg": error.get("errmsg"),
+                "details": error.get("keyValue"),
+            }
+    return items, errors
+
+
+def parse_items(body: bytes, content_type: str | None) -> list:
+    """Items of a bulk request, sent as NDJSON or as a JSON array."""
+    try:
+        if content_type and content_type.startswith(NDJSON_MEDIA_TYPE):
+            return [
+                serialization.loads(line)
+                for line in body.splitlines()
+                if line.strip()
+            ]
+        items = serialization.loads(body)
+    except ValueError as e:
+        d = {"error": "InvalidBody", "msg": f"Invalid JSON: {e}."}
+        raise HTTPException(status_code=400, detail=d)
+    if not isinstance(items, list):
+        d = {"error": "InvalidBody", "msg": "Expected a JSON array."}
+        raise HTTPException(status_code=400, detail=d)
+    return items
@@ -0,0 +1,120 @@
+"""
+Request-scoped identity map for DAO lookups.
+
+The map is attached to `request.state.identity_map` and bound to the current
+execution context, so DAO classmethods can consult it without receiving the
+request object. Lookups made outside of a request (e.g., startup, scripts)
+always hit the database.
+"""
+
+from collections.abc import Callable, Hashable, Iterable
+from contextvars import ContextVar
+from typing import Any, TypeVar
+
+from fastapi import Request
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class IdentityMap:
+    """Documents already read during the current request, keyed by namespace."""
+
+    def __init__(self):
+        self._items: dict[tuple[str, Hashable], Any] = {}
+
+    def __contains__(self, item: tuple[str, Hashable]) -> bool:
+        return item in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, namespace: str, key: Hashable, default: Any = None) -> Any:
+        return self._items.get((namespace, key), default)
+
+    def set(self, namespace: str, key: Hashable, value: Any) -> None:
+        self._items[(namespace, key)] = value
+
+    def discard(self, namespace: str, key: Hashable) -> None:
+        self._items.pop((namespace, key), None)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def get_or_load(
+        self, namespace: str, key: Hashable, loader: Callable[[], V | None]
+    ) -> V | None:
+        """
+        Returns the cached value or calls `loader` to read it.
+
+        Missing documents (`None`) are not cached so that documents created
+        later in the same request can still be found.
+        """
+        if (namespace, key) in self._items:
+            return self._items[(namespace, key)]
+        value = loader()
+        if value is not None:
+            self._items[(namespace, key)] = value
+        return value
+
+    def get_many_or_load(
+        self,
+        namespace: str,
+        keys: Iterable[K],
+        loader: Callable[[list[K]], dict[K, V]],
+    ) -> dict[K, V]:
+        """Returns cached values and loads all missing keys in one call."""
+        found: dict[K, V] = {}
+        # Ordered and constant-time to check, for long lists of keys
+        missing: dict[K, None] = {}
+        for key in keys:
+            if (namespace, key) in self._items:
+                found[key] = self._items[(namespace, key)]
+            else:
+                missing[key] = None
+        if missing:
+            loaded = loader(list(missing))
+            for key, value in loaded.items():
+                self._items[(namespace, key)] = value
+            found |= loaded
+        return found
+
+
+_CURRENT: ContextVar[IdentityMap | None] = ContextVar(
+    "tauth_identity_map", default=None
+)
+
+
+def bind(request: Request) -> IdentityMap:
+    """Attaches an identity map to the request (once) and activates it."""
+    identity_map = getattr(request.state, "identity_map", None)
+    if identity_map is None:
+        identity_map = IdentityMap()
+        request.state.identity_map = identity_map
+    _CURRENT.set(identity_map)
+    return identity_map
+
+
+def current() -> IdentityMap | None:
+    return _CURRENT.get()
+
+
+def get_or_load(
+    namespace: str, key: Hashable, loader: Callable[[], V | None]
+) -> V | None:
+    identity_map = _CURRENT.get()
+    if identity_map is None:
+        return loader()
+    return identity_map.get_or_load(namespace, key, loader)
+
+
+def get_many_or_load(
+    namespace: str,
+    keys: Iterable[K],
+    loader: Callable[[list[K]], dict[K, V]],
+) -> dict[K, V]:
+    identity_map = _CURRENT.get()
+    if identity_map is None:
+        unique_keys = list(dict.fromkeys(keys))
+        return loader(unique_keys) if unique_keys else {}
+    return identity_map.get_many_or_load(namespace, keys, loader)
@@ -0,0 +1,151 @@
+"""
+In-process metrics exposed in the Prometheus text format.
+
+Metrics are kept per process: with several workers, each one reports its own
+values (scrape them individually or run a single worker behind the scraper).
+"""
+
+import bisect
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from threading import Lock
+
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+REGISTRY: list["Counter | Histogram"] = []
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    labels = ",".join(
+        f'{name}="{escape(value)}"'
+        for name, value in zip(names, values, strict=True)
+    )
+    return "{" + labels + "}"
+
+
+def escape(value: str) -> str:
+    return (
+        value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+    )
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} counter",
+        ]
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            labels = format_labels(self.labelnames, key)
+            lines.append(f"{self.name}{labels} {value}")
+        return "\n".join(lines)
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: counts per bucket (plus +Inf), sum of observations
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]]
+        self._values = {}
+        self._lock = Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = ([0] * (len(self.buckets) + 1), [0.0])
+                self._values[key] = series
+            series[0][index] += 1
+            series[1][0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            values = [
+                (key, list(counts), total[0])
+                for key, (counts, total) in self._values.items()
+            ]
+        names = (*self.labelnames, "le")
+        for key, counts, total in values:
+            cumulative = 0
+            bounds = [*map(str, self.buckets), "+Inf"]
+            for bound, count in zip(bounds, counts, strict=True):
+                cumulative += count
+                labels = format_labels(names, (*key, bound))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return "\n".join(lines)
+
+
+def render() -> str:
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+AUTHZ_PHASE_SECONDS = Histogram(
+    "tauth_authz_phase_seconds",
+    "Time spent in each phase of an authorization decision.",
+    ("phase", "policy_name", "rule", "engine"),
+)
+AUTHZ_DECISIONS = Counter(
+    "tauth_authz_decisions_total",
+    "Authorization decisions by result.",
+    ("policy_name", "rule", "engine", "authorized"),
+)
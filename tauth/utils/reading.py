@@ -1,30 +1,168 @@
-from collections.abc import Callable, Iterable
-from typing import Any, TypeVar
+import base64
+import binascii
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from functools import cache
+from typing import Any, TypeVar, overload
 
-from fastapi import HTTPException
-from pydantic import BaseModel
+import orjson
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException, Response
+from pydantic import BaseModel, Field, create_model
 from redbaby.behaviors import ReadingMixin
 from redbaby.pyobjectid import PyObjectId
 
 from ..schemas import Infostar
 from ..settings import Settings
+from . import serialization
 
 T = TypeVar("T", bound=ReadingMixin)
 Z = TypeVar("Z", bound=BaseModel)
 U = TypeVar("U")
 X = TypeVar("X")
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Lines are sent in chunks of about this size
+EXPORT_CHUNK_SIZE = 64 * 1024
 
+
+def encode_cursor(id: ObjectId | str) -> str:
+    """Opaque token for the page after the document with `id`."""
+    value = ["oid", str(id)] if isinstance(id, ObjectId) else ["str", id]
+    return base64.urlsafe_b64encode(orjson.dumps(value)).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> ObjectId | str:
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        kind, value = orjson.loads(base64.urlsafe_b64decode(cursor + padding))
+        if kind == "oid":
+            return ObjectId(value)
+        if kind == "str" and isinstance(value, str):
+            return value
+    except (binascii.Error, InvalidId, TypeError, ValueError):
+        pass
+    d = {"error": "InvalidCursor", "msg": f"Invalid cursor: {cursor!r}."}
+    raise HTTPException(status_code=400, detail=d)
+
+
+def projection_model(
+    model: type[BaseModel], fields: Sequence[str]
+) -> type[BaseModel]:
+    """
+    Model with only `fields` of `model`, plus its `id`.
+
+    Fields are optional, as projected documents may lack them; unknown
+    fields are rejected.
+    """
+    return _projection_model(model, tuple(dict.fromkeys(("id", *fields))))
+
+
+@cache
+def _projection_model(
+    model: type[BaseModel], fields: tuple[str, ...]
+) -> type[BaseModel]:
+    definitions: dict[str, Any] = {}
+    for name in fields:
+        field = model.model_fields.get(name)
+        if field is not None:
+            annotation = field.annotation | None  # type: ignore[operator]
+            definitions[name] = (annotation, Field(None, alias=field.alias))
+        elif name == "id":
+            # Computed from other fields (e.g., `HashIdMixin`), yet stored
+            definitions[name] = (str | None, Field(None, alias="_id"))
+        else:
+            d = {"error": "InvalidField", "msg": f"Unknown field: {name!r}."}
+            raise HTTPException(status_code=400, detail=d)
+    return create_model(f"{model.__name__}Fields", **definitions)
+
+
+def get_projection(projected: type[BaseModel]) -> dict[str, int]:
+    return {
+        field.alias or name: 1
+        for name, field in projected.model_fields.items()
+    }
+
+
+@overload
 def read_many(
     infostar: Infostar,
     model: type[T],
     limit: Any = 0,
     offset: Any = 0,
+    cursor: str | None = None,
+    fields: None = None,
     **filters,
-) -> list[T]:
+) -> list[T]: ...
+
+
+@overload
+def read_many(
+    infostar: Infostar,
+    model: type[T],
+    limit: Any = 0,
+    offset: Any = 0,
+    cursor: str | None = None,
+    *,
+    fields: Sequence[str],
+    **filters,
+) -> list[BaseModel]: ...
+
+
+@overload
+def read_many(
+    infostar: Infostar,
+    model: type[T],
+    limit: Any = 0,
+    offset: Any = 0,
+    cursor: str | None = None,
+    *,
+    fields: Sequence[str] | None,
+    **filters,
+) -> list[T] | list[BaseModel]: ...
+
+
+def read_many(
+    infostar: Infostar,
+    model: type[T],
+    limit: Any = 0,
+    offset: Any = 0,
+    cursor: str | None = None,
+    fields: Sequence[str] | None = None,
+    **filters,
+) -> list[T] | list[BaseModel]:
+    """
+    Documents matching `filters`.
+
+    With a `cursor`, documents are read in `_id` order: pass `""` for the
+    first page, then the cursor of the previous page (see `set_next_cursor`)
+    to read the next one. Pages start from an index seek, so deep pages cost
+    the same as the first one, unlike with `offset`. Without one, documents
+    are read unsorted, as before cursors existed.
+
+    With `fields`, only those fields are read and validated, into a
+    `projection_model` instead of `model`.
+    """
     query = {k: v for k, v in filters.items() if v is not None}
+    if cursor:
+        after = {"_id": {"$gt": decode_cursor(cursor)}}
+        query = {"$and": [query, after]} if "_id" in query else query | after
+    sort = [("_id", 1)] if cursor is not None else None
     limit = int(limit)
     offset = int(offset)
+    if fields is not None:
+        projected = projection_model(model, fields)
+        documents = model.collection(
+            alias=Settings.get().REDBABY_ALIAS
+        ).find(
+            query,
+            projection=get_projection(projected),
+            limit=limit,
+            skip=offset,
+            sort=sort,
+        )
+        return [projected.model_validate(d) for d in documents]
     objs = model.find(
         filter=query,
         alias=Settings.get().REDBABY_ALIAS,
@@ -32,18 +170,104 @@ def read_many(
         lazy=False,
         limit=limit,
         skip=offset,
+        sort=sort,
     )
     return objs
 
 
+def set_next_cursor(
+    response: Response,
+    objs: Sequence[Any],
+    limit: int,
+    cursor: str | None,
+):
+    """
+    Sets the cursor of the next page, if the current one is full and was
+    read by `cursor` (only then are pages in `_id` order).
+    """
+    if cursor is not None and limit and len(objs) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(objs[-1].id)
+
+
+def parse_fields(fields: str | None) -> list[str] | None:
+    """Fields from a comma-separated `fields` query parameter."""
+    if not fields:
+        return None
+    return [f for f in (f.strip() for f in fields.split(",")) if f]
+
+
+def export(
+    infostar: Infostar,
+    model: type[T],
+    fields: list[str] | None = None,
+    **filters,
+) -> Iterator[bytes]:
+    """
+    Documents matching `filters` as NDJSON.
+
+    Documents are read lazily from the cursor and written as stored, without
+    validation, so memory use does not grow with the collection. With
+    `fields`, only those fields (and `_id`) are read; unknown fields are
+    rejected, as in `read_many`.
+    """
+    query = {k: v for k, v in filters.items() if v is not None}
+    projection = None
+    if fields:
+        # Checked here, not in the generator: once the response has started,
+        # errors can no longer be returned
+        projection = get_projection(projection_model(model, fields))
+    cursor = model.collection(alias=Settings.get().REDBABY_ALIAS).find(
+        query, projection=projection
+    )
+    return _export(cursor)
+
+
+def _export(cursor: Any) -> Iterator[bytes]:
+    chunk = bytearray()
+    with cursor:
+        for document in cursor:
+            chunk += serialization.dumps(document)
+            chunk += b"\n"
+            if len(chunk) >= EXPORT_CHUNK_SIZE:
+                yield bytes(chunk)
+                chunk.clear()
+    if chunk:
+        yield bytes(chunk)
+
+
+@overload
 def read_one(
-    infostar: Infostar, model: type[T], identifier: PyObjectId | str
-) -> T:
+    infostar: Infostar,
+    model: type[T],
+    identifier: PyObjectId | str,
+    fields: None = None,
+) -> T: ...
+
+
+@overload
+def read_one(
+    infostar: Infostar,
+    model: type[T],
+    identifier: PyObjectId | str,
+    fields: Sequence[str],
+) -> BaseModel: ...
+
+
+def read_one(
+    infostar: Infostar,
+    model: type[T],
+    identifier: PyObjectId | str,
+    fields: Sequence[str] | None = None,
+) -> T | BaseModel:
     if isinstance(identifier, str):
         identifier = PyObjectId(identifier)
     filters = {"_id": identifier}
+    projected = projection = None
+    if fields is not None:
+        projected = projection_model(model, fields)
+        projection = get_projection(projected)
     item = model.collection(alias=Settings.get().REDBABY_ALIAS).find_one(
-        filters
+        filters, projection=projection
     )
     if not item:
         d = {
@@ -51,20 +275,41 @@ def read_one(
             "msg": f"Document with filters={filters} not found.",
         }
         raise HTTPException(status_code=404, detail=d)
+    if projected is not None:
+        return projected.model_validate(item)
     item = model.model_validate(item)
     return item
 
 
-def read_one_filters(infostar: Infostar, model: type[T], **filters) -> T:
-    print(filters)
+@overload
+def read_one_filters(
+    infostar: Infostar, model: type[T], fields: None = None, **filters
+) -> T: ...
+
+
+@overload
+def read_one_filters(
+    infostar: Infostar, model: type[T], *, fields: Sequence[str], **filters
+) -> BaseModel: ...
+
+
+def read_one_filters(
+    infostar: Infostar,
+    model: type[T],
+    fields: Sequence[str] | None = None,
+    **filters,
+) -> T | BaseModel:
     f = {k: v for k, v in filters.items() if v is not None}
-    items = model.find(
-        f,
-        alias=Settings.get().REDBABY_ALIAS,
-        validate=True,
-        lazy=False,
+    projected = projection = None
+    if fields is not None:
+        projected = projection_model(model, fields)
+        projection = get_projection(projected)
+    # Two documents are enough to tell that the filters are not unique
+    items = list(
+        model.collection(alias=Settings.get().REDBABY_ALIAS).find(
+            f, projection=projection, limit=2
+        )
     )
-    print(items)
     if not items:
         d = {
             "error": "DocumentNotFound",
@@ -78,7 +323,9 @@ def read_one_filters(infostar: Infostar, model: type[T], **filters) -> T:
         }
         raise HTTPException(status_code=409, detail=d)
 
-    return items[0]
+    if projected is not None:
+        return projected.model_validate(items[0])
+    return model.model_validate(items[0])
 
 
 def aggregate(
@@ -0,0 +1,41 @@
+"""
+JSON serialization for authorization payloads and API responses.
+
+Built on orjson, which natively encodes datetimes, enums and dataclasses;
+ObjectIds, sets and pydantic models are handled by `_default`. See
+`scripts/benchmark-serialization.py` for a comparison with the stdlib.
+"""
+
+from typing import Any
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse as FastAPIJSONResponse
+from pydantic import BaseModel
+
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, set | frozenset):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(obj: Any, option: int = 0) -> bytes:
+    return orjson.dumps(obj, default=_default, option=OPTIONS | option)
+
+
+def loads(data: bytes | bytearray | memoryview | str) -> Any:
+    return orjson.loads(data)
+
+
+class JSONResponse(FastAPIJSONResponse):
+    """Response class for routes on the authorization hot path."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,7 +1,32 @@
-from pydantic import BaseModel
+from typing import Any
+
+from pydantic import BaseModel, ValidatorFunctionWrapHandler, model_validator
+from redbaby.behaviors.hashids import HashIdMixin
 
 from ..schemas import Infostar
 
 
 class Authoring(BaseModel):
     created_by: Infostar
+
+
+class StoredHashIdMixin(HashIdMixin):
+    """
+    `HashIdMixin` that trusts the `_id` of documents read from the database.
+
+    Hashing the `hashable_fields` costs an order of magnitude more than
+    validating the whole document, and the id is hashed again whenever a
+    model is dumped (e.g., every entity in a response). Documents that are
+    read already carry it, as `_id`.
+    """
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def _use_stored_id(
+        cls, data: Any, handler: ValidatorFunctionWrapHandler
+    ) -> Any:
+        obj = handler(data)
+        if isinstance(data, dict) and isinstance(data.get("_id"), str):
+            # Seeds the `cached_property` behind the computed field
+            obj.__dict__["id"] = data["_id"]
+        return obj
@@ -0,0 +1,172 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+from fastapi import BackgroundTasks, Depends, FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from tauth.authz.engines.factory import AuthorizationEngine
+from tauth.authz.engines.interface import (
+    AuthorizationInterface,
+    AuthorizationResponse,
+)
+from tauth.authz.policies.projection import (
+    InputProjection,
+    PolicyInputProjections,
+)
+from tauth.authz.policies.schemas import AuthorizationDataIn
+from tauth.dependencies.authentication import authenticate
+from tauth.dependencies.authorization import authz
+from tauth.entities.models import EntityDAO
+from tauth.schemas.infostar import Infostar
+
+ENTITY = EntityDAO.model_construct(handle="user@teialabs.com", type="user")
+
+
+class Engine(AuthorizationInterface):
+    def __init__(self):
+        self.contexts: list[dict] = []
+
+    def is_authorized(self, policy_name, rule, context=None, **kwargs):
+        self.contexts.append(context)
+        return AuthorizationResponse(
+            authorized=context.get("entity", {}).get("handle") != "denied",
+            details={},
+        )
+
+    def upsert_policy(self, policy_name, policy_content, **kwargs):
+        return True
+
+    def delete_policy(self, policy_name):
+        return True
+
+
+@pytest.fixture
+def engine(monkeypatch) -> Engine:
+    engine = Engine()
+    monkeypatch.setattr(
+        AuthorizationEngine, "get", classmethod(lambda cls: engine)
+    )
+    return engine
+
+
+@pytest.fixture
+def entities(monkeypatch) -> list[str]:
+    loaded = []
+
+    def from_handle(cls, handle, owner_handle):
+        loaded.append(handle)
+        if handle == "missing@teialabs.com":
+            return None
+        return ENTITY.model_copy(update={"handle": handle})
+
+    monkeypatch.setattr(EntityDAO, "from_handle", classmethod(from_handle))
+    return loaded
+
+
+def use_projection(monkeypatch, tree):
+    monkeypatch.setattr(
+        PolicyInputProjections,
+        "get",
+        classmethod(lambda cls, name: InputProjection(tree)),
+    )
+
+
+def make_request(user_handle: str) -> Request:
+    request = Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "headers": [],
+            "query_string": b"",
+        }
+    )
+    request.state.infostar = Infostar(
+        request_id=ObjectId(),
+        authprovider_type="auth0",
+        authprovider_org="/teialabs",
+        extra={},
+        service_handle="tauth",
+        user_handle=user_handle,
+        user_owner_handle="/teialabs",
+        client_ip="127.0.0.1",
+    )
+    return request
+
+
+def authorize(dependency, user_handle: str) -> AuthorizationResponse:
+    request = make_request(user_handle)
+    return asyncio.run(
+        dependency(request, BackgroundTasks(), request.state.infostar)
+    )
+
+
+AUTHZ_DATA = AuthorizationDataIn(
+    context={"static": True}, policy_name="example", rule="allow"
+)
+
+
+def test_policy_reading_entity(monkeypatch, engine, entities):
+    use_projection(monkeypatch, {"entity": {"handle": True}})
+    dependency = authz(AUTHZ_DATA)
+    assert authorize(dependency, "user@teialabs.com").authorized
+    assert engine.contexts == [
+        {"static": True, "entity": {"handle": "user@teialabs.com"}}
+    ]
+    with pytest.raises(HTTPException) as e:
+        authorize(dependency, "denied")
+    assert e.value.status_code == 403
+
+
+def test_policy_not_reading_entity(monkeypatch, engine, entities):
+    use_projection(monkeypatch, {"static": True})
+    dependency = authz(AUTHZ_DATA)
+    assert authorize(dependency, "user@teialabs.com").authorized
+    assert entities == ["user@teialabs.com"]
+    assert engine.contexts == [{"static": True}]
+    with pytest.raises(HTTPException) as e:
+        authorize(dependency, "missing@teialabs.com")
+    assert e.value.status_code == 401
+
+
+def test_decision_cache(monkeypatch, engine, entities):
+    use_projection(monkeypatch, {"entity": {"handle": True}})
+    dependency = authz(AUTHZ_DATA, cache_ttl=60)
+    for _ in range(2):
+        authorize(dependency, "user@teialabs.com")
+        with pytest.raises(HTTPException):
+            authorize(dependency, "denied")
+    assert len(engine.contexts) == 2
+    assert entities == ["user@teialabs.com", "denied"]
+
+
+def test_no_decision_cache_when_reading_request(
+    monkeypatch, engine, entities
+):
+    use_projection(monkeypatch, {"request": {"method": True}})
+    dependency = authz(AUTHZ_DATA, cache_ttl=60)
+    for _ in range(2):
+        authorize(dependency, "user@teialabs.com")
+    context = {"static": True, "request": {"method": "GET"}}
+    assert engine.contexts == [context, context]
+
+
+def test_route_dependency_authenticates(monkeypatch, engine, entities):
+    use_projection(monkeypatch, {"entity": {"handle": True}})
+    app = FastAPI()
+
+    @app.get("/", dependencies=[Depends(authz(AUTHZ_DATA))])
+    def route():
+        return {}
+
+    # Without `init_app`/`init_router`, `authz` runs `authenticate` itself
+    def authenticated(request: Request) -> Infostar:
+        infostar = make_request("user@teialabs.com").state.infostar
+        request.state.infostar = infostar
+        return infostar
+
+    app.dependency_overrides[authenticate] = authenticated
+    response = TestClient(app).get("/")
+    assert response.status_code == 200
+    assert entities == ["user@teialabs.com"]
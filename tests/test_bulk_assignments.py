@@ -0,0 +1,121 @@
+import pytest
+from bson import ObjectId
+
+from tauth.authz.permissions.models import PermissionDAO
+from tauth.authz.roles.models import RoleDAO
+from tauth.entities import controllers
+from tauth.entities.models import EntityDAO
+from tauth.entities.schemas import EntityPermissionIn, EntityRoleIn
+
+from .utils import Collection, count_calls, patch_collection
+
+ADMIN, VIEWER, OTHER_ADMIN = ObjectId(), ObjectId(), ObjectId()
+READ, WRITE = ObjectId(), ObjectId()
+
+
+@pytest.fixture
+def collections(monkeypatch) -> dict[type, Collection]:
+    documents = {
+        EntityDAO: [
+            {
+                "_id": "alice",
+                "roles": [{"id": ADMIN}],
+                "permissions": [READ],
+            },
+            {"_id": "bob", "roles": [], "permissions": []},
+        ],
+        RoleDAO: [
+            {"_id": ADMIN, "name": "admin"},
+            {"_id": VIEWER, "name": "viewer"},
+            {"_id": OTHER_ADMIN, "name": "admin"},
+        ],
+        PermissionDAO: [{"_id": READ}, {"_id": WRITE}],
+    }
+    for model, stored in documents.items():
+        patch_collection(monkeypatch, model, Collection(stored))
+    return {model: model.collection(alias="tauth") for model in documents}
+
+
+@pytest.fixture
+def entities(collections) -> Collection:
+    return collections[EntityDAO]
+
+
+def writes(entities: Collection) -> list[list]:
+    calls = entities.calls_to("bulk_write")
+    assert not any(call["ordered"] for call in calls)
+    return [call["requests"] for call in calls]
+
+
+def statuses(results) -> list[int]:
+    return [r.status for r in results]
+
+
+def test_assign_roles(entities, collections):
+    pairs = [
+        EntityRoleIn(entity_id="alice", role_id=VIEWER),
+        EntityRoleIn(entity_id="alice", role_id=OTHER_ADMIN),
+        EntityRoleIn(entity_id="bob", role_id=ADMIN),
+        EntityRoleIn(entity_id="bob", role_id=OTHER_ADMIN),
+        EntityRoleIn(entity_id="bob", role_id=ObjectId()),
+        EntityRoleIn(entity_id="carol", role_id=VIEWER),
+    ]
+    results = controllers.assign_roles(pairs)
+
+    assert statuses(results) == [200, 409, 200, 409, 404, 404]
+    assert count_calls(collections.values()) == 3
+    (write,) = writes(entities)
+    assert [op._filter for op in write] == [{"_id": "alice"}, {"_id": "bob"}]
+    assert write[1]._doc == {
+        "$addToSet": {"roles": {"$each": [{"id": ADMIN}]}}
+    }
+
+
+def test_revoke_roles(entities, collections):
+    pairs = [
+        EntityRoleIn(entity_id="alice", role_id=ADMIN),
+        EntityRoleIn(entity_id="alice", role_id=ADMIN),
+        EntityRoleIn(entity_id="bob", role_id=ADMIN),
+    ]
+    results = controllers.revoke_roles(pairs)
+
+    assert statuses(results) == [200, 404, 404]
+    assert count_calls(collections.values()) == 2
+    (write,) = writes(entities)
+    assert write[0]._doc == {"$pull": {"roles": {"id": {"$in": [ADMIN]}}}}
+
+
+def test_assign_permissions(entities, collections):
+    pairs = [
+        EntityPermissionIn(entity_id="alice", permission_id=READ),
+        EntityPermissionIn(entity_id="alice", permission_id=WRITE),
+        EntityPermissionIn(entity_id="bob", permission_id=WRITE),
+        EntityPermissionIn(entity_id="bob", permission_id=WRITE),
+        EntityPermissionIn(entity_id="bob", permission_id=ObjectId()),
+    ]
+    results = controllers.assign_permissions(pairs)
+
+    assert statuses(results) == [409, 200, 200, 409, 404]
+    assert count_calls(collections.values()) == 3
+    (write,) = writes(entities)
+    assert len(write) == 2
+
+
+def test_revoke_permissions(entities, collections):
+    pairs = [
+        EntityPermissionIn(entity_id="alice", permission_id=READ),
+        EntityPermissionIn(entity_id="bob", permission_id=READ),
+    ]
+    results = controllers.revoke_permissions(pairs)
+
+    assert statuses(results) == [200, 404]
+    (write,) = writes(entities)
+    assert write[0]._doc == {"$pull": {"permissions": {"$in": [READ]}}}
+
+
+def test_nothing_to_write(entities, collections):
+    results = controllers.revoke_roles(
+        [EntityRoleIn(entity_id="carol", role_id=ADMIN)]
+    )
+    assert statuses(results) == [404]
+    assert writes(entities) == []
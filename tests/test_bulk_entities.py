@@ -0,0 +1,74 @@
+import asyncio
+
+import orjson
+import pytest
+
+from tauth.entities import routes
+from tauth.entities.models import EntityDAO
+
+from .utils import INFOSTAR, Collection, patch_collection
+
+ORGANIZATION = {"_id": "org", "type": "organization", "handle": "/teialabs"}
+
+
+class Request:
+    def __init__(self, body: bytes, content_type: str):
+        self._body = body
+        self.headers = {"content-type": content_type}
+
+    async def body(self) -> bytes:
+        return self._body
+
+
+@pytest.fixture
+def collection(monkeypatch) -> Collection:
+    collection = Collection([ORGANIZATION])
+    patch_collection(monkeypatch, EntityDAO, collection)
+    return collection
+
+
+def create_many(items: list, ndjson: bool = False):
+    if ndjson:
+        body = b"\n".join(orjson.dumps(item) for item in items) + b"\n"
+        request = Request(body, "application/x-ndjson")
+    else:
+        request = Request(orjson.dumps(items), "application/json")
+    return asyncio.run(routes.create_many(request, infostar=INFOSTAR))
+
+
+@pytest.mark.parametrize("ndjson", [False, True])
+def test_create_many(collection, ndjson):
+    user = {"handle": "user@teialabs.com", "type": "user"}
+    owned = {"owner_ref": {"handle": "/teialabs"}}
+    items = [
+        user | owned,
+        {"handle": "other@teialabs.com", "type": "user"} | owned,
+        user | owned,
+        {"handle": "lost@teialabs.com", "type": "user"}
+        | {"owner_ref": {"handle": "/missing"}},
+        {"handle": "x", "type": "user"},
+        user | owned | {"roles": ["not-an-id"]},
+    ]
+    result = create_many(items, ndjson=ndjson)
+
+    assert len(collection.calls_to("find")) == 1
+    (insert,) = collection.calls_to("insert_many")
+    assert not insert["ordered"]
+    inserted = collection.documents[1:]
+    assert len(inserted) == 2
+    assert inserted[0]["owner_ref"]["handle"] == "/teialabs"
+    assert [r.status for r in result.results] == [201, 201, 409, 404, 400, 400]
+    assert [r.index for r in result.results] == list(range(6))
+    assert result.results[0].id == inserted[0]["_id"]
+    assert (result.succeeded, result.failed) == (2, 4)
+
+
+def test_create_many_rejects_objects(collection):
+    with pytest.raises(routes.HTTPException) as e:
+        asyncio.run(
+            routes.create_many(
+                Request(b'{"handle": "x"}', "application/json"),
+                infostar=INFOSTAR,
+            )
+        )
+    assert e.value.status_code == 400
@@ -0,0 +1,96 @@
+import pytest
+from bson import ObjectId
+
+from tauth.authz.permissions.models import PermissionDAO
+from tauth.entities.models import EntityDAO
+from tauth.entities.schemas import EntityRefIn
+from tauth.resource_management.access import controllers
+from tauth.resource_management.access.schemas import GrantIn
+from tauth.resource_management.resources.models import ResourceDAO
+
+from .utils import INFOSTAR, Collection, count_calls, patch_collection
+
+SERVICE = {"handle": "datasources", "owner_handle": "/teialabs"}
+RESOURCE = ObjectId()
+EXISTING = ObjectId()
+TEAM = [f"user-{i}@teialabs.com" for i in range(50)]
+
+
+@pytest.fixture
+def collections(monkeypatch) -> dict[type, Collection]:
+    entities = [
+        {
+            "_id": f"id-{handle}",
+            "type": "user",
+            "handle": handle,
+            "owner_ref": {"handle": "/teialabs"},
+            "permissions": [EXISTING] if handle == TEAM[0] else [],
+        }
+        for handle in TEAM
+    ]
+    entities.append(
+        {
+            "_id": "service",
+            "type": "service",
+            "handle": "datasources",
+            "owner_ref": {"handle": "/teialabs"},
+        }
+    )
+    documents = {
+        ResourceDAO: [{"_id": RESOURCE, "service_ref": SERVICE}],
+        EntityDAO: entities,
+        PermissionDAO: [
+            {
+                "_id": EXISTING,
+                "name": "ds::read",
+                "entity_ref": {"handle": "datasources"},
+            }
+        ],
+    }
+    for model, stored in documents.items():
+        patch_collection(monkeypatch, model, Collection(stored))
+    return {model: model.collection(alias="tauth") for model in documents}
+
+
+def grant(handle: str, name: str, resource_id=RESOURCE) -> GrantIn:
+    return GrantIn(
+        resource_id=resource_id,
+        entity_ref=EntityRefIn(handle=handle, owner_handle="/teialabs"),
+        permission_name=name,
+    )
+
+
+def test_grant_team(collections):
+    grants = [grant(handle, "ds::write") for handle in TEAM]
+    results = controllers.grant_many(grants, INFOSTAR)
+
+    assert all(r.status == 200 for r in results)
+    # resources, entities, permissions, insert, then the assignment's
+    # entities, permissions and bulk write
+    assert count_calls(collections.values()) == 7
+    created = collections[PermissionDAO].documents[-1]
+    assert created["name"] == "ds::write"
+    assert created["entity_ref"]["handle"] == "datasources"
+
+
+def test_grant_reports_each_item(collections):
+    grants = [
+        grant(TEAM[0], "ds::read"),
+        grant(TEAM[1], "ds::read"),
+        grant("stranger@teialabs.com", "ds::read"),
+        grant(TEAM[2], "ds::read", resource_id=ObjectId()),
+    ]
+    results = controllers.grant_many(grants, INFOSTAR)
+
+    statuses = {r.index: r.status for r in results}
+    assert statuses == {0: 409, 1: 200, 2: 404, 3: 404}
+    # The existing permission is reused
+    assert len(collections[PermissionDAO].documents) == 1
+
+
+def test_revoke_many(collections):
+    grants = [grant(TEAM[0], "ds::read"), grant(TEAM[1], "ds::read")]
+    results = controllers.revoke_many(grants)
+
+    statuses = {r.index: r.status for r in results}
+    assert statuses == {0: 200, 1: 404}
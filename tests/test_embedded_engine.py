@@ -0,0 +1,331 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+from fastapi import Request
+from pydantic import ValidationError
+from pymongo.errors import PyMongoError
+
+from tauth.authz import controllers
+from tauth.authz.engines.embedded import engine as embedded_engine
+from tauth.authz.engines.embedded.builtins import BUILTINS
+from tauth.authz.engines.embedded.engine import EmbeddedEngine
+from tauth.authz.engines.embedded.errors import RegoParseError
+from tauth.authz.engines.embedded.settings import EmbeddedSettings
+from tauth.authz.engines.errors import PolicyNotFound, RuleNotFound
+from tauth.authz.policies.projection import (
+    InputProjection,
+    PolicyInputProjections,
+)
+from tauth.authz.policies.schemas import AuthorizationDataIn
+from tauth.authz.utils import DecisionMetrics
+from tauth.utils.errors import EngineException
+
+POLICIES_DIR = Path(__file__).parents[1] / "resources" / "policies"
+
+
+@pytest.fixture
+def engine() -> EmbeddedEngine:
+    engine = EmbeddedEngine(EmbeddedSettings(POLICY_REFRESH=3600))
+    for path in POLICIES_DIR.glob("*.rego"):
+        engine.upsert_policy(path.stem, path.read_text())
+    return engine
+
+
+def evaluate(engine: EmbeddedEngine, source: str, rule: str, **context):
+    engine.upsert_policy("test", source)
+    return engine.is_authorized("test", rule, context).details.get("result")
+
+
+def test_impersonate_policy(engine: EmbeddedEngine):
+    index = {"tauth::impersonator": True}
+    result = engine.is_authorized(
+        "impersonate", "allow", {"permission_index": index}
+    )
+    assert result.authorized
+    result = engine.is_authorized(
+        "impersonate", "allow", {"permission_index": {}}
+    )
+    assert not result.authorized
+
+
+@pytest.mark.parametrize(
+    "infostar, expected",
+    [
+        (
+            {
+                "authprovider_type": "melt-key",
+                "apikey_name": "default",
+                "authprovider_org": "/",
+            },
+            "superuser",
+        ),
+        (
+            {
+                "authprovider_type": "melt-key",
+                "apikey_name": "default",
+                "authprovider_org": "/teialabs",
+            },
+            "admin",
+        ),
+        ({"authprovider_type": "melt-key", "apikey_name": "x"}, "user"),
+        ({"authprovider_type": "auth0"}, None),
+    ],
+)
+def test_melt_key_policy(engine: EmbeddedEngine, infostar, expected):
+    result = engine.is_authorized("melt-key", "allow", {"infostar": infostar})
+    assert result.details["result"]["type"] == expected
+
+
+def test_datasources_policy(engine: EmbeddedEngine, monkeypatch):
+    resource = {
+        "_id": "6650a1b2c3d4e5f6a7b8c9d0",
+        "resource_identifier": "sales",
+        "metadata": {"alias": "teialabs"},
+    }
+    queries = []
+
+    def query_fields(collection, query, fields):
+        queries.append((collection, query, fields))
+        return [resource]
+
+    monkeypatch.setitem(BUILTINS, "mongodb.query_fields", query_fields)
+    context = {
+        "entity": {
+            "handle": "user@teialabs.com",
+            "owner_ref": {"handle": "/teialabs"},
+        },
+        "request": {"query": {}, "path": {"name": "sales"}},
+        "permission_index": {f"ds::read::{resource['_id']}": True},
+    }
+    result = engine.is_authorized("datasources", "ds2_has_read", context)
+    assert result.details["result"]["resource_ref"] == resource["_id"]
+    result = engine.is_authorized("datasources", "ds2_has_write", context)
+    assert result.details["result"] is False
+    # Memoized within a decision
+    assert queries == [
+        (
+            "resources",
+            {
+                "resource_collection": "datasources",
+                "resource_identifier": "sales",
+                "metadata.alias": "teialabs",
+            },
+            ["_id", "resource_identifier", "metadata"],
+        )
+    ] * 2
+
+
+def test_not_found(engine: EmbeddedEngine):
+    with pytest.raises(PolicyNotFound):
+        engine.is_authorized("unknown", "allow")
+    with pytest.raises(RuleNotFound):
+        engine.is_authorized("impersonate", "unknown")
+    with pytest.raises(RuleNotFound):
+        engine.is_authorized("tauth_utils", "check_permission")
+
+
+def test_iteration_and_comprehensions(engine: EmbeddedEngine):
+    source = """
+    package test
+
+    import rego.v1
+
+    names := [p.name | some p in input.permissions]
+    handles := {p.entity_handle |
+        p := input.permissions[i]
+        startswith(input.permissions[i].name, "a")
+    }
+    by_name := {p.name: p.entity_handle | some p in input.permissions}
+    all_root if every p in input.permissions { p.entity_handle == "/" }
+    none_b if not "b" in names
+    total := sum([n | some p in input.permissions; n := count(p.name)])
+    """
+    permissions = [
+        {"name": "a", "entity_handle": "/"},
+        {"name": "ab", "entity_handle": "/org"},
+    ]
+    context = dict(permissions=permissions)
+    assert evaluate(engine, source, "names", **context) == ["a", "ab"]
+    assert evaluate(engine, source, "handles", **context) == ["/", "/org"]
+    assert evaluate(engine, source, "by_name", **context) == {
+        "a": "/",
+        "ab": "/org",
+    }
+    assert engine.is_authorized("test", "all_root", context).details == {}
+    assert evaluate(engine, source, "none_b", **context) is True
+    assert evaluate(engine, source, "total", **context) == 3
+
+
+def test_partial_rules_and_functions(engine: EmbeddedEngine):
+    source = """
+    package test
+
+    import rego.v1
+
+    default level := "none"
+
+    level := "admin" if input.role == "admin"
+    else := "user" if input.role
+
+    deny contains msg if {
+        some user in input.users
+        not valid(user)
+        msg := sprintf("invalid user %s", [user])
+    }
+
+    valid(user) if endswith(user, "@teialabs.com")
+
+    quota[user] := count(user) if some user in input.users
+    """
+    assert evaluate(engine, source, "level", role="admin") == "admin"
+    assert evaluate(engine, source, "level", role="x") == "user"
+    assert evaluate(engine, source, "level") == "none"
+    users = ["a@teialabs.com", "b@gmail.com"]
+    assert evaluate(engine, source, "deny", users=users) == [
+        "invalid user b@gmail.com"
+    ]
+    assert evaluate(engine, source, "quota", users=users) == {
+        "a@teialabs.com": 14,
+        "b@gmail.com": 11,
+    }
+
+
+def test_rego_semantics(engine: EmbeddedEngine):
+    source = """
+    package test
+
+    import rego.v1
+
+    bool_is_not_number if true == 1
+    undefined_ref := input.missing.key
+    set_ops := ({1, 2, 3} - {1}) | {4}
+    arithmetic := (7 % 4) * 2 + 10 / 4
+    """
+    assert evaluate(engine, source, "bool_is_not_number") is None
+    assert evaluate(engine, source, "undefined_ref") is None
+    assert evaluate(engine, source, "set_ops") == [2, 3, 4]
+    assert evaluate(engine, source, "arithmetic") == 8.5
+
+
+def test_conflicting_outputs(engine: EmbeddedEngine):
+    source = """
+    package test
+
+    import rego.v1
+
+    value := 1 if input.a
+    value := 2 if input.b
+    """
+    assert evaluate(engine, source, "value", a=True) == 1
+    with pytest.raises(EngineException):
+        evaluate(engine, source, "value", a=True, b=True)
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "package test\nallow if { input.x with input as {} }",
+        "package test\nallow { true }",
+        "package test\nallow if http.send({})",
+        "package test\na.b.c := 1",
+        "package test\nallow if {",
+    ],
+)
+def test_rejects_unsupported_policies(engine: EmbeddedEngine, source: str):
+    with pytest.raises(RegoParseError):
+        engine.upsert_policy("test", source)
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        "x := 1\n    x := 2",
+        "[x, y] := [1, 2]\n    {\"k\": y} := {\"k\": 2}",
+        "some x\n    x := 1",
+    ],
+)
+def test_rejects_redeclared_locals(engine: EmbeddedEngine, body: str):
+    source = f"package test\nallow if {{\n    {body}\n}}"
+    with pytest.raises(RegoParseError, match="assigned above"):
+        engine.upsert_policy("test", source)
+    assert evaluate(
+        engine,
+        "package test\nallow if {\n    x := 1\n    y := x\n    y == 1\n}",
+        "allow",
+    )
+
+
+def test_rejects_assigned_function_arguments(engine: EmbeddedEngine):
+    with pytest.raises(RegoParseError, match="assigned above"):
+        engine.upsert_policy("test", "package test\nf(x) := x if x := 1")
+
+
+def test_reserved_context_keys(engine: EmbeddedEngine, monkeypatch):
+    index = {"tauth::impersonator": True}
+    with pytest.raises(ValidationError):
+        AuthorizationDataIn(
+            context={"permission_index": index},
+            policy_name="impersonate",
+            rule="allow",
+        )
+
+    # Not even when validation is skipped, or the policy's input does not
+    # include the entity (so it is never computed)
+    data = AuthorizationDataIn.model_construct(
+        context={"permission_index": index},
+        policy_name="impersonate",
+        rule="allow",
+        resources=None,
+    )
+    monkeypatch.setattr(
+        PolicyInputProjections,
+        "get",
+        classmethod(lambda cls, name: InputProjection({})),
+    )
+    request = Request({"type": "http", "headers": []})
+    context = asyncio.run(
+        controllers.build_context(
+            request, None, data, None, DecisionMetrics("impersonate", "allow")
+        )
+    )
+    assert context == {}
+    assert not engine.is_authorized("impersonate", "allow", context).authorized
+
+
+class Stop(BaseException):
+    pass
+
+
+def test_policies_sync_in_background(engine: EmbeddedEngine, monkeypatch):
+    stored = [{"name": "test", "policy": "package test\nallow := true"}]
+    reads = []
+
+    class Collection:
+        def find(self, filter, projection):
+            reads.append(filter)
+            if len(reads) == 1:
+                raise PyMongoError("Connection refused")
+            return iter(stored)
+
+    def sleep(seconds):
+        if len(reads) == 2:
+            raise Stop
+
+    monkeypatch.setattr(
+        embedded_engine.AuthorizationPolicyDAO,
+        "collection",
+        classmethod(lambda cls, alias: Collection()),
+    )
+    monkeypatch.setattr(embedded_engine.time, "sleep", sleep)
+
+    # Decisions only read the compiled policies
+    assert not engine.is_authorized("impersonate", "allow").authorized
+    assert reads == []
+
+    # The sync survives database errors
+    with pytest.raises(Stop):
+        engine._run()
+    assert engine.is_authorized("test", "allow").authorized
+    with pytest.raises(PolicyNotFound):
+        engine.is_authorized("impersonate", "allow")
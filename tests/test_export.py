@@ -0,0 +1,83 @@
+from datetime import UTC, datetime
+
+import orjson
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from tauth.utils import reading
+
+from .utils import Collection
+
+
+def make_model(collection):
+    class Model(BaseModel):
+        handle: str
+        type: str
+
+        @classmethod
+        def collection(cls, alias):
+            return collection
+
+    return Model
+
+
+def test_parse_fields():
+    assert reading.parse_fields(None) is None
+    assert reading.parse_fields("") is None
+    assert reading.parse_fields("handle, type,,") == ["handle", "type"]
+
+
+def test_export(monkeypatch):
+    monkeypatch.setattr(reading, "EXPORT_CHUNK_SIZE", 100)
+    created_at = datetime(2024, 1, 1, tzinfo=UTC)
+    documents = [
+        {
+            "_id": ObjectId(),
+            "type": "user",
+            "handle": f"user-{i}",
+            "created_at": created_at,
+        }
+        for i in range(10)
+    ]
+    collection = Collection(documents)
+    chunks = list(
+        reading.export(
+            None,  # type: ignore
+            make_model(collection),  # type: ignore
+            fields=["handle"],
+            handle=None,
+            type="user",
+        )
+    )
+
+    assert len(chunks) > 1
+    assert all(chunk.endswith(b"\n") for chunk in chunks)
+    lines = b"".join(chunks).splitlines()
+    assert [orjson.loads(line) for line in lines] == [
+        {
+            "_id": str(d["_id"]),
+            "type": "user",
+            "handle": d["handle"],
+            "created_at": "2024-01-01T00:00:00Z",
+        }
+        for d in documents
+    ]
+    (find,) = collection.calls_to("find")
+    assert find == dict(
+        filter={"type": "user"}, projection={"_id": 1, "handle": 1}
+    )
+    assert collection.cursor.closed
+
+
+def test_export_rejects_unknown_fields():
+    collection = Collection([])
+    with pytest.raises(HTTPException) as e:
+        reading.export(
+            None,  # type: ignore
+            make_model(collection),  # type: ignore
+            fields=["handle", "value_hash"],
+        )
+    assert e.value.status_code == 400
+    assert collection.calls == []
@@ -0,0 +1,35 @@
+from tauth.utils import metrics
+
+
+def test_histogram_render():
+    histogram = metrics.Histogram(
+        "test_seconds", "Test histogram.", ("phase",), buckets=(0.1, 1.0)
+    )
+    histogram.observe(0.05, phase="a")
+    histogram.observe(0.1, phase="a")
+    histogram.observe(5, phase="a")
+    histogram.observe(0.5, phase='b"')
+    lines = histogram.render().splitlines()
+    assert lines[:2] == [
+        "# HELP test_seconds Test histogram.",
+        "# TYPE test_seconds histogram",
+    ]
+    assert 'test_seconds_bucket{phase="a",le="0.1"} 2' in lines
+    assert 'test_seconds_bucket{phase="a",le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{phase="a",le="+Inf"} 3' in lines
+    assert 'test_seconds_sum{phase="a"} 5.15' in lines
+    assert 'test_seconds_count{phase="a"} 3' in lines
+    assert 'test_seconds_bucket{phase="b\\"",le="1.0"} 1' in lines
+    assert histogram.render() in metrics.render()
+
+
+def test_histogram_timer_and_counter():
+    histogram = metrics.Histogram("test_timer_seconds", "Timer.")
+    with histogram.time():
+        pass
+    assert "test_timer_seconds_count 1" in histogram.render()
+
+    counter = metrics.Counter("test_total", "Counter.", ("result",))
+    counter.inc(result="ok")
+    counter.inc(2, result="ok")
+    assert 'test_total{result="ok"} 3' in counter.render().splitlines()
@@ -0,0 +1,75 @@
+import hashlib
+import io
+import tarfile
+
+import jwt
+import orjson
+
+from tauth.authz.engines.opa import bundle
+from tauth.authz.engines.opa.settings import OPASettings
+
+SIGNING_KEY = "bundle-signing-key-for-the-tests!"
+POLICIES = [
+    ("utils", "package tauth.utils\n\nf(x) := x\n"),
+    ("melt-key", "# Keys\npackage tauth.melt_key\n\nallow := true\n"),
+    ("root", "package tauth\n\nallow := false\n"),
+    ("other", "package other.policy\n\nallow := false\n"),
+]
+
+
+def read(content: bytes) -> dict[str, bytes]:
+    with tarfile.open(fileobj=io.BytesIO(content), mode="r:gz") as tar:
+        return {
+            member.name: tar.extractfile(member).read()  # type: ignore
+            for member in tar.getmembers()
+        }
+
+
+def test_bundle_contents():
+    result = bundle.build(POLICIES, signing_key=None)
+    files = read(result.content)
+    assert set(files) == {
+        "/.manifest",
+        "/utils.rego",
+        "/melt-key.rego",
+        "/root.rego",
+        "/other.rego",
+    }
+    assert files["/utils.rego"] == POLICIES[0][1].encode()
+    manifest = orjson.loads(files["/.manifest"])
+    assert manifest == {
+        "revision": result.revision,
+        "roots": ["other/policy", "tauth"],
+    }
+
+
+def test_bundle_is_deterministic():
+    first = bundle.build(POLICIES, signing_key=SIGNING_KEY)
+    second = bundle.build(list(reversed(POLICIES)), signing_key=SIGNING_KEY)
+    assert first == second
+    changed = bundle.build(
+        POLICIES[:-1] + [("other", "package other\n")], signing_key=SIGNING_KEY
+    )
+    assert changed.revision != first.revision
+
+
+def test_bundle_signature():
+    files = read(bundle.build(POLICIES, signing_key=SIGNING_KEY).content)
+    signatures = orjson.loads(files.pop("/.signatures.json"))["signatures"]
+    claims = jwt.decode(signatures[0], SIGNING_KEY, algorithms=["HS256"])
+    assert claims["keyid"] == bundle.SIGNING_KEY_ID
+    assert {
+        f["name"]: f["hash"] for f in claims["files"]
+    } == {
+        name.lstrip("/"): hashlib.sha256(content).hexdigest()
+        for name, content in files.items()
+    }
+
+
+def test_opa_config():
+    settings = OPASettings(DISTRIBUTION="bundle", BUNDLE_SIGNING_KEY=SIGNING_KEY)
+    config = bundle.opa_config(settings, "http://tauth:5000")
+    credentials = config["services"]["tauth"]["credentials"]
+    assert credentials["bearer"]["token"] == "${TAUTH_ROOT_API_KEY}"
+    assert config["bundles"]["tauth"]["signing"] == {"keyid": "tauth"}
+    assert SIGNING_KEY not in orjson.dumps(config).decode()
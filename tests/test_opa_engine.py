@@ -0,0 +1,220 @@
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from opa_client.errors import (
+    ConnectionsError,
+    DeletePolicyError,
+    RegoParseError,
+)
+
+from tauth.authz.engines.factory import AuthorizationEngine
+from tauth.authz.engines.opa.engine import (
+    CHECK_PACKAGE,
+    SYSTEM_INFOSTAR,
+    OPAEngine,
+)
+from tauth.authz.engines.opa.settings import OPASettings
+from tauth.authz.policies import controllers
+from tauth.authz.policies.models import AuthorizationPolicyDAO
+from tauth.authz.policies.schemas import AuthorizationPolicyIn
+from tauth.utils.errors import EngineException
+
+from .utils import Collection, patch_collection
+
+POLICIES_DIR = Path(__file__).parents[1] / "resources" / "policies"
+
+
+@pytest.fixture
+def requests() -> list[httpx.Request]:
+    return []
+
+
+@pytest.fixture
+def transports() -> list[dict]:
+    return []
+
+
+def make_engine(monkeypatch, requests, transports, handle, **settings):
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path == "/v1/policies" and request.method == "GET":
+            return httpx.Response(200, json={"result": []})
+        return handle(request)
+
+    def transport(**kwargs) -> httpx.BaseTransport:
+        transports.append(kwargs)
+        return httpx.MockTransport(handler)
+
+    monkeypatch.setattr(httpx, "HTTPTransport", transport)
+    engine = OPAEngine(OPASettings(**settings))
+    requests.clear()
+    return engine
+
+
+def compile_policy(request: httpx.Request) -> httpx.Response:
+    if request.method == "DELETE":
+        return httpx.Response(200, json={})
+    if b"invalid" in request.content:
+        return httpx.Response(
+            400,
+            json={
+                "code": "invalid_parameter",
+                "message": "1 error occurred: rego_parse_error",
+            },
+        )
+    return httpx.Response(200, json={})
+
+
+def test_bundle_upsert_checks_policy(monkeypatch, requests, transports):
+    engine = make_engine(
+        monkeypatch,
+        requests,
+        transports,
+        compile_policy,
+        DISTRIBUTION="bundle",
+    )
+
+    assert engine.upsert_policy("example", "package tauth.x\nallow := true")
+    put, delete = requests
+    assert put.method == "PUT"
+    assert put.url.path.startswith(f"/v1/policies/{CHECK_PACKAGE}/")
+    # Checked under a scratch package: the bundle owns `tauth.x`
+    assert put.content.startswith(f"package {CHECK_PACKAGE}.p".encode())
+    assert delete.method == "DELETE" and delete.url.path == put.url.path
+
+    requests.clear()
+    with pytest.raises(RegoParseError):
+        engine.upsert_policy("example", "package tauth.x\ninvalid allow")
+    assert [r.method for r in requests] == ["PUT"]
+
+
+def test_bundle_delete_checks_dependents(monkeypatch, requests, transports):
+    policies = [
+        {"name": path.stem, "policy": path.read_text()}
+        for path in POLICIES_DIR.glob("*.rego")
+    ]
+    patch_collection(
+        monkeypatch, AuthorizationPolicyDAO, Collection(policies)
+    )
+    engine = make_engine(
+        monkeypatch,
+        requests,
+        transports,
+        compile_policy,
+        DISTRIBUTION="bundle",
+    )
+
+    with pytest.raises(DeletePolicyError) as e:
+        engine.delete_policy("tauth_utils")
+    assert "impersonate" in str(e.value.message)
+    assert engine.delete_policy("impersonate")
+    assert requests == []
+
+
+def test_rejected_policies_are_not_stored(monkeypatch, requests, transports):
+    collection = Collection()
+    patch_collection(monkeypatch, AuthorizationPolicyDAO, collection)
+    engine = make_engine(
+        monkeypatch,
+        requests,
+        transports,
+        compile_policy,
+        DISTRIBUTION="bundle",
+    )
+    monkeypatch.setattr(
+        AuthorizationEngine, "get", classmethod(lambda cls: engine)
+    )
+    body = AuthorizationPolicyIn(
+        name="example",
+        description="",
+        policy="package tauth.x\ninvalid allow",
+        type="opa",
+    )
+
+    with pytest.raises(HTTPException) as e:
+        controllers.upsert_one(body, SYSTEM_INFOSTAR)
+    assert e.value.status_code == 400
+    assert collection.calls_to("update_one") == []
+    assert collection.documents == []
+
+
+def policy_ast(*package: str) -> dict:
+    return {
+        "result": {
+            "ast": {
+                "package": {
+                    "path": [{"value": p} for p in ("data", *package)]
+                },
+                "rules": [{"head": {"name": "allow"}}],
+            }
+        }
+    }
+
+
+def test_missing_result_refreshes_package(monkeypatch, requests, transports):
+    # The policy was moved to another package by another worker
+    packages = [("tauth", "old"), ("tauth", "new")]
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        if request.method == "GET":
+            return httpx.Response(200, json=policy_ast(*packages.pop(0)))
+        if request.url.path == "/v1/data/tauth/new/allow":
+            return httpx.Response(200, json={"result": True})
+        return httpx.Response(200, json={})
+
+    engine = make_engine(monkeypatch, requests, transports, handle)
+
+    result = engine.is_authorized("example", "allow", {"x": 1})
+    assert result.authorized
+    assert [(r.method, r.url.path) for r in requests] == [
+        ("GET", "/v1/policies/example"),
+        ("POST", "/v1/data/tauth/old/allow"),
+        ("GET", "/v1/policies/example"),
+        ("POST", "/v1/data/tauth/new/allow"),
+    ]
+    # The refreshed package is kept
+    requests.clear()
+    assert engine.is_authorized("example", "allow").authorized
+    assert [r.method for r in requests] == ["POST"]
+
+
+def test_connection_errors(monkeypatch, requests, transports):
+    def handle(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("Connection refused", request=request)
+
+    engine = make_engine(monkeypatch, requests, transports, handle)
+    with pytest.raises(EngineException):
+        engine.is_authorized("example", "allow")
+
+    # Also on startup, before any decision
+    monkeypatch.setattr(
+        httpx, "HTTPTransport", lambda **kwargs: httpx.MockTransport(handle)
+    )
+    with pytest.raises(ConnectionsError):
+        OPAEngine(OPASettings())
+
+
+def test_pooled_client_configuration(monkeypatch, requests, transports):
+    engine = make_engine(
+        monkeypatch,
+        requests,
+        transports,
+        compile_policy,
+        UDS="/run/opa.sock",
+        MAX_CONNECTIONS=7,
+        MAX_KEEPALIVE_CONNECTIONS=3,
+        KEEPALIVE_EXPIRY=12.5,
+        TIMEOUT=0.5,
+        CONNECT_TIMEOUT=0.25,
+    )
+
+    (config,) = transports
+    assert config["uds"] == "/run/opa.sock"
+    limits = config["limits"]
+    assert limits.max_connections == 7
+    assert limits.max_keepalive_connections == 3
+    assert limits.keepalive_expiry == 12.5
+    assert engine.client.timeout.read == 0.5
+    assert engine.client.timeout.connect == 0.25
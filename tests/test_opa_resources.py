@@ -0,0 +1,170 @@
+import httpx
+import orjson
+import pytest
+from bson import ObjectId
+
+from tauth.authz.engines.opa import resources
+from tauth.authz.engines.opa.resources import ResourceSnapshot
+
+from .utils import Collection, patch_collection
+
+RESOURCE_ID = ObjectId()
+RESOURCE = {
+    "_id": RESOURCE_ID,
+    "service_ref": {"handle": "datasources", "owner_handle": "/"},
+    "resource_collection": "datasources",
+    "resource_identifier": "sales/2024",
+    "metadata": {"alias": "teialabs"},
+}
+
+
+@pytest.fixture
+def requests() -> list[tuple[str, str, object]]:
+    return []
+
+
+@pytest.fixture
+def snapshot(requests, monkeypatch) -> ResourceSnapshot:
+    def handle(request: httpx.Request) -> httpx.Response:
+        body = orjson.loads(request.content) if request.content else None
+        requests.append((request.method, request.url.raw_path.decode(), body))
+        return httpx.Response(204)
+
+    patch_collection(
+        monkeypatch, resources.ResourceDAO, Collection([RESOURCE])
+    )
+    client = httpx.Client(
+        base_url="http://opa/v1", transport=httpx.MockTransport(handle)
+    )
+    return ResourceSnapshot(client, alias="tauth", interval=1)
+
+
+def test_load(snapshot: ResourceSnapshot, requests):
+    snapshot.load()
+    id = str(RESOURCE_ID)
+    document = resources.to_document(RESOURCE)
+    assert document["_id"] == id
+    assert requests == [
+        (
+            "PUT",
+            "/v1/data/tauth_resources",
+            {
+                "synced": True,
+                "by_id": {id: document},
+                "by_key": {
+                    "datasources": {
+                        "teialabs": {"sales/2024": {id: document}}
+                    }
+                },
+            },
+        )
+    ]
+
+
+def test_apply_changes(snapshot: ResourceSnapshot, requests):
+    snapshot.load()
+    requests.clear()
+    id = str(RESOURCE_ID)
+    moved = RESOURCE | {"metadata": {}}
+    snapshot.apply(
+        {
+            "operationType": "update",
+            "documentKey": {"_id": RESOURCE_ID},
+            "fullDocument": moved,
+        }
+    )
+    assert requests == [
+        (
+            "DELETE",
+            f"/v1/data/tauth_resources/by_key/datasources/teialabs/"
+            f"sales%2F2024/{id}",
+            None,
+        ),
+        (
+            "PUT",
+            f"/v1/data/tauth_resources/by_id/{id}",
+            resources.to_document(moved),
+        ),
+    ]
+    requests.clear()
+    snapshot.apply(
+        {"operationType": "delete", "documentKey": {"_id": RESOURCE_ID}}
+    )
+    assert requests == [
+        ("DELETE", f"/v1/data/tauth_resources/by_id/{id}", None)
+    ]
+
+
+def test_malformed_documents_are_not_indexed(
+    snapshot: ResourceSnapshot, requests
+):
+    snapshot.load()
+    requests.clear()
+    id = str(ObjectId())
+    malformed = {"_id": id, "metadata": {"alias": "teialabs"}}
+    snapshot.apply(
+        {
+            "operationType": "insert",
+            "documentKey": {"_id": id},
+            "fullDocument": malformed,
+        }
+    )
+    assert requests == [
+        (
+            "PUT",
+            f"/v1/data/tauth_resources/by_id/{id}",
+            resources.to_document(malformed),
+        )
+    ]
+
+
+class Stop(BaseException):
+    pass
+
+
+class Stream:
+    def __init__(self, changes: list[dict]):
+        self.changes = changes
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __iter__(self):
+        yield from self.changes
+        raise Stop
+
+
+def test_watcher_survives_unexpected_errors(
+    snapshot: ResourceSnapshot, requests, monkeypatch
+):
+    id = str(RESOURCE_ID)
+    deleted = {"operationType": "delete", "documentKey": {"_id": RESOURCE_ID}}
+    streams = [Stream([{"operationType": "update"}]), Stream([deleted])]
+    monkeypatch.setattr(
+        Collection,
+        "watch",
+        lambda self, **kwargs: streams.pop(0),
+        raising=False,
+    )
+    monkeypatch.setattr(resources.time, "sleep", lambda seconds: None)
+
+    with pytest.raises(Stop):
+        snapshot._run()
+
+    # The malformed change (no `documentKey`) is skipped by reloading
+    assert [r[:2] for r in requests] == [
+        ("PUT", "/v1/data/tauth_resources"),
+        # Stale until reloaded: policies query MongoDB instead
+        ("PUT", "/v1/data/tauth_resources/synced"),
+        ("PUT", "/v1/data/tauth_resources"),
+        ("DELETE", f"/v1/data/tauth_resources/by_id/{id}"),
+        (
+            "DELETE",
+            f"/v1/data/tauth_resources/by_key/datasources/teialabs/"
+            f"sales%2F2024/{id}",
+        ),
+    ]
+    assert requests[1][2] is False
@@ -0,0 +1,83 @@
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException, Response
+
+from tauth.utils import reading
+
+
+class Document:
+    def __init__(self, id):
+        self.id = id
+
+
+class Model:
+    calls: list[dict] = []
+
+    @classmethod
+    def find(cls, **kwargs):
+        cls.calls.append(kwargs)
+        return []
+
+
+@pytest.mark.parametrize("id", [ObjectId(), "0123abcd"])
+def test_cursor_round_trip(id):
+    cursor = reading.encode_cursor(id)
+    assert "=" not in cursor
+    assert reading.decode_cursor(cursor) == id
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    ["not a cursor", reading.encode_cursor("x")[:-2], "WyJvaWQiLCAieCJd"],
+)
+def test_invalid_cursor(cursor):
+    with pytest.raises(HTTPException) as e:
+        reading.decode_cursor(cursor)
+    assert e.value.status_code == 400
+
+
+def test_read_many_after_cursor():
+    id = ObjectId()
+    Model.calls = []
+    reading.read_many(
+        None,  # type: ignore
+        Model,  # type: ignore
+        limit=10,
+        cursor=reading.encode_cursor(id),
+        handle="/teialabs",
+        name=None,
+    )
+    (call,) = Model.calls
+    assert call["filter"] == {"handle": "/teialabs", "_id": {"$gt": id}}
+    assert call["sort"] == [("_id", 1)]
+    assert call["limit"] == 10
+
+
+def test_read_many_sorts_only_by_cursor():
+    Model.calls = []
+    for cursor in (None, ""):
+        reading.read_many(
+            None,  # type: ignore
+            Model,  # type: ignore
+            limit=10,
+            offset=5,
+            cursor=cursor,
+            handle="/teialabs",
+        )
+    unsorted, first_page = Model.calls
+    assert unsorted["sort"] is None
+    assert first_page["sort"] == [("_id", 1)]
+    assert first_page["filter"] == unsorted["filter"] == {"handle": "/teialabs"}
+
+
+def test_next_cursor_only_on_full_pages():
+    documents = [Document(ObjectId()) for _ in range(3)]
+    response = Response()
+    reading.set_next_cursor(response, documents[:2], limit=3, cursor="")
+    assert reading.NEXT_CURSOR_HEADER not in response.headers
+    # Offset-based pages are unsorted, so no cursor can follow them
+    reading.set_next_cursor(response, documents, limit=3, cursor=None)
+    assert reading.NEXT_CURSOR_HEADER not in response.headers
+    reading.set_next_cursor(response, documents, limit=3, cursor="")
+    cursor = response.headers[reading.NEXT_CURSOR_HEADER]
+    assert reading.decode_cursor(cursor) == documents[-1].id
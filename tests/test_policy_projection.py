@@ -0,0 +1,103 @@
+from pathlib import Path
+
+import pytest
+
+from tauth.authz.policies.projection import (
+    PolicyAnalysis,
+    PolicyInputProjections,
+    prune,
+)
+
+POLICIES_DIR = Path(__file__).parents[1] / "resources" / "policies"
+
+
+@pytest.fixture
+def policies():
+    previous = PolicyInputProjections._policies
+    PolicyInputProjections._policies = {}
+    for path in POLICIES_DIR.glob("*.rego"):
+        PolicyInputProjections.register(path.stem, path.read_text())
+    yield
+    PolicyInputProjections._policies = previous
+    PolicyInputProjections._projections = {}
+
+
+def test_input_references():
+    analysis = PolicyAnalysis(
+        "example",
+        """
+        package example
+        # input.ignored
+        allow if input.entity.owner_ref.handle == "/teialabs"
+        allow if input["request"].headers["x-key"] == "#"
+        """,
+    )
+    assert analysis.package == "example"
+    assert analysis.input_refs == {
+        "entity": {"owner_ref": {"handle": True}},
+        "request": {"headers": {"x-key": True}},
+    }
+
+
+def test_bare_input_reference():
+    analysis = PolicyAnalysis("example", "allow if input == {}")
+    assert analysis.input_refs is True
+
+
+@pytest.mark.usefixtures("policies")
+def test_projection_follows_data_references():
+    projection = PolicyInputProjections._build("impersonate")
+    assert projection.includes("permission_index")
+    assert not projection.includes("permissions")
+    assert not projection.includes("entity")
+    assert not projection.includes("tauth_request")
+
+
+@pytest.mark.usefixtures("policies")
+def test_projection_of_request_sections():
+    projection = PolicyInputProjections._build("datasources")
+    assert sorted(projection.sections("request")) == ["path", "query"]
+    assert projection.prune(
+        "request", {"path": {"name": "x", "id": "y"}, "query": {"a": "b"}}
+    ) == {"path": {"name": "x"}, "query": {"a": "b"}}
+
+
+def test_unknown_policy_gets_full_projection():
+    projection = PolicyInputProjections._build("unknown-policy")
+    assert projection.is_full
+    assert prune({"a": 1}, projection.tree) == {"a": 1}
+
+
+@pytest.mark.usefixtures("policies")
+@pytest.mark.parametrize(
+    "policy",
+    [
+        "import data.tauth\nallow if tauth.utils.check_permission(x)",
+        'allow if data["tauth"]["utils"].check_permission(x)',
+    ],
+)
+def test_projection_follows_package_prefixes(policy):
+    PolicyInputProjections.register("example", f"package example\n{policy}")
+    projection = PolicyInputProjections._build("example")
+    assert projection.includes("permission_index")
+
+
+@pytest.mark.usefixtures("policies")
+@pytest.mark.parametrize(
+    "policy",
+    [
+        "allow if data[name].utils.check_permission(x)",
+        "import data\nallow if data.tauth.utils[rule](x)",
+    ],
+)
+def test_dynamic_data_references_get_full_projection(policy):
+    PolicyInputProjections.register("example", f"package example\n{policy}")
+    assert PolicyInputProjections._build("example").is_full
+
+
+def test_fields_named_data_are_not_references():
+    analysis = PolicyAnalysis(
+        "example", "allow if input.resource.data == data_source"
+    )
+    assert not analysis.dynamic_data
+    assert analysis.data_refs == set()
@@ -0,0 +1,106 @@
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from tauth.authz.roles.models import RoleDAO
+from tauth.entities.models import EntityDAO
+from tauth.utils import reading
+
+from .utils import Collection, patch_collection
+
+
+@pytest.fixture
+def collection(monkeypatch) -> Collection:
+    collection = Collection([])
+    for model in (RoleDAO, EntityDAO):
+        patch_collection(monkeypatch, model, collection)
+    return collection
+
+
+def test_projection_model():
+    projected = reading.projection_model(RoleDAO, ["name", "permissions"])
+    assert list(projected.model_fields) == ["id", "name", "permissions"]
+    assert reading.get_projection(projected) == {
+        "_id": 1,
+        "name": 1,
+        "permissions": 1,
+    }
+    assert reading.projection_model(RoleDAO, ["name", "permissions"]) is (
+        projected
+    )
+    # Computed ids are stored as `_id` too
+    projected = reading.projection_model(EntityDAO, ["handle"])
+    assert reading.get_projection(projected) == {"_id": 1, "handle": 1}
+
+
+def test_unknown_field():
+    with pytest.raises(HTTPException) as e:
+        reading.projection_model(RoleDAO, ["password"])
+    assert e.value.status_code == 400
+
+
+def test_read_many_fields(collection: Collection):
+    id = ObjectId()
+    collection.documents = [{"_id": id, "name": "admin"}]
+    (role,) = reading.read_many(
+        None,  # type: ignore
+        RoleDAO,
+        limit=10,
+        fields=["name"],
+        name="admin",
+    )
+    assert role.model_dump(by_alias=True) == {"_id": id, "name": "admin"}
+    assert collection.calls_to("find") == [
+        dict(
+            filter={"name": "admin"},
+            projection={"_id": 1, "name": 1},
+            limit=10,
+            skip=0,
+            sort=None,
+        )
+    ]
+
+
+def test_read_one_filters_fields(collection: Collection):
+    collection.documents = [
+        {"_id": ObjectId(), "name": "admin"},
+        {"_id": ObjectId(), "name": "admin"},
+    ]
+    with pytest.raises(HTTPException) as e:
+        reading.read_one_filters(
+            None,  # type: ignore
+            RoleDAO,
+            fields=(),
+            name="admin",
+        )
+    assert e.value.status_code == 409
+    (find,) = collection.calls_to("find")
+    assert find["projection"] == {"_id": 1}
+    assert find["limit"] == 2
+
+
+def test_entity_ref_from_handle(collection: Collection):
+    collection.documents = [
+        {
+            "_id": "hash",
+            "type": "user",
+            "handle": "user@teialabs.com",
+            "owner_ref": {"handle": "/teialabs"},
+        }
+    ]
+    ref = EntityDAO.from_handle_to_ref("user@teialabs.com", "/teialabs")
+    assert ref is not None
+    assert ref.model_dump() == {
+        "type": "user",
+        "handle": "user@teialabs.com",
+        "owner_handle": "/teialabs",
+    }
+    assert collection.calls_to("find_one") == [
+        dict(
+            filter={
+                "handle": "user@teialabs.com",
+                "owner_ref.handle": "/teialabs",
+            },
+            projection={"type": 1, "handle": 1, "owner_ref.handle": 1},
+        )
+    ]
@@ -0,0 +1,105 @@
+import asyncio
+
+import httpx
+import orjson
+import pytest
+
+from tauth.authz.engines.remote.engine import RemoteEngine
+from tauth.authz.engines.remote.settings import RemoteSettings
+
+
+@pytest.fixture
+def requests() -> list[httpx.Request]:
+    return []
+
+
+def make_engine(requests: list[httpx.Request], **settings) -> RemoteEngine:
+    def handle(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        body = orjson.loads(request.content)
+        if request.headers["Authorization"] == "Bearer invalid":
+            return httpx.Response(401, json={"msg": "Invalid token."})
+        authorized = body["context"].get("allow", False)
+        status = 200 if authorized else 403
+        return httpx.Response(
+            status, json={"authorized": authorized, "details": {}}
+        )
+
+    engine = RemoteEngine(RemoteSettings(API_URL="http://tauth", **settings))
+    transport = httpx.MockTransport(handle)
+    engine.client = httpx.Client(base_url="http://tauth", transport=transport)
+    engine.async_client = httpx.AsyncClient(
+        base_url="http://tauth", transport=transport
+    )
+    return engine
+
+
+def test_no_cache(requests):
+    engine = make_engine(requests)
+    for _ in range(2):
+        result = engine.is_authorized(
+            "melt-key", "allow", "token", context={"allow": True}
+        )
+        assert result.authorized
+    assert len(requests) == 2
+
+
+def test_cache(requests):
+    engine = make_engine(requests, CACHE_TTL=60, NEGATIVE_CACHE_TTL=60)
+    for _ in range(2):
+        assert engine.is_authorized(
+            "melt-key", "allow", "token", context={"a": 1, "allow": True}
+        ).authorized
+        assert not engine.is_authorized(
+            "melt-key", "allow", "token", context={"allow": False}
+        ).authorized
+    assert len(requests) == 2
+    # Same context in another order
+    engine.is_authorized(
+        "melt-key", "allow", "token", context={"allow": True, "a": 1}
+    )
+    assert len(requests) == 2
+    engine.is_authorized(
+        "melt-key", "allow", "other", context={"allow": True, "a": 1}
+    )
+    engine.is_authorized(
+        "melt-key",
+        "allow",
+        "token",
+        context={"allow": True, "a": 1},
+        impersonate_handle="user@teialabs.com",
+    )
+    assert len(requests) == 4
+
+
+def test_negative_cache_disabled(requests):
+    engine = make_engine(requests, CACHE_TTL=60)
+    for _ in range(2):
+        engine.is_authorized(
+            "melt-key", "allow", "token", context={"allow": False}
+        )
+    assert len(requests) == 2
+
+
+def test_errors_are_not_cached(requests):
+    engine = make_engine(requests, CACHE_TTL=60, NEGATIVE_CACHE_TTL=60)
+    for _ in range(2):
+        result = engine.is_authorized("melt-key", "allow", "invalid")
+        assert not result.authorized
+        assert result.details == {"msg": "Invalid token."}
+    assert len(requests) == 2
+
+
+def test_async(requests):
+    engine = make_engine(requests, CACHE_TTL=60)
+
+    async def authorize():
+        return await engine.is_authorized_async(
+            "melt-key", "allow", "token", context={"allow": True}
+        )
+
+    assert asyncio.run(authorize()).authorized
+    assert engine.is_authorized(
+        "melt-key", "allow", "token", context={"allow": True}
+    ).authorized
+    assert len(requests) == 1
@@ -0,0 +1,49 @@
+from bson import ObjectId
+
+from tauth.authz.permissions import controllers
+from tauth.authz.roles.models import RoleDAO
+from tauth.authz.roles.routes import to_roles_out
+from tauth.entities.schemas import EntityRef
+
+ENTITY_REF = EntityRef(type="organization", handle="/teialabs")
+PERMISSIONS = {
+    id: {
+        "_id": id,
+        "name": f"permission-{i}",
+        "description": "",
+        "entity_ref": ENTITY_REF.model_dump(),
+    }
+    for i, id in enumerate(ObjectId() for _ in range(10))
+}
+
+
+def test_permissions_are_read_once(monkeypatch):
+    queries = []
+
+    def find_permissions(ids):
+        queries.append(ids)
+        return {id: PERMISSIONS[id] for id in ids if id in PERMISSIONS}
+
+    monkeypatch.setattr(controllers, "_find_permissions", find_permissions)
+    ids = list(PERMISSIONS)
+    missing = ObjectId()
+    roles = [
+        RoleDAO.model_construct(
+            name=f"role-{i}",
+            description="",
+            entity_ref=ENTITY_REF,
+            permissions=ids[i : i + 3] + [missing],
+        )
+        for i in range(0, 10, 2)
+    ]
+    roles_out = to_roles_out(roles)
+
+    assert len(queries) == 1
+    assert sorted(queries[0]) == sorted([*ids, missing])
+    assert [p.name for p in roles_out[0].permissions] == [
+        "permission-0",
+        "permission-1",
+        "permission-2",
+    ]
+    assert [len(role.permissions) for role in roles_out] == [3, 3, 3, 3, 2]
+    assert roles_out[0].entity_handle == "/teialabs"
@@ -0,0 +1,82 @@
+import time
+
+import jwt
+from bson import ObjectId
+
+from tauth.authn import events
+from tauth.authz.engines.interface import AuthorizationResponse
+from tauth.sdk import AuthCache
+from tauth.sdk.cache import EventParser
+
+KEY_ID = str(ObjectId())
+KEY = f"TAUTH_{KEY_ID}_secret"
+OTHER = f"TAUTH_{ObjectId()}_secret"
+ALLOWED = AuthorizationResponse(authorized=True, details={})
+
+
+def token(exp: float) -> str:
+    return jwt.encode({"sub": "user", "exp": exp}, "secret")
+
+
+def test_to_event():
+    revoked = {
+        "operationType": "update",
+        "ns": {"coll": "tauth-keys"},
+        "documentKey": {"_id": ObjectId(KEY_ID)},
+        "updateDescription": {"updatedFields": {"deleted": True}},
+    }
+    created = {"operationType": "insert", "ns": {"coll": "tauth-keys"}}
+    role = {"operationType": "update", "ns": {"coll": "authz-roles"}}
+
+    assert events.to_event(revoked) == {"type": "key_revoked", "id": KEY_ID}
+    assert events.to_event(created) is None
+    assert events.to_event(role) == {"type": "access_changed"}
+
+
+def test_key_revoked():
+    cache = AuthCache()
+    for key in (KEY, OTHER):
+        cache.set_decision(key, b"{}", ALLOWED)
+
+    cache.apply({"type": "key_revoked", "id": KEY_ID})
+
+    assert cache.get_decision(KEY, b"{}") is None
+    assert cache.get_decision(OTHER, b"{}") == ALLOWED
+
+
+def test_access_changed_and_reset():
+    cache = AuthCache()
+    cache.set_decision(KEY, b"{}", ALLOWED)
+    cache.set_identity(KEY, "infostar")
+
+    cache.apply({"type": "access_changed"})
+    assert cache.get_decision(KEY, b"{}") is None
+    assert cache.get_identity(KEY) == "infostar"
+
+    cache.apply({"type": "reset"})
+    assert cache.get_identity(KEY) is None
+
+
+def test_ttl_bounded_by_token_expiry():
+    cache = AuthCache(ttl=60)
+    expired, valid = token(time.time() - 1), token(time.time() + 3600)
+    for t in (expired, valid):
+        cache.set_decision(t, b"{}", ALLOWED)
+
+    assert cache.get_decision(expired, b"{}") is None
+    assert cache.get_decision(valid, b"{}") == ALLOWED
+    assert cache.get_decision(valid, b'{"rule": "other"}') is None
+
+
+def test_event_parser():
+    stream = (
+        'retry: 5000\n\n: heartbeat\n\ndata: {"type": "reset"}\n\n'
+        'data: {"type": "key_revoked",\ndata: "id": "abc"}\n\n'
+    )
+    parser = EventParser()
+    parsed = [parser.feed(line) for line in stream.split("\n")]
+
+    assert [e for e in parsed if e is not None] == [
+        {"type": "reset"},
+        {"type": "key_revoked", "id": "abc"},
+    ]
@@ -0,0 +1,30 @@
+from tauth.entities.models import EntityDAO
+
+from .utils import INFOSTAR
+
+
+def make_entity() -> EntityDAO:
+    return EntityDAO(
+        handle="user@teialabs.com",
+        owner_ref={"handle": "/teialabs", "type": "organization"},
+        type="user",
+        created_by=INFOSTAR,
+    )
+
+
+def test_new_documents_hash_their_id():
+    entity = make_entity()
+    assert entity.id
+    assert entity.bson()["_id"] == entity.id
+
+
+def test_read_documents_keep_the_stored_id(monkeypatch):
+    document = make_entity().bson()
+
+    def hashable_fields(self):
+        raise AssertionError("The stored id was hashed again.")
+
+    monkeypatch.setattr(EntityDAO, "hashable_fields", hashable_fields)
+    for entity in (EntityDAO.model_validate(document), EntityDAO(**document)):
+        assert entity.id == document["_id"]
+        assert entity.model_dump(by_alias=True) == document
@@ -0,0 +1,38 @@
+from bson import ObjectId
+
+from tauth.authn.tauth_keys.models import TauthTokenDAO
+from tauth.authz import utils
+from tauth.authz.permissions.schemas import PermissionContext
+from tauth.utils import identity_map
+from tauth.utils.identity_map import IdentityMap
+
+ROLE = ObjectId()
+TOKEN = TauthTokenDAO.model_construct(roles=[ROLE])
+
+
+def test_token_permissions_per_request(monkeypatch):
+    granted = {PermissionContext(name="ds::read", entity_handle="ds")}
+    calls = []
+
+    def from_roles(roles):
+        calls.append(list(roles))
+        return set(granted)
+
+    monkeypatch.setattr(utils, "get_permission_set_from_roles", from_roles)
+
+    token = identity_map._CURRENT.set(IdentityMap())
+    try:
+        assert utils.get_token_permissions(TOKEN) == granted
+        assert utils.get_token_permissions(TOKEN) == granted
+    finally:
+        identity_map._CURRENT.reset(token)
+    assert len(calls) == 1
+
+    # Later requests see role and permission changes right away
+    granted.clear()
+    token = identity_map._CURRENT.set(IdentityMap())
+    try:
+        assert utils.get_token_permissions(TOKEN) == frozenset()
+    finally:
+        identity_map._CURRENT.reset(token)
+    assert len(calls) == 2
@@ -1,5 +1,24 @@
+from collections.abc import Iterable
 from datetime import datetime
 
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from tauth.schemas import Infostar
+
+INFOSTAR = Infostar(
+    request_id=ObjectId(),
+    apikey_name="default",
+    authprovider_org="/",
+    authprovider_type="melt-key",
+    extra={},
+    service_handle="tauth",
+    user_handle="sysadmin@teialabs.com",
+    user_owner_handle="/",
+    original=None,
+    client_ip="127.0.0.1",
+)
+
 
 def validate_id(key, obj: dict):
     assert key in obj
@@ -86,3 +105,165 @@ def validate_chatml_role(key, obj):
     assert key in obj
     assert isinstance(obj[key], str)
     assert obj[key] in {"system", "user", "assistant"}
+
+
+def get_field(document: dict, field: str):
+    value = document
+    for part in field.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def matches(document: dict, filter: dict) -> bool:
+    """Whether `document` matches a (small subset of a) MongoDB filter."""
+    for field, condition in filter.items():
+        if field == "$or":
+            if not any(matches(document, f) for f in condition):
+                return False
+            continue
+        if field == "$and":
+            if not all(matches(document, f) for f in condition):
+                return False
+            continue
+        value = get_field(document, field)
+        if isinstance(condition, dict) and "$in" in condition:
+            if value not in condition["$in"]:
+                return False
+        elif isinstance(condition, dict) and "$gt" in condition:
+            if value is None or not value > condition["$gt"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class Cursor(list):
+    closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.closed = True
+
+
+class Collection:
+    """
+    In-memory stand-in for a pymongo collection.
+
+    Each call is recorded in `calls` as `(method, arguments)`. Only the
+    filters (see `matches`) and update operators used by tauth are
+    supported.
+    """
+
+    def __init__(self, documents: Iterable[dict] = ()):
+        self.documents = list(documents)
+        self.calls: list[tuple[str, dict]] = []
+        self.cursor = Cursor()
+
+    def calls_to(self, method: str) -> list[dict]:
+        return [arguments for name, arguments in self.calls if name == method]
+
+    def find(self, filter=None, projection=None, **kwargs) -> Cursor:
+        self.calls.append(
+            ("find", dict(filter=filter, projection=projection, **kwargs))
+        )
+        self.cursor = Cursor(
+            d for d in self.documents if matches(d, filter or {})
+        )
+        return self.cursor
+
+    def find_one(self, filter=None, projection=None) -> dict | None:
+        self.calls.append(
+            ("find_one", dict(filter=filter, projection=projection))
+        )
+        found = (d for d in self.documents if matches(d, filter or {}))
+        return next(found, None)
+
+    def insert_many(self, documents, ordered=True):
+        documents = list(documents)
+        self.calls.append(
+            ("insert_many", dict(documents=documents, ordered=ordered))
+        )
+        ids = {d["_id"] for d in self.documents}
+        errors = []
+        for index, document in enumerate(documents):
+            if document["_id"] in ids:
+                errors.append(
+                    {"index": index, "code": 11000, "errmsg": "E11000"}
+                )
+                if ordered:
+                    break
+                continue
+            ids.add(document["_id"])
+            self.documents.append(document)
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+    def update_one(self, filter, update, upsert=False):
+        self.calls.append(
+            ("update_one", dict(filter=filter, update=update, upsert=upsert))
+        )
+        found = (d for d in self.documents if matches(d, filter))
+        document = next(found, None)
+        if document is None:
+            if not upsert:
+                return
+            document = {
+                k: v for k, v in filter.items() if not k.startswith("$")
+            }
+            self.documents.append(document)
+        apply_update(document, update)
+
+    def bulk_write(self, requests, ordered=True):
+        self.calls.append(
+            ("bulk_write", dict(requests=requests, ordered=ordered))
+        )
+        for request in requests:
+            for document in self.documents:
+                if matches(document, request._filter):
+                    apply_update(document, request._doc)
+                    break
+
+        class Result:
+            bulk_api_result: dict = {}
+
+        return Result()
+
+
+def count_calls(collections: Iterable[Collection]) -> int:
+    return sum(len(c.calls) for c in collections)
+
+
+def apply_update(document: dict, update: dict):
+    for operator, fields in update.items():
+        for field, value in fields.items():
+            if operator == "$set":
+                document[field] = value
+            elif operator == "$addToSet":
+                values = document.setdefault(field, [])
+                each = [value]
+                if isinstance(value, dict) and "$each" in value:
+                    each = value["$each"]
+                values.extend(v for v in each if v not in values)
+            elif operator == "$pull":
+                document[field] = [
+                    v for v in document.get(field, []) if not pulls(v, value)
+                ]
+            else:
+                raise NotImplementedError(f"Unsupported update: {operator}")
+
+
+def pulls(value, condition) -> bool:
+    if isinstance(condition, dict) and "$in" in condition:
+        return value in condition["$in"]
+    if isinstance(condition, dict):
+        return isinstance(value, dict) and matches(value, condition)
+    return value == condition
+
+
+def patch_collection(monkeypatch, model: type, collection: Collection):
+    """Makes `model.collection(alias)` return `collection`."""
+    monkeypatch.setattr(
+        model, "collection", classmethod(lambda cls, alias: collection)
+    )